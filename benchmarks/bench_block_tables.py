@@ -0,0 +1,84 @@
+"""Compares loading the block tables from the Python modules and from the binary table file.
+
+Every measurement runs in a fresh interpreter, which loads all block and offset tables and
+reports the time taken and the memory retained by the tables, measured with tracemalloc.
+The Python modules are measured both with their cached bytecode and compiled from source.
+
+Usage:
+    python -m benchmarks.bench_block_tables [--repeat N]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+
+def load_modules():
+    from importlib import import_module
+    from pygbx import blocks
+
+    modules = list(blocks._BLOCK_TABLE_MODULES.values()) + list(blocks._BLOCK_OFFSET_MODULES.values())
+    return [getattr(import_module(module), name) for module, name in modules]
+
+
+def load_binary():
+    from pygbx import blocks
+
+    return [blocks.BLOCK_TABLES[env] for env in blocks.BLOCK_TABLES] + \
+        [blocks.BLOCK_OFFSETS[env] for env in blocks.BLOCK_OFFSETS]
+
+
+def measure(method, trace):
+    # Import the package first, so that only the tables are measured
+    import pygbx.blocks
+
+    load = load_modules if method == 'modules' else load_binary
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    tables = load()
+    elapsed = time.perf_counter() - start
+    retained = tracemalloc.get_traced_memory()[0] if trace else None
+    return {'time': elapsed, 'retained': retained, 'entries': sum(len(t) for t in tables)}
+
+
+def run_child(method, trace, env=None):
+    out = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.bench_block_tables', '--child', method, '--trace', str(int(trace))],
+        check=True,
+        stdout=subprocess.PIPE, env=env, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+    return json.loads(out.stdout)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--trace', type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(measure(args.child, bool(args.trace))))
+        return
+
+    run_child('modules', False)
+    print(f'{"source":24} {"time (ms)":>10} {"retained KB":>12} {"entries":>8}')
+    with tempfile.TemporaryDirectory() as tmp:
+        cases = [
+            ('python modules (cached)', 'modules', None),
+            ('python modules (compile)', 'modules', dict(os.environ, PYTHONPYCACHEPREFIX=tmp, PYTHONDONTWRITEBYTECODE='1')),
+            ('binary table file', 'binary', None)
+        ]
+        for name, method, env in cases:
+            best = min((run_child(method, False, env) for _ in range(args.repeat)), key=lambda r: r['time'])
+            retained = run_child(method, True, env)['retained']
+            print(f'{name:24} {best["time"] * 1e3:10.2f} {retained / 1e3:12.1f} {best["entries"]:8}')
+
+
+if __name__ == '__main__':
+    main()
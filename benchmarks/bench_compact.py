@@ -0,0 +1,66 @@
+"""Compares the compact representation of parsed classes (to_compact) with pickle.
+
+For a synthetic Challenge, ghost and Replay record, the benchmark reports the size of the serialized
+data and the time taken to serialize and restore it, with to_compact/from_compact and with pickle
+using the highest protocol. Files are parsed with keep_data disabled, as they would be in a worker
+process sending results back.
+
+Usage:
+    python -m benchmarks.bench_compact [--blocks N] [--items N] [--samples N] [--entries N] [--repeat N]
+"""
+import argparse
+import pickle
+import time
+
+from benchmarks import synthetic
+from pygbx.gbx import Gbx, GbxType
+
+
+def best_time(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def measure(name, obj, repeat):
+    cls = type(obj)
+    data = obj.to_compact()
+    compact_dump = best_time(obj.to_compact, repeat)
+    compact_load = best_time(lambda: cls.from_compact(data), repeat)
+    print(f'{name:22} {"compact":8} {len(data) / 1e3:10.1f} {compact_dump * 1e3:10.2f} {compact_load * 1e3:10.2f}')
+
+    try:
+        pickled = pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)
+    except (TypeError, pickle.PicklingError) as e:
+        print(f'{name:22} {"pickle":8} cannot be pickled: {e}')
+        return
+
+    pickle_dump = best_time(lambda: pickle.dumps(obj, pickle.HIGHEST_PROTOCOL), repeat)
+    pickle_load = best_time(lambda: pickle.loads(pickled), repeat)
+    print(f'{name:22} {"pickle":8} {len(pickled) / 1e3:10.1f} {pickle_dump * 1e3:10.2f} {pickle_load * 1e3:10.2f}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--blocks', type=int, default=5000, help='the number of blocks of the map')
+    parser.add_argument('--items', type=int, default=500, help='the number of items of the map')
+    parser.add_argument('--samples', type=int, default=5000, help='the number of ghost samples')
+    parser.add_argument('--entries', type=int, default=2000, help='the number of control entries')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    challenge = Gbx(synthetic.challenge(args.blocks, args.items), keep_data=False)
+    replay = Gbx(synthetic.replay(args.samples, args.entries, map_blocks=args.blocks), keep_data=False)
+
+    print(f'{"class":22} {"format":8} {"size KB":>10} {"dump ms":>10} {"load ms":>10}')
+    measure('CGameChallenge', challenge.get_class_by_id(GbxType.CHALLENGE), args.repeat)
+    measure('CGameCtnGhost', replay.get_class_by_id(GbxType.CTN_GHOST), args.repeat)
+    measure('CGameReplayRecord', replay.get_class_by_id(GbxType.REPLAY_RECORD), args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Measures the time taken to import pygbx, using the -X importtime option of the interpreter.
+
+Every statement is run in a fresh interpreter, several times, and the best cumulative import
+time of the pygbx package is reported together with the slowest pygbx modules. The statements
+cover a plain import, reading only the header of a file and the first access to a block table.
+
+Usage:
+    python -m benchmarks.bench_import [--repeat N] [--top N]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+STATEMENTS = [
+    ('import pygbx', 'import pygbx'),
+    ('header-only tool', 'from pygbx import Gbx, GbxType'),
+    ('block table access', 'import pygbx; pygbx.STADIUM_BLOCKS'),
+    ('block index', 'import pygbx.block_index')
+]
+
+
+def import_times(statement):
+    """Runs the statement with -X importtime.
+
+    Returns:
+        a dict of module name to a (self, cumulative, nesting level) tuple, times are in microseconds
+    """
+    out = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement], check=True,
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+
+    times = {}
+    for line in out.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        times[name.strip()] = (int(self_us), int(cumulative_us), level)
+
+    return times
+
+
+def total_time(times):
+    """Returns the cumulative import time of the pygbx modules imported at the top level."""
+    return sum(t[1] for m, t in times.items() if m.split('.')[0] == 'pygbx' and t[2] == 0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=5, help='the number of slowest pygbx modules listed')
+    args = parser.parse_args(argv)
+
+    for name, statement in STATEMENTS:
+        runs = [import_times(statement) for _ in range(args.repeat)]
+        best = min(runs, key=total_time)
+        modules = {m: t for m, t in best.items() if m.split('.')[0] == 'pygbx'}
+        total = total_time(best)
+        print(f'{name:20} {total / 1e3:8.2f} ms  ({statement})')
+
+        for module, (self_us, _, _) in sorted(modules.items(), key=lambda m: m[1][0], reverse=True)[:args.top]:
+            print(f'    {module:32} {self_us / 1e3:8.2f} ms self')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Checks the memory retained by parsed Gbx files against per-element budgets.
+
+The benchmark generates synthetic files of two sizes with benchmarks.synthetic, parses them with
+keep_data disabled and measures the memory still allocated afterwards with tracemalloc. The
+difference between the two sizes gives the retained bytes per block, per item, per ghost sample
+and per control entry, independently of the fixed cost of a file. Gbx.memory_report is printed
+for the larger file of every kind. The raw ghost sample check parses with read_samples disabled,
+in which case keep_data=False keeps the raw sample data of ghosts, so it measures the held samples.
+
+If a measured value exceeds its budget, the benchmark exits with a non-zero status, so it can be
+used to catch memory regressions, e.g after adding members to the classes in pygbx.headers.
+
+Usage:
+    python -m benchmarks.bench_memory [--small N] [--large N] [--block-budget B] [--item-budget B]
+                                      [--sample-budget B] [--raw-sample-budget B] [--entry-budget B]
+"""
+import argparse
+import gc
+import sys
+import tracemalloc
+
+from benchmarks import synthetic
+from pygbx.gbx import Gbx
+
+
+def retained(data, **kwargs):
+    """Parses data and returns the number of bytes retained by the Gbx instance, and the instance."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        g = Gbx(data, keep_data=False, **kwargs)
+        gc.collect()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+    return after - before, g
+
+
+def per_element(generate, small, large, **kwargs):
+    """Returns the retained bytes per element and the instance parsed from the larger file."""
+    small_size, _ = retained(generate(small), **kwargs)
+    large_size, g = retained(generate(large), **kwargs)
+    return (large_size - small_size) / (large - small), g
+
+
+def print_report(name, g):
+    report = g.memory_report()
+    parts = ', '.join(f'{k} {v / 1e3:.1f}' for k, v in report.items() if v and k != 'total')
+    print(f'  {name} memory_report (KB): total {report["total"] / 1e3:.1f}: {parts}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--small', type=int, default=1000, help='the number of elements of the small files')
+    parser.add_argument('--large', type=int, default=4500, help='the number of elements of the large files')
+    parser.add_argument('--block-budget', type=float, default=350, help='bytes per block')
+    parser.add_argument('--item-budget', type=float, default=450, help='bytes per item')
+    parser.add_argument('--sample-budget', type=float, default=600, help='bytes per ghost sample')
+    parser.add_argument('--raw-sample-budget', type=float, default=64, help='bytes per raw ghost sample')
+    parser.add_argument('--entry-budget', type=float, default=200, help='bytes per control entry')
+    args = parser.parse_args(argv)
+
+    checks = [
+        ('block', args.block_budget, lambda n: synthetic.challenge(n), {}),
+        ('item', args.item_budget, lambda n: synthetic.challenge(0, n), {}),
+        ('ghost sample', args.sample_budget, lambda n: synthetic.replay(n, map_blocks=1), {}),
+        ('raw ghost sample', args.raw_sample_budget, lambda n: synthetic.replay(n, map_blocks=1),
+         {'read_samples': False}),
+        ('control entry', args.entry_budget, lambda n: synthetic.replay(10, n, map_blocks=1), {}),
+    ]
+
+    failed = []
+    for name, budget, generate, kwargs in checks:
+        size, g = per_element(generate, args.small, args.large, **kwargs)
+        status = 'ok' if size <= budget else 'FAIL'
+        print(f'{name:18} {size:8.1f} bytes (budget {budget:.0f}) {status}')
+        print_report(name, g)
+        if size > budget:
+            failed.append(name)
+
+    if failed:
+        print(f'Memory budget exceeded: {", ".join(failed)}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
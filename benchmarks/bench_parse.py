@@ -0,0 +1,81 @@
+"""Times parsing of synthetic Challenge and Replay files.
+
+The benchmark generates files with benchmarks.synthetic and times, from memory:
+    - header-only parse of Challenges (Gbx(data, header_only=True))
+    - full parse of Challenges
+    - full parse of Replays, including the embedded map and ghost samples
+    - decoding of ghost samples alone (Gbx.read_ghost)
+
+Throughput is reported in files (or ghosts) per second and MB per second of file data.
+
+Usage:
+    python -m benchmarks.bench_parse [--files N] [--blocks N] [--items N] [--samples N] [--repeat N]
+"""
+import argparse
+import time
+
+from benchmarks import synthetic
+from pygbx import headers
+from pygbx.bytereader import ByteReader
+from pygbx.gbx import Gbx
+
+
+def best_time(func, inputs, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for data in inputs:
+            func(data)
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def ghost_chunk(data):
+    bp = Gbx(data, read_samples=False).find_raw_chunk_id(0x0303F006)
+    bp.skip(4)
+    start = bp.pos
+    bp.skip(4)
+    compressed_size = bp.read_uint32()
+    return bytes(bp.data[start:bp.pos + compressed_size])
+
+
+def read_ghost(chunk):
+    Gbx.read_ghost(headers.CGameCtnGhost(0x03092000), ByteReader(chunk))
+
+
+def report(name, count, size, elapsed):
+    print(f'{name:24} {count / elapsed:10.1f} files/s {size / elapsed / 1e6:8.1f} MB/s '
+          f'{elapsed / count * 1e3:9.3f} ms/file')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=20, help='the number of files of each type')
+    parser.add_argument('--blocks', type=int, default=1000, help='the number of blocks per map')
+    parser.add_argument('--items', type=int, default=100, help='the number of items per map')
+    parser.add_argument('--samples', type=int, default=2000, help='the number of samples per ghost')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    maps = [synthetic.challenge(args.blocks, args.items, uid=f'Map{i}', seed=i) for i in range(args.files)]
+    replays = [synthetic.replay(args.samples, uid=f'Map{i}', seed=i) for i in range(args.files)]
+    ghosts = [ghost_chunk(data) for data in replays]
+
+    map_size = sum(len(data) for data in maps)
+    replay_size = sum(len(data) for data in replays)
+    ghost_size = sum(len(data) for data in ghosts)
+    print(f'{args.files} maps ({args.blocks} blocks, {args.items} items), '
+          f'{args.files} replays ({args.samples} samples)')
+
+    report('map header only', len(maps), map_size,
+           best_time(lambda data: Gbx(data, header_only=True), maps, args.repeat))
+    report('map full parse', len(maps), map_size, best_time(Gbx, maps, args.repeat))
+    report('replay full parse', len(replays), replay_size, best_time(Gbx, replays, args.repeat))
+    report('replay raw samples', len(replays), replay_size,
+           best_time(lambda data: Gbx(data, read_samples=False), replays, args.repeat))
+    report('ghost decode', len(ghosts), ghost_size, best_time(read_ghost, ghosts, args.repeat))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""Measures the peak resident memory (RSS) of parsing Gbx files.
+
+Every measurement runs in a fresh interpreter, so the peak RSS reported by getrusage reflects
+a single parse. For each file, the increase of the peak RSS caused by parsing is reported relative
+to the size of the decompressed body, as well as the memory still retained once parsing is done,
+with keep_data enabled and disabled. If no paths are provided, a large synthetic Challenge
+and Replay are generated.
+
+Usage:
+    python -m benchmarks.bench_peak_rss [PATH ...]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+from benchmarks import synthetic
+from pygbx.gbx import Gbx
+
+
+def current_rss():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+
+def peak_rss():
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def body_size(data):
+    bp = Gbx(data, header_only=True).root_parser
+    return bp.read_uint32()
+
+
+def measure(path, keep_data):
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    size = body_size(data)
+    peak_before = peak_rss()
+    rss_before = current_rss()
+
+    g = Gbx(data, keep_data=keep_data)
+    del data
+
+    rss_after = current_rss()
+    return {
+        'body_size': size,
+        'peak_increase': peak_rss() - peak_before,
+        'retained': None if rss_after is None or rss_before is None else rss_after - rss_before,
+        'num_classes': len(g.classes)
+    }
+
+
+def run_child(path, keep_data):
+    out = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.bench_peak_rss', '--child', path, str(int(keep_data))],
+        check=True, stdout=subprocess.PIPE, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+    return json.loads(out.stdout)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('paths', nargs='*', help='Gbx files')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(measure(args.paths[0], bool(int(args.paths[1])))))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = args.paths
+        if not paths:
+            paths = [os.path.join(tmp, 'Large.Challenge.Gbx'), os.path.join(tmp, 'Large.Replay.Gbx')]
+            with open(paths[0], 'wb') as f:
+                f.write(synthetic.challenge(100000, 10000))
+            with open(paths[1], 'wb') as f:
+                f.write(synthetic.replay(100000, 10000))
+
+        print(f'{"file":40} {"body MB":>8} {"keep_data":>9} {"peak MB":>8} {"peak/body":>9} {"retained MB":>11}')
+        for path in paths:
+            for keep_data in (True, False):
+                r = run_child(path, keep_data)
+                retained = '-' if r['retained'] is None else f'{r["retained"] / 1e6:.2f}'
+                print(f'{os.path.basename(path)[:40]:40} {r["body_size"] / 1e6:8.2f} {str(keep_data):>9} '
+                      f'{r["peak_increase"] / 1e6:8.2f} {r["peak_increase"] / max(r["body_size"], 1):9.2f} '
+                      f'{retained:>11}')
+
+
+if __name__ == '__main__':
+    main()
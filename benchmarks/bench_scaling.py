@@ -0,0 +1,129 @@
+"""Compares the scaling of parsing Gbx files with worker processes and worker threads.
+
+The benchmark first times every registered LZO and zlib decompressor on the data of the
+provided files, then parses all files with parse_files using both executors and an
+increasing number of workers. If no paths are provided, a synthetic corpus is generated.
+
+Usage:
+    python -m benchmarks.bench_scaling [PATH ...] [--workers 1 2 4 8] [--lzo NAME] [--repeat N]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks import synthetic
+from pygbx import compression
+from pygbx.batch import find_gbx_files, parse_files
+from pygbx.gbx import Gbx
+
+
+def collect(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(find_gbx_files(path))
+        else:
+            files.append(path)
+
+    return files
+
+
+def num_classes(g):
+    return len(g.classes)
+
+
+def compressed_body(data):
+    g = Gbx(data, header_only=True)
+    bp = g.root_parser
+    size = bp.read_uint32()
+    compressed_size = bp.read_uint32()
+    return bytes(bp.read(compressed_size)), size
+
+
+def ghost_streams(data):
+    g = Gbx(data, read_samples=False)
+    bp = g.find_raw_chunk_id(0x0303F006)
+    if not bp:
+        return []
+
+    bp.skip(4)
+    size = bp.read_uint32()
+    compressed_size = bp.read_uint32()
+    return [(bytes(bp.read(compressed_size)), size)]
+
+
+def bench_decompressors(files, repeat):
+    print('Decompressors:')
+    contents = []
+    for path in files:
+        with open(path, 'rb') as f:
+            contents.append(f.read())
+
+    inputs = {
+        'lzo': [compressed_body(data) for data in contents],
+        'zlib': [stream for data in contents for stream in ghost_streams(data)]
+    }
+
+    for algorithm, streams in inputs.items():
+        if not streams:
+            continue
+
+        total = sum(size for _, size in streams)
+        active = compression.get_decompressor(algorithm).name
+        for name in compression.available_decompressors(algorithm):
+            compression.set_decompressor(algorithm, name)
+            best = float('inf')
+            for _ in range(repeat):
+                start = time.perf_counter()
+                for data, size in streams:
+                    compression.decompress(algorithm, data, size)
+                best = min(best, time.perf_counter() - start)
+
+            gil = 'releases GIL' if compression.get_decompressor(algorithm).releases_gil else 'holds GIL'
+            print(f'  {algorithm:5} {name:16} {total / best / 1e6:10.1f} MB/s  ({gil})')
+
+        compression.set_decompressor(algorithm, active)
+
+
+def bench_executors(files, workers, repeat):
+    total_bytes = sum(os.path.getsize(path) for path in files)
+    print(f'Parsing {len(files)} files ({total_bytes / 1e6:.1f} MB):')
+    for executor in ('process', 'thread'):
+        baseline = None
+        for num_workers in workers:
+            best = float('inf')
+            for _ in range(repeat):
+                start = time.perf_counter()
+                for _ in parse_files(files, num_classes, num_workers, executor=executor):
+                    pass
+                best = min(best, time.perf_counter() - start)
+
+            baseline = baseline or best
+            print(f'  {executor:7} workers={num_workers:<3} {len(files) / best:10.1f} files/s '
+                  f'{total_bytes / best / 1e6:8.1f} MB/s  speedup {baseline / best:5.2f}x')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('paths', nargs='*', help='Gbx files or directories containing Gbx files')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument('--lzo', help='the name of the LZO decompressor used for parsing')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    if args.lzo:
+        compression.set_decompressor('lzo', args.lzo)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.paths:
+            files = collect(args.paths)
+        else:
+            files = synthetic.write_corpus(tmp, num_maps=100, num_replays=100)
+
+        bench_decompressors(files, args.repeat)
+        bench_executors(files, sorted(set(args.workers)), args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,390 @@
+"""Generates synthetic but valid Challenge and Replay Gbx files for benchmarks.
+
+The generated files contain the chunks supported by the Gbx class: a Challenge has medal times,
+N blocks in chunk 0x0304301F and N items in chunk 0x03043040, a Replay has a header, an embedded
+Challenge and a ghost with M samples and control entries. Bodies are compressed with LZO and ghost
+samples with zlib, as in files saved by the game, so parsing them exercises the same code paths.
+
+Usage:
+    python -m benchmarks.synthetic OUTPUT_DIR [--maps N] [--replays N] [--blocks N] [--items N] [--samples N]
+"""
+import argparse
+import math
+import os
+import random
+import struct
+import zlib
+
+import lzo
+
+BLOCK_NAMES = [
+    'StadiumRoadMain', 'StadiumRoadMainCheckpoint', 'StadiumRoadMainStartLine', 'StadiumRoadMainFinishLine',
+    'StadiumPlatformToRoadMain', 'StadiumLoopLeft', 'StadiumRoadMainGTCurve2', 'StadiumCircuitCheckpoint'
+]
+
+CONTROL_NAMES = ['_FakeIsRaceRunning', 'Accelerate', 'Brake', 'SteerLeft', 'SteerRight', 'Steer']
+
+
+class Writer(object):
+    """Writes the data types of the GBX file format, the counterpart of ByteReader."""
+
+    def __init__(self):
+        self.buf = bytearray()
+        self.seen_lookback = False
+        self.strings = []
+
+    def uint32(self, v):
+        self.buf += struct.pack('<I', v)
+
+    def int32(self, v):
+        self.buf += struct.pack('<i', v)
+
+    def uint16(self, v):
+        self.buf += struct.pack('<H', v)
+
+    def int16(self, v):
+        self.buf += struct.pack('<h', v)
+
+    def uint8(self, v):
+        self.buf += struct.pack('<B', v)
+
+    def int8(self, v):
+        self.buf += struct.pack('<b', v)
+
+    def float(self, v):
+        self.buf += struct.pack('<f', v)
+
+    def raw(self, data):
+        self.buf += data
+
+    def string(self, s):
+        data = s.encode('utf-8')
+        self.uint32(len(data))
+        self.buf += data
+
+    def string_lookback(self, s):
+        if not self.seen_lookback:
+            self.uint32(3)
+            self.seen_lookback = True
+
+        if s in self.strings:
+            self.uint32(0x40000000 | (self.strings.index(s) + 1))
+        else:
+            self.strings.append(s)
+            self.uint32(0x40000000)
+            self.string(s)
+
+
+def gbx_file(class_id, header_chunks, body):
+    """Assembles a Gbx file from its header chunks and body, compressing the body with LZO.
+
+    Args:
+        class_id (int): the ID of the main class
+        header_chunks (list): a list of (chunk ID, bytes) tuples stored in the user data
+        body (bytes): the uncompressed body
+
+    Returns:
+        the file contents
+    """
+    user = Writer()
+    user.uint32(len(header_chunks))
+    for cid, data in header_chunks:
+        user.uint32(cid)
+        user.uint32(len(data))
+    for cid, data in header_chunks:
+        user.raw(data)
+
+    w = Writer()
+    w.raw(b'GBX')
+    w.uint16(6)
+    w.raw(b'BUCR')
+    w.uint32(class_id)
+    w.uint32(len(user.buf))
+    w.raw(user.buf)
+    w.uint32(2)
+    w.uint32(0)
+
+    cdata = lzo.compress(bytes(body), 1, False)
+    w.uint32(len(body))
+    w.uint32(len(cdata))
+    w.raw(cdata)
+    return bytes(w.buf)
+
+
+def challenge(num_blocks=1000, num_items=0, uid='SyntheticMapUid', author='pygbx', seed=0):
+    """Generates a Stadium Challenge.
+
+    Args:
+        num_blocks (int): the number of blocks
+        num_items (int): the number of items
+        uid (str): the map UID
+        author (str): the map author login
+        seed (int): the seed of the random block placement
+
+    Returns:
+        the file contents
+    """
+    rnd = random.Random(seed)
+
+    header = Writer()
+    header.uint8(11)
+    header.string_lookback(uid)
+    header.string_lookback('Stadium')
+    header.string_lookback(author)
+    header.string('Synthetic')
+    header.uint8(0)
+
+    b = Writer()
+    b.uint32(0x03043011)
+    b.int32(-1)
+    b.int32(1)
+    b.uint32(0x0305B000)
+    b.uint32(0x0305B004)
+    for t in (40000, 35000, 32000, 30000):
+        b.int32(t)
+    b.uint32(0)
+    b.uint32(0xFACADE01)
+    b.uint32(0)
+
+    b.uint32(0x0304301F)
+    b.string_lookback(uid)
+    b.string_lookback('Stadium')
+    b.string_lookback(author)
+    b.string('Synthetic')
+    b.string_lookback('Day')
+    b.string_lookback('Stadium')
+    b.string_lookback('Nadeo')
+    for v in (32, 32, 32):
+        b.int32(v)
+    b.int32(0)
+    b.int32(1)
+    b.uint32(num_blocks)
+    for _ in range(num_blocks):
+        b.string_lookback(BLOCK_NAMES[rnd.randrange(len(BLOCK_NAMES))])
+        b.uint8(rnd.randrange(4))
+        b.uint8(rnd.randrange(32))
+        b.uint8(rnd.randrange(1, 32))
+        b.uint8(rnd.randrange(32))
+        b.uint32(0x1000)
+
+    if num_items > 0:
+        items = Writer()
+        for _ in range(4):
+            items.uint32(0)
+        items.uint32(num_items)
+        for i in range(num_items):
+            items.raw(b'\0' * 12)
+            items.string_lookback(f'Items/Item{i % 10}.Item.Gbx')
+            items.string_lookback('26')
+            items.string_lookback(author)
+            items.float(rnd.random() * math.pi)
+            items.raw(b'\0' * 15)
+            for _ in range(3):
+                items.float(rnd.random() * 1024)
+            items.int32(-1)
+            items.raw(b'\0' * 18)
+            items.uint32(0xFACADE01)
+        items.uint32(0)
+
+        b.uint32(0x03043040)
+        b.uint32(0x534B4950)
+        b.uint32(len(items.buf))
+        b.raw(items.buf)
+
+    b.uint32(0xFACADE01)
+    return gbx_file(0x03043000, [(0x03043003, bytes(header.buf))], b.buf)
+
+
+def ghost_data(num_samples, sample_size=40, sample_period=50, seed=0):
+    """Generates uncompressed ghost sample data, as read by Gbx.read_ghost after decompression.
+
+    Args:
+        num_samples (int): the number of samples
+        sample_size (int): the size of every sample, at least 22 bytes
+        sample_period (int): the time between samples in milliseconds
+        seed (int): the seed of the random sample values
+
+    Returns:
+        the sample data
+    """
+    rnd = random.Random(seed)
+    samples = Writer()
+    x = z = 0.0
+    for i in range(num_samples):
+        x += math.cos(i / 50.0) * 2
+        z += math.sin(i / 50.0) * 2
+        start = len(samples.buf)
+        samples.float(x)
+        samples.float(9.0 + rnd.random())
+        samples.float(z)
+        samples.uint16(rnd.randrange(65536))
+        samples.int16(rnd.randrange(-32767, 32767))
+        samples.int16(rnd.randrange(-32767, 32767))
+        samples.int16(rnd.randrange(0, 6000))
+        samples.int8(rnd.randrange(-127, 127))
+        samples.int8(rnd.randrange(-127, 127))
+        samples.raw(b'\0' * (sample_size - (len(samples.buf) - start)))
+
+    g = Writer()
+    g.raw(b'\0' * 12)
+    g.uint32(sample_period)
+    g.uint32(0)
+    g.uint32(len(samples.buf))
+    g.raw(samples.buf)
+    g.uint32(num_samples)
+    g.uint32(0)
+    if num_samples > 1:
+        g.int32(sample_size)
+    return bytes(g.buf)
+
+
+def replay(num_samples=1000, num_entries=200, num_cps=5, race_time=30000, uid='SyntheticMapUid',
+           login='pygbx', map_blocks=100, sample_size=40, seed=0, cp_times=None, sample_period=None):
+    """Generates a Replay containing a single ghost.
+
+    Args:
+        num_samples (int): the number of ghost samples
+        num_entries (int): the number of control entries (inputs)
+        num_cps (int): the number of checkpoint times
+        race_time (int): the race time in milliseconds
+        uid (str): the UID of the map
+        login (str): the login of the driver
+        map_blocks (int): the number of blocks of the embedded map, 0 to not embed a map
+        sample_size (int): the size of every ghost sample
+        seed (int): the seed of the random values
+        cp_times (list): the checkpoint times, None spreads num_cps times evenly up to race_time.
+            Unfinished runs store 0xFFFFFFFF for checkpoints they did not reach and as their race time
+        sample_period (int): the time between samples, None spreads the samples over the run
+
+    Returns:
+        the file contents
+    """
+    rnd = random.Random(seed)
+    if cp_times is None:
+        cp_times = [int(race_time * (i + 1) / num_cps) for i in range(num_cps)]
+    # Samples and inputs of an unfinished run stop a second after its last checkpoint
+    reached = [t for t in cp_times if t != 0xFFFFFFFF]
+    duration = race_time if race_time != 0xFFFFFFFF else max(reached, default=0) + 1000
+    if sample_period is None:
+        sample_period = duration // max(num_samples, 1) or 1
+
+    header = Writer()
+    header.uint32(6)
+    header.string_lookback(uid)
+    header.string_lookback('Stadium')
+    header.string_lookback('Nadeo')
+    header.uint32(race_time)
+    header.string(login)
+    header.string(login)
+    header.uint8(0)
+    header.string_lookback('TMStadium')
+
+    b = Writer()
+    b.uint32(0x03093002)
+    track = challenge(map_blocks, uid=uid, seed=seed) if map_blocks > 0 else b''
+    b.uint32(len(track))
+    b.raw(track)
+
+    b.uint32(0x03093014)
+    b.uint32(0)
+    b.uint32(1)
+    b.int32(1)
+    b.uint32(0x03092000)
+
+    b.uint32(0x03092005)
+    b.uint32(race_time)
+    b.uint32(0x03092008)
+    b.uint32(0)
+    b.uint32(0x0309200B)
+    b.uint32(len(cp_times))
+    for time in cp_times:
+        b.uint32(time)
+        b.uint32(0)
+    b.uint32(0x0309200E)
+    b.string_lookback(uid)
+    b.uint32(0x0309200F)
+    b.string(login)
+
+    data = ghost_data(num_samples, sample_size, sample_period, seed)
+    compressed = zlib.compress(data)
+    b.uint32(0x0303F006)
+    b.uint32(0)
+    b.uint32(len(data))
+    b.uint32(len(compressed))
+    b.raw(compressed)
+
+    b.uint32(0x03092019)
+    b.uint32(duration)
+    b.uint32(0)
+    b.uint32(len(CONTROL_NAMES))
+    for name in CONTROL_NAMES:
+        b.string_lookback(name)
+    b.uint32(num_entries)
+    b.uint32(0)
+    for i in range(num_entries):
+        b.uint32(100000 + int(duration * i / max(num_entries, 1)))
+        b.uint8(rnd.randrange(len(CONTROL_NAMES)))
+        b.uint16(rnd.randrange(2))
+        b.uint16(0)
+    b.string('TmForever.2.11.26')
+    for _ in range(3):
+        b.uint32(0)
+    b.string('')
+    b.uint32(0)
+    b.uint32(0xFACADE01)
+
+    b.uint32(0)
+    b.uint32(0xFACADE01)
+    return gbx_file(0x03093000, [(0x03093000, bytes(header.buf))], b.buf)
+
+
+def write_corpus(directory, num_maps=50, num_replays=50, num_blocks=1000, num_items=0, num_samples=1000):
+    """Writes a corpus of synthetic Challenges and Replays to a directory.
+
+    Maps get distinct UIDs, replays are spread over the generated maps.
+
+    Args:
+        directory (str): the output directory, created if missing
+        num_maps (int): the number of Challenges
+        num_replays (int): the number of Replays
+        num_blocks (int): the number of blocks of every Challenge
+        num_items (int): the number of items of every Challenge
+        num_samples (int): the number of ghost samples of every Replay
+
+    Returns:
+        a list of the written file paths
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i in range(num_maps):
+        path = os.path.join(directory, f'Synthetic{i}.Challenge.Gbx')
+        with open(path, 'wb') as f:
+            f.write(challenge(num_blocks, num_items, uid=f'SyntheticMapUid{i}', seed=i))
+        paths.append(path)
+
+    for i in range(num_replays):
+        path = os.path.join(directory, f'Synthetic{i}.Replay.Gbx')
+        uid = f'SyntheticMapUid{i % max(num_maps, 1)}'
+        with open(path, 'wb') as f:
+            f.write(replay(num_samples, race_time=30000 + i * 10, uid=uid, login=f'player{i}', seed=i))
+        paths.append(path)
+
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('output')
+    parser.add_argument('--maps', type=int, default=50)
+    parser.add_argument('--replays', type=int, default=50)
+    parser.add_argument('--blocks', type=int, default=1000)
+    parser.add_argument('--items', type=int, default=0)
+    parser.add_argument('--samples', type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    paths = write_corpus(args.output, args.maps, args.replays, args.blocks, args.items, args.samples)
+    print(f'Wrote {len(paths)} files to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,28 @@
 from pygbx.headers import CGameHeader, CGameCtnCollectorList, CollectorStock, MapBlock, Vector3, CGameChallenge, CGameBlockItem, CGameWaypointSpecialProperty, CGameCommon, CGameReplayRecord, CGameGhost, CGameCtnGhost, ControlEntry, GhostSampleRecord
 from pygbx.bytereader import ByteReader
-from pygbx.stadium_blocks import STADIUM_BLOCKS
-from pygbx.canyon_blocks import CANYON_BLOCKS
-from pygbx.valley_blocks import VALLEY_BLOCKS
-from pygbx.lagoon_blocks import LAGOON_BLOCKS
-from pygbx.stadium_block_offsets import STADIUM_BLOCK_OFFSETS
-from pygbx.canyon_block_offsets import CANYON_BLOCK_OFFSETS
-from pygbx.gbx import Gbx, GbxType, GbxLoadError
\ No newline at end of file
+from pygbx.gbx import Gbx, GbxType, GbxLoadError
+
+# The block tables are large and only needed by some tools, so they are loaded on first access
+_LAZY_TABLES = {
+    'STADIUM_BLOCKS': ('Stadium', 'BLOCK_TABLES'),
+    'CANYON_BLOCKS': ('Canyon', 'BLOCK_TABLES'),
+    'VALLEY_BLOCKS': ('Valley', 'BLOCK_TABLES'),
+    'LAGOON_BLOCKS': ('Lagoon', 'BLOCK_TABLES'),
+    'STADIUM_BLOCK_OFFSETS': ('Stadium', 'BLOCK_OFFSETS'),
+    'CANYON_BLOCK_OFFSETS': ('Canyon', 'BLOCK_OFFSETS')
+}
+
+
+def __getattr__(name):
+    if name not in _LAZY_TABLES:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+    # The tables are converted to the plain dicts these names have always been, and cached
+    from pygbx import blocks
+    environment, registry = _LAZY_TABLES[name]
+    table = globals()[name] = dict(getattr(blocks, registry)[environment])
+    return table
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_TABLES))
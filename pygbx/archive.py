@@ -0,0 +1,178 @@
+import logging
+import tarfile
+import zipfile
+
+from pygbx.batch import pool_map
+from pygbx.gbx import Gbx
+
+
+class Archive(object):
+    """The Archive class provides uniform access to Gbx files stored in zip and tar archives.
+
+    Members are read straight into memory and parsed from bytes, without extracting
+    the archive to a temporary directory.
+
+        with Archive('maps.zip') as archive:
+            for name in archive.names():
+                g = archive.parse(name)
+    """
+
+    def __init__(self, path):
+        """Opens a zip or tar archive (optionally compressed with gzip, bzip2 or xz).
+
+        Args:
+            path (str): the path of the archive
+
+        Raises:
+            ValueError: raised when the file is neither a zip nor a tar archive
+        """
+        self.path = path
+        if zipfile.is_zipfile(path):
+            self.zip = zipfile.ZipFile(path)
+            self.tar = None
+        elif tarfile.is_tarfile(path):
+            self.zip = None
+            self.tar = tarfile.open(path)
+            self.__tar_members = {}
+        else:
+            raise ValueError(f'{path} is not a zip or tar archive')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Closes the archive."""
+        if self.zip:
+            self.zip.close()
+        else:
+            self.tar.close()
+
+    def names(self, all_files=False):
+        """Lists the members of the archive.
+
+        Args:
+            all_files (bool): whether to list all files, by default only names ending with .gbx are listed
+
+        Returns:
+            a list of member names, in the order they are stored in the archive
+        """
+        if self.zip:
+            names = [info.filename for info in self.zip.infolist() if not info.is_dir()]
+        else:
+            names = []
+            for member in self.tar.getmembers():
+                if member.isfile():
+                    self.__tar_members[member.name] = member
+                    names.append(member.name)
+
+        if all_files:
+            return names
+
+        return [name for name in names if name.lower().endswith('.gbx')]
+
+    def open(self, name):
+        """Opens a member of the archive as a file object.
+
+        The returned object can be passed to Gbx directly, although reading
+        the member with read is usually faster, as Gbx seeks while parsing.
+
+        Args:
+            name (str): the member name
+
+        Returns:
+            a binary file object
+        """
+        if self.zip:
+            return self.zip.open(name)
+
+        return self.tar.extractfile(self.__tar_members.get(name) or self.tar.getmember(name))
+
+    def read(self, name):
+        """Reads the contents of a member of the archive.
+
+        Args:
+            name (str): the member name
+
+        Returns:
+            the member contents as bytes
+        """
+        if self.zip:
+            return self.zip.read(name)
+
+        with self.open(name) as f:
+            return f.read()
+
+    def parse(self, name, **kwargs):
+        """Reads and parses a member of the archive.
+
+        Args:
+            name (str): the member name
+            **kwargs: the keyword arguments passed to Gbx
+
+        Returns:
+            the parsed Gbx instance
+        """
+        return Gbx(self.read(name), **kwargs)
+
+    def __iter__(self):
+        for name in self.names():
+            yield name, self.read(name)
+
+
+_worker_archive = None
+
+
+def _open_worker_archive(path):
+    global _worker_archive
+    _worker_archive = Archive(path)
+
+
+def _close_worker_archive():
+    global _worker_archive
+    if _worker_archive is not None:
+        _worker_archive.close()
+        _worker_archive = None
+
+
+def _parse_member(args):
+    name, func = args
+    try:
+        return name, func(_worker_archive.parse(name)), None
+    except Exception as e:
+        return name, None, f'{type(e).__name__}: {e}'
+
+
+def parse_archive(path, func, workers=None, chunksize=8):
+    """Parses all Gbx members of a zip or tar archive with a pool of worker processes.
+
+    Every worker opens the archive once and reads the members it was assigned, so member data
+    is never extracted to disk nor sent between processes. See parse_files for the requirements on func.
+
+    Compressed tar archives (.tar.gz, ...) can only be read sequentially, parsing them with
+    many workers makes every worker decompress the archive up to the members it reads.
+
+    Args:
+        path (str): the path of the archive
+        func (callable): called with the Gbx instance of every member, the return value is yielded
+        workers (int): the number of worker processes, None uses os.cpu_count(), 1 parses in the current process
+        chunksize (int): the number of members sent to a worker at once
+
+    Returns:
+        a generator of (member name, result, error) tuples, error being None or a string describing the failure
+    """
+    with Archive(path) as archive:
+        names = archive.names()
+
+    tasks = ((name, func) for name in names)
+    results = pool_map(_parse_member, tasks, workers, chunksize, initializer=_open_worker_archive, initargs=(path,))
+    try:
+        for name, result, error in results:
+            if error is not None:
+                logging.error(f'Failed to parse {name} in {path}: {error}')
+            yield name, result, error
+    finally:
+        results.close()
+        _close_worker_archive()
@@ -0,0 +1,121 @@
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from pygbx.gbx import Gbx
+
+
+def find_gbx_files(root):
+    """Walks the provided directory and collects paths of all Gbx files in it.
+
+    Args:
+        root (str): the directory to search
+
+    Returns:
+        a sorted list of file paths ending with .gbx (case insensitive)
+    """
+    paths = []
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            if filename.lower().endswith('.gbx'):
+                paths.append(os.path.join(dirpath, filename))
+
+    paths.sort()
+    return paths
+
+
+def _parse_path(args):
+    path, func, options = args
+    try:
+        return path, func(Gbx(path, **options)), None
+    except Exception as e:
+        return path, None, f'{type(e).__name__}: {e}'
+
+
+def parse_files(paths, func, workers=None, chunksize=8, executor='process', options=None):
+    """Parses the provided files with a pool of worker processes or threads.
+
+    Each file is parsed in a worker and the func callable is applied to the resulting
+    Gbx object. With worker processes, only the value returned by func is sent back to
+    the caller, so func should extract the data needed rather than return the Gbx object
+    itself, and func has to be picklable, e.g a function defined at the module level.
+
+    Worker threads avoid the cost of sending results between processes, but they only
+    scale with the number of threads if the active decompressors release the GIL,
+    see pygbx.compression.releases_gil.
+
+    Results are yielded in the order of the provided paths. If parsing a file fails,
+    the error is logged and yielded instead of the result.
+
+    Args:
+        paths (list): the file paths to parse
+        func (callable): called with the Gbx instance of every file, the return value is yielded
+        workers (int): the number of workers, None uses os.cpu_count(), 1 parses in the current thread
+        chunksize (int): the number of files sent to a worker process at once
+        executor (str): 'process' to parse in worker processes, 'thread' to parse in worker threads
+        options (dict): keyword arguments passed to Gbx, e.g {'read_samples': False}
+
+    Returns:
+        a generator of (path, result, error) tuples, error being None or a string describing the failure
+    """
+    options = options or {}
+    tasks = ((path, func, options) for path in paths)
+    yield from _log_errors(pool_map(_parse_path, tasks, workers, chunksize, executor))
+
+
+def pool_map(func, tasks, workers=None, chunksize=8, executor='process', initializer=None, initargs=()):
+    """Applies func to every task with a pool of worker processes or threads.
+
+    This is the pool used by parse_files and the parse functions of pygbx.pack and pygbx.archive.
+    With a single worker, tasks are run in the current thread. If the caller stops iterating early,
+    the tasks that have not started yet are cancelled.
+
+    Args:
+        func (callable): called with every task, has to be picklable with worker processes
+        tasks (iterable): the tasks
+        workers (int): the number of workers, None uses os.cpu_count(), 1 runs the tasks in the current thread
+        chunksize (int): the number of tasks sent to a worker process at once
+        executor (str): 'process' to run the tasks in worker processes, 'thread' to run them in worker threads
+        initializer (callable): called with initargs once in every worker, or in the current thread
+            with a single worker, before any task is run
+        initargs (tuple): the arguments of initializer
+
+    Returns:
+        a generator of the return values of func, in the order of the tasks
+
+    Raises:
+        ValueError: raised when the executor is unknown
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers <= 1:
+        if initializer is not None:
+            initializer(*initargs)
+        yield from map(func, tasks)
+        return
+
+    if executor == 'thread':
+        pool = ThreadPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs)
+        results = pool.map(func, tasks)
+    elif executor == 'process':
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs)
+        results = pool.map(func, tasks, chunksize=chunksize)
+    else:
+        raise ValueError(f"unknown executor {executor}, expected 'process' or 'thread'")
+
+    try:
+        yield from results
+    finally:
+        try:
+            pool.shutdown(cancel_futures=True)
+        except TypeError:
+            # Before Python 3.9, the queued tasks are still run
+            pool.shutdown()
+
+
+def _log_errors(results):
+    for path, result, error in results:
+        if error is not None:
+            logging.error(f'Failed to parse {path}: {error}')
+        yield path, result, error
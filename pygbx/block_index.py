@@ -0,0 +1,379 @@
+import json
+import struct
+from collections import Counter
+
+from pygbx.batch import parse_files
+from pygbx.blocks import BLOCK_TABLES
+from pygbx.gbx import GbxType
+
+MAGIC = b'PGBXBIX1'
+
+
+def encode_varint(value, out):
+    """Appends an unsigned integer to the bytearray using the LEB128 variable length encoding.
+
+    Args:
+        value (int): the non negative integer to encode
+        out (bytearray): the buffer to append to
+    """
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_varints(data):
+    """Decodes all LEB128 encoded unsigned integers contained in the buffer.
+
+    Args:
+        data (bytes): the encoded integers
+
+    Returns:
+        a list of the decoded integers
+    """
+    values = []
+    value = 0
+    shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(value)
+            value = 0
+            shift = 0
+
+    return values
+
+
+def block_names(g):
+    """Extracts the environment and block name counts of the Challenge contained in the Gbx file.
+
+    Args:
+        g (Gbx): the parsed Gbx file
+
+    Returns:
+        a tuple of (environment, dict of block name to count), None if the file contains no Challenge
+    """
+    challenge = g.get_class_by_id(GbxType.CHALLENGE) or g.get_class_by_id(GbxType.CHALLENGE_OLD)
+    if not challenge:
+        return None
+
+    return challenge.environment, dict(Counter(block.name for block in challenge.blocks))
+
+
+def _environment_key(environment):
+    # Maps without an environment are indexed under an empty string, which sorts and saves like other names
+    return environment or ''
+
+
+class PostingList(object):
+    """A compressed, append only list of (map ID, count) pairs for a single block.
+
+    Map IDs are stored as deltas from the previous map ID, followed by the number
+    of times the block occurs in that map, both encoded as varints.
+    """
+
+    def __init__(self, data=None, last_id=-1, length=0):
+        self.data = bytearray(data or b'')
+        self.last_id = last_id
+        self.length = length
+
+    def __len__(self):
+        return self.length
+
+    def append(self, map_id, count):
+        """Appends a map to the list, map IDs have to be appended in increasing order.
+
+        Args:
+            map_id (int): the ID of the map
+            count (int): the number of occurrences of the block in the map
+        """
+        encode_varint(map_id - self.last_id, self.data)
+        encode_varint(count, self.data)
+        self.last_id = map_id
+        self.length += 1
+
+    def decode(self):
+        """Decodes the posting list.
+
+        Returns:
+            a dict of map ID to the number of occurrences of the block
+        """
+        values = decode_varints(self.data)
+        postings = {}
+        map_id = -1
+        for i in range(0, len(values), 2):
+            map_id += values[i]
+            postings[map_id] = values[i + 1]
+
+        return postings
+
+
+class BlockIndex(object):
+    """The BlockIndex class is an inverted index from block names to the maps that use them.
+
+    Block names are mapped to their IDs in the block table of the map environment (see
+    pygbx.blocks.BLOCK_TABLES), loaded when a map of the environment is first added. Names missing from
+    the tables are assigned new IDs past the end of the table. For every block, the index keeps a
+    compressed posting list of the maps using the block together with the number of times the block is
+    placed, which allows answering AND, OR and count queries without walking the blocks of every map.
+
+    Maps can be added incrementally and the index can be saved to and loaded from a file.
+
+        index = BlockIndex()
+        index.add_files(paths)
+        loops = index.maps_with_all(['StadiumLoopLeft'])
+        cps = index.names_matching(lambda name: 'Checkpoint' in name)
+        many_cps = index.maps_with_count(cps, min_count=6)
+    """
+
+    def __init__(self):
+        self.keys = []
+        self.key_ids = {}
+        self.extra_ids = {}
+        self.postings = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def block_id(self, environment, name, create=False):
+        """Retrieves the ID of a block name within the environment.
+
+        Args:
+            environment (str): the environment of the block, e.g 'Stadium'
+            name (str): the block name
+            create (bool): whether to assign a new ID if the name is unknown
+
+        Returns:
+            the block ID, None if the name is unknown and create is False
+        """
+        environment = _environment_key(environment)
+        table = BLOCK_TABLES.get(environment, {})
+        if name in table:
+            return table[name]
+
+        if not create:
+            return self.extra_ids.get(environment, {}).get(name)
+
+        extra = self.extra_ids.setdefault(environment, {})
+        if name not in extra:
+            extra[name] = max(table.values(), default=0) + len(extra) + 1
+
+        return extra[name]
+
+    def add(self, key, environment, names):
+        """Adds a map to the index.
+
+        Args:
+            key (str): the unique key identifying the map, e.g its UID or path
+            environment (str): the environment of the map
+            names (dict/list): a dict of block name to count or a list of block names, one per block
+
+        Returns:
+            the integer ID assigned to the map, or the existing ID if the key was already added
+        """
+        if key in self.key_ids:
+            return self.key_ids[key]
+
+        if not isinstance(names, dict):
+            names = Counter(names)
+
+        environment = _environment_key(environment)
+        map_id = len(self.keys)
+        self.keys.append(key)
+        self.key_ids[key] = map_id
+
+        counts = Counter()
+        for name, count in names.items():
+            counts[self.block_id(environment, name, create=True)] += count
+
+        for block_id, count in sorted(counts.items()):
+            term = (environment, block_id)
+            if term not in self.postings:
+                self.postings[term] = PostingList()
+            self.postings[term].append(map_id, count)
+
+        return map_id
+
+    def add_challenge(self, key, challenge):
+        """Adds a parsed CGameChallenge to the index, see add.
+
+        Args:
+            key (str): the unique key identifying the map
+            challenge (CGameChallenge): the parsed challenge
+
+        Returns:
+            the integer ID assigned to the map
+        """
+        return self.add(key, challenge.environment, [block.name for block in challenge.blocks])
+
+    def add_files(self, paths, workers=None):
+        """Parses the provided Challenge files in parallel and adds them to the index, keyed by path.
+
+        Args:
+            paths (list): the file paths
+            workers (int): the number of worker processes, see parse_files
+
+        Returns:
+            the number of maps added
+        """
+        added = 0
+        for path, result, _ in parse_files([p for p in paths if p not in self.key_ids], block_names, workers):
+            if result:
+                self.add(path, result[0], result[1])
+                added += 1
+
+        return added
+
+    def names_matching(self, predicate, environment=None):
+        """Finds the block names known to the index that satisfy the predicate.
+
+        Args:
+            predicate (callable): called with every block name, returns True for matching names
+            environment (str): restricts the names to a single environment
+
+        Returns:
+            a sorted list of matching names
+        """
+        names = set()
+        for env in set(BLOCK_TABLES) | set(self.extra_ids):
+            if environment is not None and env != _environment_key(environment):
+                continue
+            for name in list(BLOCK_TABLES.get(env, {})) + list(self.extra_ids.get(env, {})):
+                if predicate(name):
+                    names.add(name)
+
+        return sorted(names)
+
+    def _counts(self, names, environment=None):
+        if isinstance(names, str):
+            names = [names]
+
+        counts = Counter()
+        for name in names:
+            for env in set(BLOCK_TABLES) | set(self.extra_ids):
+                if environment is not None and env != _environment_key(environment):
+                    continue
+                block_id = self.block_id(env, name)
+                if block_id is not None and (env, block_id) in self.postings:
+                    counts.update(self.postings[(env, block_id)].decode())
+
+        return counts
+
+    def _keys(self, map_ids):
+        return [self.keys[map_id] for map_id in sorted(map_ids)]
+
+    def maps_with_all(self, names, environment=None):
+        """Finds maps that contain every one of the provided blocks.
+
+        Args:
+            names (list): the block names
+            environment (str): restricts the query to a single environment
+
+        Returns:
+            a list of keys of the matching maps
+        """
+        result = None
+        for ids in sorted((self._counts(name, environment).keys() for name in names), key=len):
+            result = set(ids) if result is None else result & ids
+            if not result:
+                break
+
+        return self._keys(result or ())
+
+    def maps_with_any(self, names, environment=None):
+        """Finds maps that contain at least one of the provided blocks.
+
+        Args:
+            names (list): the block names
+            environment (str): restricts the query to a single environment
+
+        Returns:
+            a list of keys of the matching maps
+        """
+        return self._keys(self._counts(names, environment).keys())
+
+    def count(self, names, environment=None):
+        """Counts occurrences of the provided blocks in every map that uses them.
+
+        Args:
+            names (str/list): a block name or a list of block names whose counts are summed
+            environment (str): restricts the query to a single environment
+
+        Returns:
+            a dict of map key to the total number of occurrences
+        """
+        return {self.keys[map_id]: count for map_id, count in sorted(self._counts(names, environment).items())}
+
+    def maps_with_count(self, names, min_count=1, max_count=None, environment=None):
+        """Finds maps in which the provided blocks occur a number of times within the bounds.
+
+        Args:
+            names (str/list): a block name or a list of block names whose counts are summed
+            min_count (int): the minimum number of occurrences
+            max_count (int): the maximum number of occurrences, None for no limit
+            environment (str): restricts the query to a single environment
+
+        Returns:
+            a list of keys of the matching maps
+        """
+        return self._keys(
+            map_id for map_id, count in self._counts(names, environment).items()
+            if count >= min_count and (max_count is None or count <= max_count)
+        )
+
+    def save(self, path):
+        """Saves the index to a file.
+
+        Args:
+            path (str): the path of the file
+        """
+        terms = sorted(self.postings.items())
+        meta = json.dumps({
+            'keys': self.keys,
+            'extra_ids': self.extra_ids,
+            'terms': [[env, block_id, len(p.data), p.last_id, p.length] for (env, block_id), p in terms]
+        }).encode('utf-8')
+
+        with open(path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(struct.pack('<I', len(meta)))
+            f.write(meta)
+            for _, p in terms:
+                f.write(p.data)
+
+    @classmethod
+    def load(cls, path):
+        """Loads an index previously saved with save.
+
+        Args:
+            path (str): the path of the file
+
+        Returns:
+            the loaded BlockIndex
+
+        Raises:
+            ValueError: raised when the file is not a saved BlockIndex
+        """
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError(f'{path} is not a block index file')
+
+        pos = len(MAGIC)
+        meta_size = struct.unpack_from('<I', data, pos)[0]
+        pos += 4
+        meta = json.loads(data[pos:pos + meta_size].decode('utf-8'))
+        pos += meta_size
+
+        index = cls()
+        index.keys = meta['keys']
+        index.key_ids = {key: i for i, key in enumerate(index.keys)}
+        index.extra_ids = meta['extra_ids']
+        for env, block_id, size, last_id, length in meta['terms']:
+            index.postings[(_environment_key(env), block_id)] = PostingList(data[pos:pos + size], last_id, length)
+            pos += size
+
+        return index
@@ -0,0 +1,294 @@
+import json
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Mapping
+from importlib import import_module
+
+MAGIC = b'PGBXBLK1'
+
+TABLES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'block_tables.bin')
+
+# The Python modules the binary tables are generated from, see write_block_tables
+_BLOCK_TABLE_MODULES = {
+    'Stadium': ('pygbx.stadium_blocks', 'STADIUM_BLOCKS'),
+    'Canyon': ('pygbx.canyon_blocks', 'CANYON_BLOCKS'),
+    'Valley': ('pygbx.valley_blocks', 'VALLEY_BLOCKS'),
+    'Lagoon': ('pygbx.lagoon_blocks', 'LAGOON_BLOCKS')
+}
+
+_BLOCK_OFFSET_MODULES = {
+    'Stadium': ('pygbx.stadium_block_offsets', 'STADIUM_BLOCK_OFFSETS'),
+    'Canyon': ('pygbx.canyon_block_offsets', 'CANYON_BLOCK_OFFSETS')
+}
+
+ENVIRONMENTS = tuple(_BLOCK_TABLE_MODULES)
+
+
+def _uint32_array(data):
+    values = array('I')
+    values.frombytes(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+def _uint32_bytes(values):
+    values = array('I', values)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values.tobytes()
+
+
+class BlockTable(Mapping):
+    """A read-only mapping of block names to block IDs of a single environment.
+
+    The table is stored as a tuple of names and an array of IDs in the same order.
+    """
+
+    def __init__(self, names, ids):
+        self.names = names
+        self.ids = ids
+        self._index = dict(zip(names, ids))
+
+    def __getitem__(self, name):
+        return self._index[name]
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def __repr__(self):
+        return f'BlockTable({len(self)} blocks)'
+
+
+class BlockOffsets(Mapping):
+    """A read-only mapping of block names to the offsets of the units the block occupies.
+
+    All offsets are stored in a single flat array of (x, y, z) values. The units of the block
+    at position i of names are units[3 * spans[i]:3 * spans[i + 1]]. Accessing a block builds
+    a list of [x, y, z] lists, as in the generated Python modules.
+    """
+
+    def __init__(self, names, spans, units):
+        self.names = names
+        self.spans = spans
+        self.units = units
+        self._index = {name: i for i, name in enumerate(names)}
+
+    def span(self, name):
+        """Returns the (start, end) span of the units of a block, in number of units.
+
+        Args:
+            name (str): the block name
+
+        Returns:
+            a tuple of the start (inclusive) and the end (exclusive) of the span
+
+        Raises:
+            KeyError: if the block has no offsets
+        """
+        i = self._index[name]
+        return self.spans[i], self.spans[i + 1]
+
+    def __getitem__(self, name):
+        start, end = self.span(name)
+        units = self.units
+        return [[units[j], units[j + 1], units[j + 2]] for j in range(3 * start, 3 * end, 3)]
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def __repr__(self):
+        return f'BlockOffsets({len(self)} blocks, {len(self.units) // 3} units)'
+
+
+def write_block_tables(path=TABLES_PATH):
+    """Generates the binary block tables from the Python table modules.
+
+    The file starts with a magic string and the size of a JSON header, followed by the header
+    and the data. The data starts with the vocabulary of all block names, separated by newlines.
+    For every table, the header holds the environment, the number of entries and the offsets of
+    its arrays in the data: the name indices into the vocabulary, and either the block IDs or the
+    spans of the units in the flat array of (x, y, z) offsets.
+
+    Args:
+        path (str): the output path
+    """
+    tables = {}
+    for kind, modules in (('blocks', _BLOCK_TABLE_MODULES), ('offsets', _BLOCK_OFFSET_MODULES)):
+        for environment, (module, name) in modules.items():
+            tables[(kind, environment)] = getattr(import_module(module), name)
+
+    vocabulary = sorted({name for table in tables.values() for name in table})
+    vocabulary_index = {name: i for i, name in enumerate(vocabulary)}
+    data = bytearray('\n'.join(vocabulary).encode('utf-8'))
+    header = {'vocabulary': [0, len(data)], 'tables': []}
+
+    def add_array(raw):
+        start = len(data)
+        data.extend(raw)
+        return [start, len(data)]
+
+    for (kind, environment), table in tables.items():
+        names = list(table)
+        entry = {
+            'kind': kind,
+            'environment': environment,
+            'count': len(names),
+            'names': add_array(_uint32_bytes(vocabulary_index[name] for name in names))
+        }
+
+        if kind == 'blocks':
+            entry['ids'] = add_array(_uint32_bytes(table[name] for name in names))
+        else:
+            spans = [0]
+            units = bytearray()
+            for name in names:
+                for offset in table[name]:
+                    units.extend(offset)
+                spans.append(len(units) // 3)
+            entry['spans'] = add_array(_uint32_bytes(spans))
+            entry['units'] = add_array(units)
+
+        header['tables'].append(entry)
+
+    header = json.dumps(header).encode('utf-8')
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(header)))
+        f.write(header)
+        f.write(data)
+
+
+class _TableFile(object):
+    """The contents of a binary block table file, read with a single read.
+
+    The tables are built from the data the first time they are accessed.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            raw = f.read()
+
+        if raw[:len(MAGIC)] != MAGIC:
+            raise ValueError(f'{path} is not a block table file')
+
+        size = struct.unpack_from('<I', raw, len(MAGIC))[0]
+        start = len(MAGIC) + 4
+        header = json.loads(raw[start:start + size].decode('utf-8'))
+        self.data = memoryview(raw)[start + size:]
+
+        begin, end = header['vocabulary']
+        self.vocabulary = bytes(self.data[begin:end]).decode('utf-8').split('\n')
+        self.entries = {(e['kind'], e['environment']): e for e in header['tables']}
+        self.tables = {}
+
+    def _slice(self, span):
+        return self.data[span[0]:span[1]]
+
+    def table(self, kind, environment):
+        key = (kind, environment)
+        table = self.tables.get(key)
+        if table is not None:
+            return table
+
+        entry = self.entries[key]
+        vocabulary = self.vocabulary
+        names = tuple(vocabulary[i] for i in _uint32_array(self._slice(entry['names'])))
+        if kind == 'blocks':
+            table = BlockTable(names, _uint32_array(self._slice(entry['ids'])))
+        else:
+            table = BlockOffsets(names, _uint32_array(self._slice(entry['spans'])),
+                                 array('B', self._slice(entry['units'])))
+
+        self.tables[key] = table
+        return table
+
+
+_table_file = None
+
+
+def _get_table_file():
+    global _table_file
+    if _table_file is None:
+        _table_file = _TableFile(TABLES_PATH)
+    return _table_file
+
+
+class TableRegistry(Mapping):
+    """A read-only mapping of environment names to tables, loading every table on first access.
+
+    The tables are read from the binary block table file shipped with the package. Iterating
+    the registry, checking membership and taking its length do not read the file.
+    """
+
+    def __init__(self, kind, environments):
+        self.kind = kind
+        self.environments = tuple(environments)
+        self.tables = {}
+
+    def __getitem__(self, environment):
+        table = self.tables.get(environment)
+        if table is None:
+            if environment not in self.environments:
+                raise KeyError(environment)
+            table = self.tables[environment] = _get_table_file().table(self.kind, environment)
+        return table
+
+    def __iter__(self):
+        return iter(self.environments)
+
+    def __len__(self):
+        return len(self.environments)
+
+    def __contains__(self, environment):
+        return environment in self.environments
+
+    def loaded(self):
+        """Returns the names of the environments whose table has been loaded."""
+        return list(self.tables)
+
+
+BLOCK_TABLES = TableRegistry('blocks', _BLOCK_TABLE_MODULES)
+BLOCK_OFFSETS = TableRegistry('offsets', _BLOCK_OFFSET_MODULES)
+
+
+def get_block_table(environment):
+    """Returns the table of block names to block IDs of an environment.
+
+    Args:
+        environment (str): the environment name, e.g 'Stadium'
+
+    Returns:
+        a BlockTable mapping block names to block IDs, None if the environment has no table
+    """
+    return BLOCK_TABLES.get(environment)
+
+
+def get_block_offsets(environment):
+    """Returns the table of block names to the offsets of the units occupied by the block.
+
+    Args:
+        environment (str): the environment name, e.g 'Stadium'
+
+    Returns:
+        a BlockOffsets mapping block names to lists of unit offsets, None if the environment has no table
+    """
+    return BLOCK_OFFSETS.get(environment)
+
+
+if __name__ == '__main__':
+    write_block_tables(sys.argv[1] if len(sys.argv) > 1 else TABLES_PATH)
@@ -36,25 +36,36 @@ class ByteReader(object):
     instances of ByteReader to read different parts of the file. This is because some chunks depend on the state
     of the reader, this state can be e.g: lookback strings.
 
-    ByteReader accepts reading from raw bytes as well as from a file handle.
+    ByteReader accepts reading from raw bytes as well as from a file handle. File objects that
+    cannot seek, such as pipes, sockets or HTTP response bodies, are read in a forward-only streaming
+    mode: data is consumed as it is read and skipped data is read and discarded. In this mode
+    the size of the data is unknown (None) and the position cannot be moved backwards.
     """
     def __init__(self, obj):
         """Constructs a new ByteReader with the provided object.
 
         Args:
-            obj (file/bytes): a file handle opened through open() or a bytes object
+            obj (file/bytes): a file handle opened through open(), any binary file object or a bytes object
         """
         self.data = obj
-        if isinstance(obj, IOBase):
-            self.get_bytes = self.__get_bytes_file
-            self.data.seek(0, SEEK_END)
-            self.size = self.data.tell()
-            self.data.seek(0)
+        self.streaming = False
+        if isinstance(obj, IOBase) or hasattr(obj, 'read'):
+            if ByteReader.__seekable(obj):
+                self.__get_bytes = ByteReader.__get_bytes_file
+                self.data.seek(0, SEEK_END)
+                self.size = self.data.tell()
+                self.data.seek(0)
+            else:
+                self.__get_bytes = ByteReader.__get_bytes_stream
+                self.streaming = True
+                self.stream_pos = 0
+                self.size = None
         else:
-            self.get_bytes = self.__get_bytes_generic
+            self.__get_bytes = ByteReader.__get_bytes_generic
             self.size = len(self.data)
 
         self.pos = 0
+        self.skipped = 0
         self.seen_loopback = False
         self.stored_strings = []
         self.current_info = PositionInfo(-1, 0)
@@ -88,7 +99,7 @@ class ByteReader(object):
         Returns:
             the bytes object, if no type string was provided, type returned by struct.unpack otherwise
         """
-        val = self.get_bytes(num_bytes)
+        val = self.__get_bytes(self, num_bytes)
         self.pos += num_bytes
         if typestr == None:
             return val
@@ -104,6 +115,19 @@ class ByteReader(object):
         else:
             return len(self.data)
 
+    def get_bytes(self, num_bytes):
+        """Reads bytes at the current position without advancing it.
+
+        Args:
+            num_bytes (int): the number of bytes to read
+
+        Returns:
+            the bytes read from the buffer
+        """
+        # The reading function is stored unbound, as a bound method
+        # would create a reference cycle keeping the data alive
+        return self.__get_bytes(self, num_bytes)
+
     def __get_bytes_file(self, num_bytes):
         self.data.seek(self.pos)
         return self.data.read(num_bytes)
@@ -111,6 +135,44 @@ class ByteReader(object):
     def __get_bytes_generic(self, num_bytes):
         return self.data[self.pos:self.pos + num_bytes]
 
+    def __get_bytes_stream(self, num_bytes):
+        if self.pos < self.stream_pos:
+            raise ValueError(f'cannot move back to position {self.pos} in a stream, '
+                             f'{self.stream_pos} bytes have been consumed already')
+
+        while self.stream_pos < self.pos:
+            discarded = self.__read_stream(min(self.pos - self.stream_pos, 65536))
+            if not discarded:
+                return b''
+
+        return self.__read_stream(num_bytes)
+
+    def __read_stream(self, num_bytes):
+        data = self.data.read(num_bytes)
+        if data is not None and len(data) == num_bytes:
+            self.stream_pos += num_bytes
+            return data
+
+        # Raw streams may return less data than requested before the end of the stream
+        chunks = [data] if data else []
+        received = len(data) if data else 0
+        while received < num_bytes:
+            data = self.data.read(num_bytes - received)
+            if not data:
+                break
+            chunks.append(data)
+            received += len(data)
+
+        self.stream_pos += received
+        return b''.join(chunks)
+
+    @staticmethod
+    def __seekable(obj):
+        try:
+            return obj.seekable()
+        except AttributeError:
+            return False
+
     def read_int32(self):
         """Reads a signed int32.
         
@@ -186,7 +248,7 @@ class ByteReader(object):
         Returns:
             the single byte read from the buffer
         """
-        val = self.get_bytes(1)[0]
+        val = self.__get_bytes(self, 1)[0]
         self.pos += 1
         return val
 
@@ -197,6 +259,7 @@ class ByteReader(object):
             num_bytes (int): the number of bytes to skip
         """
         self.pos += num_bytes
+        self.skipped += num_bytes
 
     def read_string_lookback(self):
         """Reads a special string type in the GBX file format called the lookbackstring.
@@ -0,0 +1,374 @@
+import struct
+import sys
+from array import array
+from itertools import repeat
+from operator import attrgetter
+
+import pygbx.headers as headers
+
+MAGIC = b'PGBXCMP1'
+
+# Integer array types, from the smallest
+_INT_TYPECODES = 'bBhHiIqQ'
+_INT_RANGES = {
+    'b': (-2 ** 7, 2 ** 7 - 1), 'B': (0, 2 ** 8 - 1), 'h': (-2 ** 15, 2 ** 15 - 1), 'H': (0, 2 ** 16 - 1),
+    'i': (-2 ** 31, 2 ** 31 - 1), 'I': (0, 2 ** 32 - 1), 'q': (-2 ** 63, 2 ** 63 - 1), 'Q': (0, 2 ** 64 - 1)
+}
+
+_u32 = struct.Struct('<I')
+_i64 = struct.Struct('<q')
+_f64 = struct.Struct('<d')
+
+
+class CompactTrack(object):
+    """The track embedded in a Replay, as restored from the compact representation.
+
+    It holds the parsed classes of the track and provides the lookup methods of the Gbx class,
+    but not the raw data of the file.
+    """
+
+    def __init__(self, class_id, classes, root_classes):
+        self.class_id = class_id
+        self.classes = classes
+        self.root_classes = root_classes
+
+    def get_class_by_id(self, class_id):
+        for game_class in list(self.classes.values()) + list(self.root_classes.values()):
+            if game_class.id == class_id:
+                return game_class
+        return None
+
+    def get_classes_by_ids(self, class_ids):
+        return [c for c in list(self.classes.values()) + list(self.root_classes.values()) if c.id in class_ids]
+
+
+def _is_track(value):
+    return hasattr(value, 'classes') and hasattr(value, 'root_classes') and hasattr(value, 'class_id')
+
+
+def _typed_array(code, values):
+    values = array(code, values)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values.tobytes()
+
+
+class _Writer(object):
+    def __init__(self):
+        self.out = bytearray()
+
+    def u32(self, v):
+        self.out += _u32.pack(v)
+
+    def tag(self, t):
+        self.out += t
+
+    def str(self, s):
+        data = s.encode('utf-8')
+        self.u32(len(data))
+        self.out += data
+
+    def blob(self, data):
+        self.u32(len(data))
+        self.out += data
+
+    def value(self, v):
+        t = type(v)
+        if v is None:
+            self.tag(b'N')
+        elif t is bool:
+            self.tag(b'T' if v else b'F')
+        elif isinstance(v, int):
+            if -2 ** 63 <= v < 2 ** 63:
+                self.tag(b'i')
+                self.out += _i64.pack(v)
+            else:
+                self.tag(b'I')
+                self.str(str(v))
+        elif t is float:
+            self.tag(b'f')
+            self.out += _f64.pack(v)
+        elif t is str:
+            self.tag(b's')
+            self.str(v)
+        elif isinstance(v, (bytes, bytearray, memoryview)):
+            self.tag(b'b')
+            self.blob(bytes(v))
+        elif t is list or t is tuple:
+            self.sequence(v)
+        elif t is dict:
+            self.tag(b'd')
+            self.u32(len(v))
+            for key, value in v.items():
+                self.value(key)
+                self.value(value)
+        elif t is headers.Vector3:
+            self.tag(b'v')
+            self.value(v.x)
+            self.value(v.y)
+            self.value(v.z)
+        elif _is_track(v):
+            self.tag(b'G')
+            self.value(v.class_id)
+            self.value(v.classes)
+            self.value(v.root_classes)
+        elif getattr(headers, t.__name__, None) is t:
+            self.tag(b'o')
+            self.str(t.__name__)
+            self.value(dict(vars(v)))
+        else:
+            raise TypeError(f'cannot encode {t.__name__} values')
+
+    def sequence(self, v):
+        if len(v) >= 8:
+            types = set(map(type, v))
+            if len(types) == 1:
+                t = types.pop()
+                if getattr(headers, t.__name__, None) is t and t is not headers.Vector3 and self.objects(v, t):
+                    return
+                if (t is int or t is float) and self.column(v, t, b'A' if type(v) is list else b'U'):
+                    return
+
+        self.tag(b'l' if type(v) is list else b't')
+        self.u32(len(v))
+        for item in v:
+            self.value(item)
+
+    def column(self, values, t, tag):
+        """Writes a list of numbers as a typed array, returns False if no array type stores them exactly."""
+        if t is int:
+            low, high = min(values), max(values)
+            codes = [code for code in _INT_TYPECODES if _INT_RANGES[code][0] <= low and high <= _INT_RANGES[code][1]]
+            if not codes:
+                return False
+            code = codes[0]
+        else:
+            code = 'f' if array('f', values).tolist() == values else 'd'
+
+        self.tag(tag)
+        self.out += code.encode('ascii')
+        self.u32(len(values))
+        self.out += _typed_array(code, values)
+        return True
+
+    def field(self, values):
+        """Writes the values of an attribute of a list of objects."""
+        types = set(map(type, values))
+        if types == {int} or types == {float}:
+            if self.column(values, types.pop(), b'A'):
+                return
+        elif types <= {str, type(None)}:
+            table = list(dict.fromkeys(values))
+            index = {s: i for i, s in enumerate(table)}
+            self.tag(b'S')
+            self.value(table)
+            self.column(list(map(index.__getitem__, values)), int, b'A')
+            return
+        elif types <= {bytes, type(None)}:
+            self.tag(b'B')
+            self.column([-1 if b is None else len(b) for b in values], int, b'A')
+            self.blob(b''.join(b for b in values if b is not None))
+            return
+        elif types == {headers.Vector3}:
+            self.tag(b'V')
+            for component in ('x', 'y', 'z'):
+                self.field(list(map(attrgetter(component), values)))
+            return
+
+        self.tag(b'l')
+        self.u32(len(values))
+        for item in values:
+            self.value(item)
+
+    def objects(self, objs, t):
+        """Writes a list of objects of the same class column by column, returns False if they have different members."""
+        members = set(map(tuple, map(vars, objs)))
+        if len(members) != 1:
+            return False
+
+        names = members.pop()
+        self.tag(b'C')
+        self.str(t.__name__)
+        self.u32(len(objs))
+        self.u32(len(names))
+        for name in names:
+            self.str(name)
+            self.field(list(map(attrgetter(name), objs)))
+        return True
+
+
+class _Reader(object):
+    def __init__(self, data):
+        self.data = memoryview(data)
+        self.pos = 0
+
+    def u32(self):
+        v = _u32.unpack_from(self.data, self.pos)[0]
+        self.pos += 4
+        return v
+
+    def tag(self):
+        t = bytes(self.data[self.pos:self.pos + 1])
+        self.pos += 1
+        return t
+
+    def blob(self):
+        size = self.u32()
+        data = bytes(self.data[self.pos:self.pos + size])
+        self.pos += size
+        return data
+
+    def str(self):
+        return self.blob().decode('utf-8')
+
+    def header_class(self, name):
+        cls = getattr(headers, name, None)
+        if not isinstance(cls, type):
+            raise ValueError(f'unknown class {name}')
+        return cls
+
+    def array(self):
+        code = self.tag().decode('ascii')
+        count = self.u32()
+        values = array(code)
+        size = count * values.itemsize
+        values.frombytes(self.data[self.pos:self.pos + size])
+        self.pos += size
+        if sys.byteorder == 'big':
+            values.byteswap()
+        return values.tolist()
+
+    def value(self):
+        t = self.tag()
+        if t == b'N':
+            return None
+        if t == b'T':
+            return True
+        if t == b'F':
+            return False
+        if t == b'i':
+            v = _i64.unpack_from(self.data, self.pos)[0]
+            self.pos += 8
+            return v
+        if t == b'I':
+            return int(self.str())
+        if t == b'f':
+            v = _f64.unpack_from(self.data, self.pos)[0]
+            self.pos += 8
+            return v
+        if t == b's':
+            return self.str()
+        if t == b'b':
+            return self.blob()
+        if t in (b'l', b't'):
+            items = [self.value() for _ in range(self.u32())]
+            return items if t == b'l' else tuple(items)
+        if t == b'A':
+            return self.array()
+        if t == b'U':
+            return tuple(self.array())
+        if t == b'd':
+            return {self.value(): self.value() for _ in range(self.u32())}
+        if t == b'v':
+            return headers.Vector3(self.value(), self.value(), self.value())
+        if t == b'G':
+            return CompactTrack(self.value(), self.value(), self.value())
+        if t == b'o':
+            cls = self.header_class(self.str())
+            obj = cls.__new__(cls)
+            obj.__dict__.update(self.value())
+            return obj
+        if t == b'C':
+            return self.objects()
+        raise ValueError(f'invalid compact data: unknown tag {t!r} at {self.pos - 1}')
+
+    def field(self):
+        t = self.tag()
+        if t == b'A':
+            return self.array()
+        if t == b'S':
+            table = self.value()
+            self.tag()
+            return list(map(table.__getitem__, self.array()))
+        if t == b'B':
+            self.tag()
+            sizes = self.array()
+            blob = self.blob()
+            values = []
+            pos = 0
+            for size in sizes:
+                if size < 0:
+                    values.append(None)
+                else:
+                    values.append(blob[pos:pos + size])
+                    pos += size
+            return values
+        if t == b'V':
+            return list(map(headers.Vector3, self.field(), self.field(), self.field()))
+        if t == b'l':
+            return [self.value() for _ in range(self.u32())]
+        raise ValueError(f'invalid compact data: unknown field tag {t!r} at {self.pos - 1}')
+
+    def objects(self):
+        cls = self.header_class(self.str())
+        count = self.u32()
+        num_fields = self.u32()
+        names = []
+        columns = []
+        for _ in range(num_fields):
+            names.append(self.str())
+            columns.append(self.field())
+
+        # Objects are created without calling __init__ and their members are assigned at once
+        rows = zip(*columns) if columns else repeat((), count)
+        members = map(dict, map(zip, repeat(names), rows))
+        objs = list(map(cls.__new__, repeat(cls, count)))
+        for _ in map(setattr, objs, repeat('__dict__'), members):
+            pass
+        return objs
+
+
+def dumps(obj):
+    """Serializes a parsed class to the compact representation.
+
+    Lists of objects of the same class, such as blocks, items, ghost samples and control entries,
+    are stored column by column: numbers as typed arrays of the smallest type that stores them
+    exactly, strings through a table of unique values and bytes as a single buffer. No per element
+    objects are created. Other members are stored with a tagged encoding of their value.
+
+    The representation is lossless, except that memoryviews are restored as bytes objects and an
+    embedded track (the track member of a Replay) is restored as a CompactTrack.
+
+    Args:
+        obj (CGameHeader): the parsed class, e.g CGameChallenge, CGameCtnGhost or CGameReplayRecord
+
+    Returns:
+        the compact representation as bytes
+
+    Raises:
+        TypeError: if a member holds a value that cannot be encoded
+    """
+    w = _Writer()
+    w.out += MAGIC
+    w.value(obj)
+    return bytes(w.out)
+
+
+def loads(data):
+    """Restores a parsed class from its compact representation.
+
+    Args:
+        data (bytes): the data returned by dumps
+
+    Returns:
+        the restored class
+
+    Raises:
+        ValueError: if the data is not a valid compact representation
+    """
+    if bytes(data[:len(MAGIC)]) != MAGIC:
+        raise ValueError('invalid compact data: magic string is incorrect')
+
+    r = _Reader(data)
+    r.pos = len(MAGIC)
+    return r.value()
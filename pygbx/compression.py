@@ -0,0 +1,129 @@
+import zlib
+
+
+class Decompressor(object):
+    """Describes an implementation of a decompression algorithm used by the Gbx class.
+
+    The func callable is called with the compressed data (a bytes-like object) and the size of the
+    uncompressed data and has to return the uncompressed data as a bytes object.
+    """
+
+    def __init__(self, name, func, releases_gil=False):
+        """Creates a new decompressor.
+
+        Args:
+            name (str): the name of the implementation
+            func (callable): the decompression function, called as func(data, size)
+            releases_gil (bool): whether func releases the GIL while decompressing, which makes
+                parsing in a thread pool scale with the number of threads
+        """
+        self.name = name
+        self.func = func
+        self.releases_gil = releases_gil
+
+
+def _python_lzo(data, size):
+    import lzo
+    # python-lzo parses its input with "s#", which rejects memoryviews and bytearrays
+    return lzo.decompress(data if isinstance(data, bytes) else bytes(data), False, size)
+
+
+def _zlib(data, size):
+    return zlib.decompress(data, 0, size)
+
+
+_decompressors = {
+    # python-lzo decompresses between Py_BEGIN_ALLOW_THREADS and Py_END_ALLOW_THREADS
+    'lzo': {'python-lzo': Decompressor('python-lzo', _python_lzo, releases_gil=True)},
+    'zlib': {'zlib': Decompressor('zlib', _zlib, releases_gil=True)}
+}
+
+_active = {
+    'lzo': _decompressors['lzo']['python-lzo'],
+    'zlib': _decompressors['zlib']['zlib']
+}
+
+
+def register_decompressor(algorithm, name, func, releases_gil=False, activate=False):
+    """Registers an implementation of a decompression algorithm.
+
+    The body of GBX files is compressed with LZO, while ghost samples are compressed with zlib.
+    Alternative implementations can be registered and selected with set_decompressor, e.g to
+    benchmark them or to use an implementation that releases the GIL:
+
+        register_decompressor('lzo', 'my-lzo', lambda data, size: my_lzo.decompress(data, size), releases_gil=True)
+        set_decompressor('lzo', 'my-lzo')
+
+    Args:
+        algorithm (str): the algorithm, 'lzo' or 'zlib'
+        name (str): the name of the implementation
+        func (callable): the decompression function, called as func(data, size)
+        releases_gil (bool): whether func releases the GIL while decompressing
+        activate (bool): whether to use the implementation right away
+    """
+    _decompressors.setdefault(algorithm, {})[name] = Decompressor(name, func, releases_gil)
+    if activate:
+        set_decompressor(algorithm, name)
+
+
+def set_decompressor(algorithm, name):
+    """Selects the implementation used to decompress data compressed with the algorithm.
+
+    Args:
+        algorithm (str): the algorithm, 'lzo' or 'zlib'
+        name (str): the name of a registered implementation
+
+    Raises:
+        KeyError: raised when no implementation with the name has been registered
+    """
+    if name not in _decompressors.get(algorithm, {}):
+        raise KeyError(f'no {algorithm} decompressor named {name} has been registered')
+
+    _active[algorithm] = _decompressors[algorithm][name]
+
+
+def get_decompressor(algorithm):
+    """Retrieves the implementation currently used for the algorithm.
+
+    Args:
+        algorithm (str): the algorithm, 'lzo' or 'zlib'
+
+    Returns:
+        the active Decompressor
+    """
+    return _active[algorithm]
+
+
+def available_decompressors(algorithm):
+    """Lists the names of the implementations registered for the algorithm.
+
+    Args:
+        algorithm (str): the algorithm, 'lzo' or 'zlib'
+
+    Returns:
+        a list of names
+    """
+    return list(_decompressors.get(algorithm, {}))
+
+
+def releases_gil():
+    """Checks whether all active decompressors release the GIL.
+
+    Returns:
+        True if parsing in a thread pool is expected to scale with the number of threads
+    """
+    return all(d.releases_gil for d in _active.values())
+
+
+def decompress(algorithm, data, size):
+    """Decompresses the data with the active implementation of the algorithm.
+
+    Args:
+        algorithm (str): the algorithm, 'lzo' or 'zlib'
+        data (bytes): the compressed data
+        size (int): the size of the uncompressed data
+
+    Returns:
+        the uncompressed data
+    """
+    return _active[algorithm].func(data, size)
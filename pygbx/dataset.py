@@ -0,0 +1,359 @@
+import json
+import os
+from operator import attrgetter
+
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError('pygbx.dataset requires numpy, install it with: pip install pygbx[ml]')
+
+try:
+    import pyarrow
+    import pyarrow.parquet as pq
+except ImportError:
+    pyarrow = pq = None
+
+from pygbx.batch import parse_files
+from pygbx.index import extract_metadata
+from pygbx.gbx import GbxType
+
+INDEX_NAME = 'index.json'
+VERSION = 1
+
+# The columns of every table and their numpy types. Every table also has a file_id column,
+# the position of the file in the dataset. Missing integers are stored as -1 and missing strings as ''.
+# Invalid times, e.g the 0xFFFFFFFF race time of unfinished runs, are stored as missing.
+TABLES = {
+    'files': [('path', 'U'), ('type', 'i8')],
+    'maps': [
+        ('map_uid', 'U'), ('environment', 'U'), ('author', 'U'), ('name', 'U'),
+        ('bronze_time', 'i4'), ('silver_time', 'i4'), ('gold_time', 'i4'), ('author_time', 'i4'),
+        ('num_blocks', 'i4'), ('num_items', 'i4')
+    ],
+    'blocks': [('name', 'U'), ('x', 'i2'), ('y', 'i2'), ('z', 'i2'), ('rotation', 'i1'), ('flags', 'i8')],
+    'ghosts': [
+        ('ghost_index', 'i2'), ('uid', 'U'), ('login', 'U'), ('nickname', 'U'), ('race_time', 'i4'),
+        ('num_respawns', 'i4'), ('sample_period', 'i4'), ('num_samples', 'i4')
+    ],
+    'checkpoints': [('ghost_index', 'i2'), ('checkpoint', 'i2'), ('time', 'i4')],
+    'samples': [
+        ('ghost_index', 'i2'), ('time', 'i4'), ('x', 'f4'), ('y', 'f4'), ('z', 'f4'), ('angle', 'u2'),
+        ('axis_heading', 'i2'), ('axis_pitch', 'i2'), ('speed', 'i2'), ('vel_heading', 'i1'), ('vel_pitch', 'i1')
+    ],
+    'inputs': [('ghost_index', 'i2'), ('time', 'i4'), ('name', 'U'), ('enabled', 'i4'), ('flags', 'i4')]
+}
+
+_block_fields = attrgetter('name', 'position.x', 'position.y', 'position.z', 'rotation', 'flags')
+_sample_fields = attrgetter('position.x', 'position.y', 'position.z', 'angle', 'axis_heading', 'axis_pitch',
+                            'speed', 'vel_heading', 'vel_pitch')
+_input_fields = attrgetter('time', 'event_name', 'enabled', 'flags')
+
+
+# Times at or above this value are invalid, e.g 0xFFFFFFFF for unfinished runs, and stored as missing
+_INVALID_TIME = 2 ** 31 - 1
+
+_TIME_COLUMNS = {'bronze_time', 'silver_time', 'gold_time', 'author_time'}
+
+
+def _time(t):
+    return t if t is not None and 0 <= t < _INVALID_TIME else None
+
+
+def _columns(table, rows):
+    columns = {}
+    for (name, dtype), values in zip(TABLES[table], zip(*rows) if rows else [[]] * len(TABLES[table])):
+        if dtype == 'U':
+            columns[name] = np.array(['' if v is None else v for v in values], dtype=str)
+        else:
+            columns[name] = np.array([-1 if v is None else v for v in values], dtype=dtype)
+    return columns
+
+
+def extract_tables(g):
+    """Extracts the rows stored in a dataset from a parsed Gbx file.
+
+    The rows are returned as numpy arrays, so they can be cheaply sent back from a worker process.
+
+    Args:
+        g (Gbx): the parsed Gbx file
+
+    Returns:
+        a dict of table name to a dict of column name to array, without the file_id column
+    """
+    metadata = extract_metadata(g)
+    rows = {table: [] for table in TABLES}
+    rows['files'].append(('', metadata['type']))
+
+    for m in metadata['maps']:
+        rows['maps'].append(tuple(_time(m[name]) if name in _TIME_COLUMNS else m[name] for name, _ in TABLES['maps']))
+
+    for challenge in g.get_classes_by_ids([GbxType.CHALLENGE, GbxType.CHALLENGE_OLD]):
+        rows['blocks'].extend(map(_block_fields, challenge.blocks))
+
+    ghosts = g.get_classes_by_ids([GbxType.CTN_GHOST, GbxType.CTN_GHOST_OLD])
+    for i, (ghost, m) in enumerate(zip(ghosts, metadata['ghosts'])):
+        period = ghost.sample_period or 0
+        rows['ghosts'].append((i, m['uid'], m['login'], m['nickname'], _time(m['race_time']), m['num_respawns'],
+                               ghost.sample_period, len(ghost.records)))
+        rows['checkpoints'].extend((i, cp, _time(time)) for cp, time in enumerate(ghost.cp_times))
+        rows['samples'].extend((i, j * period) + s for j, s in enumerate(map(_sample_fields, ghost.records)))
+        rows['inputs'].extend((i,) + e for e in map(_input_fields, ghost.control_entries))
+
+    return {table: _columns(table, rows[table]) for table in TABLES}
+
+
+def _write_index(path, index):
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(index, f, indent=1)
+    os.replace(tmp, path)
+
+
+class DatasetWriter(object):
+    """The DatasetWriter class streams parsed Gbx files into a sharded columnar dataset.
+
+    A dataset is a directory of shards, each holding the rows of up to shard_size files in the
+    tables described by TABLES: file paths and types, map metadata, blocks, ghost metadata,
+    checkpoint times, ghost samples and control entries. Every row has a file_id column,
+    the position of its file in the dataset.
+
+    Shards are stored as .npz files, or as one Parquet file per table if the format is 'parquet'
+    (requires pyarrow). The index.json file of the directory lists the shards with their number of
+    files and rows. It is rewritten every time a shard is completed, so a dataset can be read while
+    it is being written and an interrupted writer only loses the files of its last shard.
+
+    Opening a writer on an existing dataset appends to it.
+
+        with DatasetWriter('dataset/', shard_size=1000) as writer:
+            writer.add_files(paths, workers=8)
+
+        dataset = Dataset('dataset/')
+        samples = dataset.read('samples', columns=['file_id', 'x', 'y', 'z'])
+    """
+
+    def __init__(self, path, shard_size=1000, format=None):
+        """Opens a dataset for writing, creating it if it does not exist.
+
+        Args:
+            path (str): the dataset directory
+            shard_size (int): the maximum number of files per shard
+            format (str): 'npz' or 'parquet', None to keep the format of an existing dataset or to
+                use Parquet if pyarrow is installed and .npz otherwise
+
+        Raises:
+            ValueError: if the format is unknown or does not match the format of an existing dataset
+        """
+        self.path = path
+        self.shard_size = shard_size
+        self.index_path = os.path.join(path, INDEX_NAME)
+
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                self.index = json.load(f)
+            if format is not None and format != self.index['format']:
+                raise ValueError(f'the dataset uses the {self.index["format"]} format, not {format}')
+        else:
+            if format is None:
+                format = 'parquet' if pq is not None else 'npz'
+            self.index = {'version': VERSION, 'format': format, 'num_files': 0, 'shards': []}
+
+        if self.index['format'] not in ('npz', 'parquet'):
+            raise ValueError(f"unknown format {self.index['format']}, expected 'npz' or 'parquet'")
+        if self.index['format'] == 'parquet' and pq is None:
+            raise ValueError('the parquet format requires pyarrow')
+
+        os.makedirs(path, exist_ok=True)
+        self.pending = []
+        self._paths = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return self.index['num_files'] + len(self.pending)
+
+    def paths(self):
+        """Returns the set of the paths stored in the dataset, including files not yet written."""
+        if self._paths is None:
+            self._paths = set(Dataset(self.path).read('files', ['path'])['path'].tolist())
+        return self._paths
+
+    def add(self, path, tables):
+        """Adds the rows of a single file.
+
+        Args:
+            path (str): the path of the file
+            tables (dict): the rows of the file as returned by extract_tables
+        """
+        tables['files']['path'] = np.array([path])
+        self.pending.append(tables)
+        if self._paths is not None:
+            self._paths.add(path)
+        if len(self.pending) >= self.shard_size:
+            self.flush()
+
+    def add_gbx(self, path, g):
+        """Adds a parsed Gbx file.
+
+        Args:
+            path (str): the path of the file
+            g (Gbx): the parsed file
+        """
+        self.add(path, extract_tables(g))
+
+    def add_files(self, paths, workers=None, chunksize=8, skip_existing=True):
+        """Parses files with a pool of worker processes and adds them to the dataset.
+
+        Files that fail to parse are logged and skipped.
+
+        Args:
+            paths (list): the file paths
+            workers (int): the number of worker processes, see pygbx.batch.parse_files
+            chunksize (int): the number of files sent to a worker process at once
+            skip_existing (bool): whether to skip the paths already stored in the dataset
+
+        Returns:
+            the number of added files
+        """
+        if skip_existing:
+            existing = self.paths()
+            paths = [path for path in paths if path not in existing]
+
+        added = 0
+        for path, tables, error in parse_files(paths, extract_tables, workers=workers, chunksize=chunksize):
+            if error is None:
+                self.add(path, tables)
+                added += 1
+
+        return added
+
+    def flush(self):
+        """Writes the pending files to a new shard and updates the index."""
+        if not self.pending:
+            return
+
+        first_file_id = self.index['num_files']
+        tables = {}
+        for table in TABLES:
+            parts = [files[table] for files in self.pending]
+            file_ids = [np.full(len(p[TABLES[table][0][0]]), first_file_id + i, dtype=np.int64)
+                        for i, p in enumerate(parts)]
+            columns = {'file_id': np.concatenate(file_ids)}
+            for name, _ in TABLES[table]:
+                columns[name] = np.concatenate([p[name] for p in parts])
+            tables[table] = columns
+
+        name = f'shard-{len(self.index["shards"]):05d}'
+        if self.index['format'] == 'npz':
+            np.savez(os.path.join(self.path, name + '.npz'),
+                     **{f'{table}.{column}': values for table, columns in tables.items()
+                        for column, values in columns.items()})
+        else:
+            for table, columns in tables.items():
+                pq.write_table(pyarrow.table(columns), os.path.join(self.path, f'{name}.{table}.parquet'))
+
+        self.index['shards'].append({
+            'name': name,
+            'first_file_id': first_file_id,
+            'num_files': len(self.pending),
+            'rows': {table: len(columns['file_id']) for table, columns in tables.items()}
+        })
+        self.index['num_files'] += len(self.pending)
+        _write_index(self.index_path, self.index)
+        self.pending = []
+
+    def close(self):
+        """Writes the pending files."""
+        self.flush()
+
+
+class Dataset(object):
+    """The Dataset class reads the tables of a dataset written by DatasetWriter.
+
+    Tables are read shard by shard, only loading the requested columns, and returned as dicts
+    of column name to numpy array.
+    """
+
+    def __init__(self, path):
+        """Opens a dataset.
+
+        Args:
+            path (str): the dataset directory, an empty dataset is returned if it does not exist
+        """
+        self.path = path
+        index_path = os.path.join(path, INDEX_NAME)
+        if os.path.exists(index_path):
+            with open(index_path) as f:
+                self.index = json.load(f)
+        else:
+            self.index = {'version': VERSION, 'format': 'npz', 'num_files': 0, 'shards': []}
+
+        self.format = self.index['format']
+        self.shards = self.index['shards']
+
+    def __len__(self):
+        return self.index['num_files']
+
+    def num_rows(self, table):
+        """Returns the number of rows of a table."""
+        return sum(shard['rows'][table] for shard in self.shards)
+
+    def read_shard(self, shard, table, columns=None):
+        """Reads a table from a single shard.
+
+        Args:
+            shard (int): the index of the shard in shards
+            table (str): the table name, see TABLES
+            columns (list): the columns to read, None reads all columns including file_id
+
+        Returns:
+            a dict of column name to numpy array
+        """
+        if table not in TABLES:
+            raise KeyError(f'unknown table {table}')
+        if columns is None:
+            columns = ['file_id'] + [name for name, _ in TABLES[table]]
+
+        name = self.shards[shard]['name']
+        if self.format == 'npz':
+            with np.load(os.path.join(self.path, name + '.npz')) as data:
+                return {column: data[f'{table}.{column}'] for column in columns}
+
+        if pq is None:
+            raise ValueError('reading a parquet dataset requires pyarrow')
+        data = pq.read_table(os.path.join(self.path, f'{name}.{table}.parquet'), columns=columns)
+        return {column: data.column(column).to_numpy() for column in columns}
+
+    def iter_shards(self, table, columns=None):
+        """Reads a table shard by shard.
+
+        Args:
+            table (str): the table name, see TABLES
+            columns (list): the columns to read, None reads all columns
+
+        Returns:
+            a generator of dicts of column name to numpy array, one per shard
+        """
+        for shard in range(len(self.shards)):
+            yield self.read_shard(shard, table, columns)
+
+    def read(self, table, columns=None):
+        """Reads a whole table, concatenating the rows of all shards.
+
+        Args:
+            table (str): the table name, see TABLES
+            columns (list): the columns to read, None reads all columns
+
+        Returns:
+            a dict of column name to numpy array
+        """
+        parts = list(self.iter_shards(table, columns))
+        if not parts:
+            names = columns or ['file_id'] + [name for name, _ in TABLES[table]]
+            types = dict(TABLES[table], file_id='i8')
+            return {name: np.zeros(0, dtype=str if types[name] == 'U' else types[name]) for name in names}
+
+        return {column: np.concatenate([p[column] for p in parts]) for column in parts[0]}
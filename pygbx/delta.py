@@ -0,0 +1,247 @@
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError('pygbx.delta requires numpy, install it with: pip install pygbx[ml]')
+
+from pygbx.samples import display_speeds, sample_array, sample_times
+
+# The maximum number of (sample, segment) pairs evaluated at once when projecting samples
+CHUNK_PAIRS = 1 << 20
+
+
+class GhostDelta(object):
+    """The comparison of the samples of a ghost with a reference trajectory.
+
+    Every array has one value per sample of the compared ghost.
+
+    Attributes:
+        times (numpy.ndarray): the int32 race time of every sample in milliseconds
+        progress (numpy.ndarray): the distance along the reference trajectory of the nearest point
+        time_delta (numpy.ndarray): the race time of the sample minus the time the reference reached
+            the nearest point, in milliseconds, positive when the ghost is behind the reference
+        speed_delta (numpy.ndarray): the display speed of the sample minus the speed of the reference
+            at the nearest point, in km/h
+        lateral_offset (numpy.ndarray): the signed distance between the sample and the nearest point,
+            measured in the horizontal (x, z) plane. The sign is the sign of the cross product of the
+            direction of the reference and the offset, so it tells on which side of the reference the
+            ghost drives
+        distance (numpy.ndarray): the distance between the sample and the nearest point
+    """
+
+    def __init__(self, times, progress, time_delta, speed_delta, lateral_offset, distance):
+        self.times = times
+        self.progress = progress
+        self.time_delta = time_delta
+        self.speed_delta = speed_delta
+        self.lateral_offset = lateral_offset
+        self.distance = distance
+
+    def __len__(self):
+        return len(self.times)
+
+    def __repr__(self):
+        final = f'{self.time_delta[-1]:+.0f} ms' if len(self) else 'empty'
+        return f'GhostDelta({len(self)} samples, {final})'
+
+
+class ReferenceTrajectory(object):
+    """The trajectory of a reference ghost, as segments between consecutive samples.
+
+    Samples of other ghosts are aligned with the reference by spatial progress: every sample is
+    projected on the nearest point of the nearest segment of the trajectory, and compared with
+    the reference at that point, the time and speed of the reference being interpolated along
+    the segment. Projections are computed for many samples at once with numpy.
+
+        reference = ReferenceTrajectory(record_ghost)
+        delta = reference.compare(ghost)
+        print(delta.time_delta[-1], delta.lateral_offset.max())
+
+    Attributes:
+        positions (numpy.ndarray): the float64 (samples, 3) positions of the reference
+        times (numpy.ndarray): the race time of every sample in milliseconds
+        speeds (numpy.ndarray): the display speed of every sample in km/h
+        progress (numpy.ndarray): the distance along the trajectory of every sample
+        window (int): see __init__
+    """
+
+    def __init__(self, ghost, window=None):
+        """Creates the trajectory of a reference ghost.
+
+        Args:
+            ghost (CGameGhost): the reference ghost
+            window (int): if provided, a sample at race time t is only projected on the segments the
+                reference drove between t - window and t + window milliseconds, which avoids matching
+                the wrong part of routes that cross or overlap themselves. Samples with no segment
+                in the window are projected on the whole trajectory.
+
+        Raises:
+            ValueError: if the reference ghost has no samples
+        """
+        samples = sample_array(ghost)
+        if not len(samples):
+            raise ValueError('the reference ghost has no samples')
+
+        self.positions = samples['position'].astype(np.float64)
+        self.times = sample_times(len(samples), ghost.sample_period).astype(np.float64)
+        self.speeds = display_speeds(samples)
+        self.window = window
+
+        if len(samples) > 1:
+            self._starts = self.positions[:-1]
+            self._vectors = np.diff(self.positions, axis=0)
+        else:
+            self._starts = self.positions
+            self._vectors = np.zeros_like(self.positions)
+
+        self._squared_lengths = np.einsum('ij,ij->i', self._vectors, self._vectors)
+        lengths = np.sqrt(self._squared_lengths)
+        self.progress = np.concatenate([[0.0], np.cumsum(lengths)])[:len(samples)]
+        self._lengths = lengths
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __repr__(self):
+        return f'ReferenceTrajectory({len(self)} samples, {self.progress[-1]:.1f} long)'
+
+    def _nearest(self, positions, times):
+        # Returns the nearest segment of every position and the fraction of the segment of the nearest point
+        num_segments = len(self._starts)
+        segments = np.zeros(len(positions), dtype=np.int64)
+        fractions = np.zeros(len(positions))
+        if self.window is not None:
+            segment_start = self.times[:num_segments]
+            segment_end = self.times[1:num_segments + 1] if len(self.times) > 1 else segment_start
+
+        # The squared distance to the nearest point of a segment is |o|^2 - 2 t (o.v) + t^2 |v|^2, with o the
+        # offset from the start of the segment and v its vector, both products being matrix products
+        start_dots = np.einsum('ij,ij->i', self._starts, self._vectors)
+        start_squares = np.einsum('ij,ij->i', self._starts, self._starts)
+        has_length = self._squared_lengths > 0
+
+        step = max(1, CHUNK_PAIRS // num_segments)
+        for start in range(0, len(positions), step):
+            end = min(start + step, len(positions))
+            chunk = positions[start:end]
+            dots = chunk @ self._vectors.T - start_dots
+            t = np.divide(dots, self._squared_lengths, out=np.zeros_like(dots), where=has_length)
+            np.clip(t, 0.0, 1.0, out=t)
+            squared = (np.einsum('ij,ij->i', chunk, chunk)[:, None] + start_squares - 2 * (chunk @ self._starts.T)
+                       - t * (2 * dots - t * self._squared_lengths))
+
+            nearest = np.argmin(squared, axis=1)
+            if self.window is not None:
+                query = times[start:end, None]
+                outside = (query < segment_start - self.window) | (query > segment_end + self.window)
+                windowed = np.where(outside, np.inf, squared)
+                found = np.isfinite(windowed.min(axis=1))
+                nearest = np.where(found, np.argmin(windowed, axis=1), nearest)
+
+            rows = np.arange(end - start)
+            segments[start:end] = nearest
+            fractions[start:end] = t[rows, nearest]
+
+        return segments, fractions
+
+    def project(self, positions, times=None):
+        """Projects positions on the nearest points of the trajectory.
+
+        Args:
+            positions (numpy.ndarray): the (n, 3) positions
+            times (numpy.ndarray): the race times of the positions in milliseconds, only used with
+                a window
+
+        Returns:
+            a tuple of (segments, fractions, points): the index of the nearest segment, the position of
+            the nearest point along it between 0 and 1 and the (n, 3) nearest points
+        """
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+        if self.window is not None and times is None:
+            raise ValueError('times are required to project positions with a window')
+
+        segments, fractions = self._nearest(positions, None if times is None else np.asarray(times, dtype=np.float64))
+        points = self._starts[segments] + fractions[:, None] * self._vectors[segments]
+        return segments, fractions, points
+
+    def _compare(self, positions, times, speeds):
+        segments, fractions, points = self.project(positions, times)
+        following = np.minimum(segments + 1, len(self) - 1)
+
+        reference_times = self.times[segments] + fractions * (self.times[following] - self.times[segments])
+        reference_speeds = self.speeds[segments] + fractions * (self.speeds[following] - self.speeds[segments])
+        progress = self.progress[segments] + fractions * self._lengths[segments]
+
+        offsets = positions - points
+        direction = self._vectors[segments]
+        cross = direction[:, 0] * offsets[:, 2] - direction[:, 2] * offsets[:, 0]
+        horizontal = np.hypot(offsets[:, 0], offsets[:, 2])
+        lateral = np.where(cross < 0, -horizontal, horizontal)
+        distance = np.sqrt(np.einsum('ij,ij->i', offsets, offsets))
+
+        return GhostDelta(times, progress, times - reference_times, speeds - reference_speeds, lateral, distance)
+
+    def compare(self, ghost):
+        """Compares the samples of a ghost with the reference.
+
+        Args:
+            ghost (CGameGhost): the compared ghost
+
+        Returns:
+            the GhostDelta of the ghost
+        """
+        return self.compare_many([ghost])[0]
+
+    def compare_many(self, ghosts):
+        """Compares the samples of many ghosts with the reference in a single batched projection.
+
+        Args:
+            ghosts (list): the compared CGameGhost instances
+
+        Returns:
+            a list of GhostDelta, in the order of the ghosts
+        """
+        arrays = [sample_array(ghost) for ghost in ghosts]
+        if not arrays:
+            return []
+
+        samples = np.concatenate(arrays)
+        times = np.concatenate([sample_times(len(a), ghost.sample_period) for a, ghost in zip(arrays, ghosts)])
+        delta = self._compare(samples['position'].astype(np.float64), times.astype(np.float64),
+                              display_speeds(samples))
+
+        deltas = []
+        offsets = np.cumsum([0] + [len(a) for a in arrays])
+        for start, end in zip(offsets[:-1], offsets[1:]):
+            deltas.append(GhostDelta(
+                delta.times[start:end].astype(np.int32), delta.progress[start:end], delta.time_delta[start:end],
+                delta.speed_delta[start:end], delta.lateral_offset[start:end], delta.distance[start:end]
+            ))
+        return deltas
+
+
+def ghost_delta(reference, ghost, window=None):
+    """Compares a ghost with a reference ghost, see ReferenceTrajectory.
+
+    Args:
+        reference (CGameGhost): the reference ghost, e.g the record
+        ghost (CGameGhost): the compared ghost
+        window (int): see ReferenceTrajectory
+
+    Returns:
+        the GhostDelta of the ghost
+    """
+    return ReferenceTrajectory(reference, window).compare(ghost)
+
+
+def ghost_deltas(reference, ghosts, window=None):
+    """Compares many ghosts with a reference ghost in a single batched call, see ReferenceTrajectory.
+
+    Args:
+        reference (CGameGhost): the reference ghost, e.g the record
+        ghosts (list): the compared ghosts
+        window (int): see ReferenceTrajectory
+
+    Returns:
+        a list of GhostDelta, in the order of the ghosts
+    """
+    return ReferenceTrajectory(reference, window).compare_many(ghosts)
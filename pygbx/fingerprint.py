@@ -0,0 +1,147 @@
+import hashlib
+import struct
+
+from pygbx.gbx import GbxType
+from pygbx.headers import GhostSampleRecord
+
+DIGEST_SIZE = 16
+
+_BLOCK = struct.Struct('<B3iI')
+_ITEM = struct.Struct('<4f')
+_SAMPLE = struct.Struct(GhostSampleRecord.SAMPLE_FORMAT)
+
+
+def _update_string(h, s):
+    data = (s or '').encode('utf-8')
+    h.update(struct.pack('<I', len(data)))
+    h.update(data)
+
+
+def challenge_fingerprint(challenge):
+    """Computes a fingerprint of the track contained in a challenge.
+
+    The fingerprint covers the environment, the blocks (name, rotation, position, flags)
+    and the items (path, collection, author, position, rotation, waypoint) of the challenge,
+    but not its metadata such as the map name, UID, author or medal times. Blocks and items
+    are hashed in a sorted order, so two maps with the same blocks placed in a different
+    order yield the same fingerprint.
+
+    Args:
+        challenge (CGameChallenge): the parsed challenge
+
+    Returns:
+        the fingerprint as a hex string
+    """
+    h = hashlib.blake2b(digest_size=DIGEST_SIZE, person=b'pygbx-map')
+    _update_string(h, challenge.environment)
+
+    blocks = sorted(
+        (block.name or '', block.rotation, block.position.x, block.position.y, block.position.z, block.flags)
+        for block in challenge.blocks
+    )
+    h.update(struct.pack('<I', len(blocks)))
+    for name, rotation, x, y, z, flags in blocks:
+        _update_string(h, name)
+        h.update(_BLOCK.pack(rotation, x, y, z, flags & 0xFFFFFFFF))
+
+    items = sorted(
+        (item.path or '', item.collection or '', item.author or '',
+         item.position.x, item.position.y, item.position.z, item.rotation,
+         (item.waypoint.tag or '', item.waypoint.order) if item.waypoint else ('', -1))
+        for item in challenge.items
+    )
+    h.update(struct.pack('<I', len(items)))
+    for path, collection, author, x, y, z, rotation, (tag, order) in items:
+        _update_string(h, path)
+        _update_string(h, collection)
+        _update_string(h, author)
+        h.update(_ITEM.pack(x, y, z, rotation))
+        _update_string(h, tag)
+        h.update(struct.pack('<i', order))
+
+    return h.hexdigest()
+
+
+def sample_data_fingerprint(sample_data, sample_period=None):
+    """Computes a fingerprint of raw ghost sample data.
+
+    This is the fingerprint of ghosts parsed with read_samples=False, which store the raw
+    sample buffer in their sample_data member and do not build GhostSampleRecord objects.
+
+    Args:
+        sample_data (bytes): the raw sample data
+        sample_period (int): the sample period of the ghost
+
+    Returns:
+        the fingerprint as a hex string
+    """
+    h = hashlib.blake2b(digest_size=DIGEST_SIZE, person=b'pygbx-ghost')
+    h.update(struct.pack('<i', -1 if sample_period is None else sample_period))
+    h.update(sample_data)
+    return h.hexdigest()
+
+
+def ghost_fingerprint(ghost):
+    """Computes a fingerprint of the samples of a ghost.
+
+    Both ghosts parsed with and without read_samples yield the same fingerprint: if the raw
+    sample data is not available, it is reconstructed from the sample records.
+
+    The raw data of sample records is dropped by Gbx.release, e.g when parsing with
+    keep_data=False. Ghosts parsed with read_samples=False keep their sample data and can
+    still be fingerprinted.
+
+    Args:
+        ghost (CGameGhost): the parsed ghost
+
+    Returns:
+        the fingerprint as a hex string
+
+    Raises:
+        ValueError: if the sample records of the ghost were released
+    """
+    if ghost.sample_data is not None:
+        return sample_data_fingerprint(ghost.sample_data, ghost.sample_period)
+
+    data = bytearray()
+    for r in ghost.records:
+        if r.raw_data is None:
+            raise ValueError('the samples of the ghost were released, parse the file with read_samples=False '
+                             'or keep_data=True to fingerprint them')
+        data += _SAMPLE.pack(r.position.x, r.position.y, r.position.z, r.angle, r.axis_heading,
+                             r.axis_pitch, r.speed, r.vel_heading, r.vel_pitch)
+        data += r.raw_data
+
+    return sample_data_fingerprint(data, ghost.sample_period)
+
+
+def fingerprint(g, samples=True):
+    """Computes a fingerprint of the content of a Gbx file that does not depend on its metadata.
+
+    Files that differ only in their header, names, UIDs or timestamps have the same fingerprint,
+    which makes it a cheap key for deduplicating Challenges and Replays. For Replays, the fingerprint
+    covers the embedded track and, if samples is True, the sample data of every ghost.
+
+    Args:
+        g (Gbx): the parsed Gbx file
+        samples (bool): whether to include ghost samples
+
+    Returns:
+        the fingerprint as a hex string
+
+    Raises:
+        ValueError: if samples is True and the samples of a ghost were released, see ghost_fingerprint
+    """
+    h = hashlib.blake2b(digest_size=DIGEST_SIZE, person=b'pygbx')
+    for challenge in g.get_classes_by_ids([GbxType.CHALLENGE, GbxType.CHALLENGE_OLD]):
+        h.update(bytes.fromhex(challenge_fingerprint(challenge)))
+
+    for record in g.get_classes_by_ids([GbxType.REPLAY_RECORD, GbxType.REPLAY_RECORD_OLD]):
+        if record.track:
+            h.update(bytes.fromhex(fingerprint(record.track, False)))
+
+    if samples:
+        for ghost in g.get_classes_by_ids([GbxType.CTN_GHOST, GbxType.CTN_GHOST_OLD, GbxType.GAME_GHOST]):
+            h.update(bytes.fromhex(ghost_fingerprint(ghost)))
+
+    return h.hexdigest()
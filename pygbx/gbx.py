@@ -1,10 +1,10 @@
 import logging
+import struct
 from enum import IntEnum
-
-import lzo
-import zlib
+from time import perf_counter
 
 import pygbx.headers as headers
+from pygbx import compression, memory
 from pygbx.bytereader import ByteReader
 
 
@@ -62,79 +62,212 @@ class Gbx(object):
     to obtain access to a ByteReader with the cursor positioned at the beggining of provided chunk ID.
     """
 
-    def __init__(self, obj):
-        """Creates the main Gbx instance from a file path or from bytes object.
+    def __init__(self, obj, read_samples=True, header_only=False, keep_data=True, profiler=None, read_inputs=True):
+        """Creates the main Gbx instance from a file path, bytes object or a binary file object.
 
         Parses the Gbx file sequentially, reading all supported chunks until no more chunks have
         been found. Parsing can fail depending on the what classes or chunks it contains and what
         version of the GBX file is being parsed. 
 
         Args:
-            obj (str/bytes): a file path to the Gbx file or bytes object containing the Gbx data
+            obj (str/bytes/file): a file path to the Gbx file, bytes object containing the Gbx data
+                or a file object such as an archive member opened through pygbx.archive.Archive.
+                File objects that cannot seek, e.g pipes or sockets, are read forward only and
+                the compressed body is read with a single sized read
+            read_samples (bool): whether to decode ghost samples into GhostSampleRecord objects,
+                if False, the raw sample data is stored in the sample_data member of the ghost instead
+            header_only (bool): whether to stop after reading the header, without decompressing the body.
+                Only the classes read from the header chunks are available in root_classes
+            keep_data (bool): whether to keep the raw data after parsing. If False, release is called
+                once parsing is done, which lowers the memory retained by the instance but makes
+                find_raw_chunk_id and the raw_data member of sample records unavailable. With
+                read_samples=False, the sample_data member of ghosts is the only copy of the samples
+                and is kept
+            profiler (ParseProfiler): an object collecting per chunk and per phase statistics,
+                see pygbx.instrumentation.ParseProfiler
+            read_inputs (bool): whether to decode the control entries of ghosts into ControlEntry objects,
+                if False, the raw entries are stored in the control_data member of the ghost instead,
+                see pygbx.inputs
+
+        If a file path is provided, the file is closed as soon as the compressed body has been read.
+        Gbx instances can also be used as context managers, which releases the raw data on exit
+        as keep_data=False does:
+
+            with Gbx('A01-Race.Challenge.Gbx') as g:
+                challenge = g.get_class_by_id(GbxType.CHALLENGE)
 
         Raises:
             GbxLoadError: raised when the supplied object is not a GBX file or data
         """
+        self.profiler = profiler
+        if profiler is not None:
+            start = perf_counter()
+
         if isinstance(obj, str):
             self.f = open(obj, 'rb')
             self.root_parser = ByteReader(self.f)
         else:
+            self.f = None
             self.root_parser = ByteReader(obj)
 
-        self.magic = self.root_parser.read(3, '3s')
-        if self.magic.decode('utf-8') != 'GBX':
-            raise GbxLoadError(f'obj is not a valid Gbx data: magic string is incorrect')
-        self.version = self.root_parser.read(2, 'H')
-        self.classes = {}
-        self.root_classes = {}
-        self.positions = {}
-        self.__current_waypoint = None
-        self.__replay_header_info = {}
-
-        self.root_parser.skip(3)
-        if self.version >= 4:
-            self.root_parser.skip(1)
-
-        if self.version >= 3:
-            self.class_id = self.root_parser.read_uint32()
-            try:
-                self.type = GbxType(self.class_id)
-            except ValueError:
-                self.type = GbxType.UNKNOWN
-
-            if self.version >= 6:
-                self._read_user_data()
-
-            self.num_nodes = self.root_parser.read_uint32()
-
-        self.num_external_nodes = self.root_parser.read_uint32()
-        if self.num_external_nodes > 0:
-            self.root_parser.read_uint32()
-            self.__read_sub_folder()
-            for node in range(self.num_external_nodes):
-                flags = self.root_parser.read_uint32()
-                if (flags & 4) == 0:
-                    self.root_parser.read_string()
-                else:
-                    self.root_parser.read_uint32()
+        try:
+            self.magic = self.root_parser.read(3, '3s')
+            if self.magic.decode('utf-8') != 'GBX':
+                raise GbxLoadError(f'obj is not a valid Gbx data: magic string is incorrect')
+            self.version = self.root_parser.read(2, 'H')
+            self.classes = {}
+            self.root_classes = {}
+            self.positions = {}
+            self.data = None
+            self.body_strings = []
+            self.read_samples = read_samples
+            self.read_inputs = read_inputs
+            self.keep_data = keep_data
+            self.__current_waypoint = None
+            self.__replay_header_info = {}
+            self.__node_depth = -1
+            self.__log_chunks = logging.getLogger().isEnabledFor(logging.DEBUG)
+            self._embedded_time = 0.0
+
+            self.root_parser.skip(3)
+            if self.version >= 4:
+                self.root_parser.skip(1)
+
+            if self.version >= 3:
+                self.class_id = self.root_parser.read_uint32()
+                try:
+                    self.type = GbxType(self.class_id)
+                except ValueError:
+                    self.type = GbxType.UNKNOWN
+
+                if self.version >= 6:
+                    self._read_user_data()
+
+                self.num_nodes = self.root_parser.read_uint32()
+
+            self.num_external_nodes = self.root_parser.read_uint32()
+            if self.num_external_nodes > 0:
+                self.root_parser.read_uint32()
+                self.__read_sub_folder()
+                for node in range(self.num_external_nodes):
+                    flags = self.root_parser.read_uint32()
+                    if (flags & 4) == 0:
+                        self.root_parser.read_string()
+                    else:
+                        self.root_parser.read_uint32()
 
-                self.root_parser.skip(4)
-                if self.version >= 5:
                     self.root_parser.skip(4)
+                    if self.version >= 5:
+                        self.root_parser.skip(4)
 
-                if (flags & 4) == 0:
-                    self.root_parser.skip(4)
+                    if (flags & 4) == 0:
+                        self.root_parser.skip(4)
 
-        self.root_parser.push_info()
-        self.positions['data_size'] = self.root_parser.pop_info()
+            if profiler is not None:
+                profiler.phase('header', perf_counter() - start, self.root_parser.pos)
 
-        data_size = self.root_parser.read_uint32()
-        compressed_data_size = self.root_parser.read_uint32()
-        cdata = self.root_parser.read(compressed_data_size)
-        self.data = bytearray(lzo.decompress(cdata, False, data_size))
+            if header_only:
+                self._add_replay_header_class()
+                self.close()
+                return
 
-        bp = ByteReader(self.data)
+            self.root_parser.push_info()
+            self.positions['data_size'] = self.root_parser.pop_info()
+
+            data_size = self.root_parser.read_uint32()
+            compressed_data_size = self.root_parser.read_uint32()
+            if profiler is not None:
+                start = perf_counter()
+            cdata = self.root_parser.read(compressed_data_size)
+        except BaseException:
+            # The file opened from a path is closed if the header or body cannot be read
+            self.close()
+            raise
+
+        self.close()
+        if profiler is not None:
+            profiler.phase('read', perf_counter() - start, compressed_data_size)
+            start = perf_counter()
+        self.data = compression.decompress('lzo', cdata, data_size)
+        del cdata
+        if profiler is not None:
+            profiler.phase('decompress', perf_counter() - start, data_size)
+            start = perf_counter()
+
+        # The body is only ever accessed through memoryviews, so reading
+        # large spans of it (embedded maps, ghost data) does not copy it
+        bp = ByteReader(memoryview(self.data))
+        self.body_strings = bp.stored_strings
         self._read_node(self.class_id, -1, bp)
+        if profiler is not None:
+            profiler.phase('parse', perf_counter() - start - self._embedded_time, data_size)
+
+        if not keep_data:
+            self.release(keep_samples=not read_samples)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.release(keep_samples=not self.read_samples)
+
+    def close(self):
+        """Closes the file opened by the instance, if it was created from a file path.
+
+        This is done automatically once the compressed body has been read.
+        """
+        if self.f is not None:
+            self.f.close()
+            self.f = None
+
+    def release(self, keep_samples=False):
+        """Releases the raw data held by the instance, keeping the parsed classes.
+
+        This closes the file, drops the input data and the decompressed body and the raw sample
+        data of ghosts (the sample_data member and the raw_data member of sample records), as well
+        as the raw data of the track embedded in a Replay. After releasing, find_raw_chunk_id is
+        no longer available.
+
+        Args:
+            keep_samples (bool): whether to keep the sample_data member of ghosts, which is the only
+                copy of the samples of ghosts parsed with read_samples=False
+        """
+        self.close()
+        self.data = None
+        self.root_parser.data = None
+        for game_class in list(self.classes.values()) + list(self.root_classes.values()):
+            if isinstance(game_class, headers.CGameGhost):
+                if not keep_samples:
+                    game_class.sample_data = None
+                for record in game_class.records:
+                    record.raw_data = None
+
+            track = getattr(game_class, 'track', None)
+            if isinstance(track, Gbx):
+                track.release(keep_samples)
+
+    def memory_report(self):
+        """Estimates the memory retained by the instance, broken down by component.
+
+        See pygbx.memory.memory_report for the list of components.
+
+        Returns:
+            a dict of component name to the number of bytes, with the sum of all components under 'total'
+        """
+        return memory.memory_report(self)
+
+    def _add_replay_header_class(self):
+        if 'version' not in self.__replay_header_info:
+            return
+
+        game_class = headers.CGameReplayRecord(self.class_id)
+        self.__apply_replay_header_info(game_class)
+        self.root_classes[self.class_id] = game_class
+
+    def __apply_replay_header_info(self, game_class):
+        for key in ('nickname', 'driver_login', 'map_uid', 'environment', 'map_author', 'race_time'):
+            if key in self.__replay_header_info:
+                setattr(game_class, key, self.__replay_header_info[key])
 
     def __read_sub_folder(self):
         num_sub_folders = self.root_parser.read_uint32()
@@ -155,13 +288,17 @@ class Gbx(object):
         if no specified chunk ID was found
     """
     def find_raw_chunk_id(self, chunk_id):
-        bp = ByteReader(self.data[:])
-        for i in range(len(self.data) - 4):
-            bp.pos = i
-            if bp.read_uint32() == chunk_id:
-                return bp
+        if self.data is None:
+            logging.error('Cannot search for chunks, the data has been released (keep_data=False)')
+            return None
+
+        i = self.data.find(struct.pack('I', chunk_id), 0, len(self.data) - 1)
+        if i == -1:
+            return None
 
-        return None
+        bp = ByteReader(memoryview(self.data))
+        bp.pos = i + 4
+        return bp
 
     def get_class_by_id(self, class_id):
         """Finds the header that corresponds to the provided class ID.
@@ -210,7 +347,7 @@ class Gbx(object):
         user_data_pos = self.root_parser.pos
         num_chunks = self.root_parser.read_uint32()
         for _ in range(num_chunks):
-            if self.root_parser.pos >= self.root_parser.size - 1:
+            if not self.root_parser.streaming and self.root_parser.pos >= self.root_parser.size - 1:
                 self.root_parser.pos = user_data_pos + self.user_data_size
                 return
 
@@ -268,10 +405,11 @@ class Gbx(object):
         elif cid == 0x03043003 or cid == 0x24003003:
             p = self.root_parser.pos
             self.root_parser.read_byte()
-            for _ in range(3):
-                self.root_parser.read_string_lookback()
 
             game_class = headers.CGameCommon(cid)
+            game_class.map_uid = self.root_parser.read_string_lookback()
+            game_class.environment = self.root_parser.read_string_lookback()
+            game_class.map_author = self.root_parser.read_string_lookback()
 
             self.root_parser.push_info()
             game_class.track_name = self.root_parser.read_string()
@@ -288,9 +426,10 @@ class Gbx(object):
             version = self.root_parser.read_uint32()
             self.__replay_header_info['version'] = version
             if version >= 2:
-                for _ in range(3):
-                    self.root_parser.read_string_lookback()
-                self.root_parser.skip(4)
+                self.__replay_header_info['map_uid'] = self.root_parser.read_string_lookback()
+                self.__replay_header_info['environment'] = self.root_parser.read_string_lookback()
+                self.__replay_header_info['map_author'] = self.root_parser.read_string_lookback()
+                self.__replay_header_info['race_time'] = self.root_parser.read_uint32()
                 self.__replay_header_info['nickname'] = self.root_parser.read_string()
                 if version >= 6:
                     self.__replay_header_info['driver_login'] = self.root_parser.read_string()
@@ -313,10 +452,7 @@ class Gbx(object):
                 game_class.community = self.__community
         elif class_id == GbxType.REPLAY_RECORD or class_id == GbxType.REPLAY_RECORD_OLD:
             game_class = headers.CGameReplayRecord(class_id)
-            if 'nickname' in self.__replay_header_info:
-                game_class.nickname = self.__replay_header_info['nickname']
-            if 'driver_login' in self.__replay_header_info:
-                game_class.driver_login = self.__replay_header_info['driver_login']
+            self.__apply_replay_header_info(game_class)
 
         elif class_id == GbxType.WAYPOINT_SPECIAL_PROP or class_id == 0x2E009000:
             game_class = headers.CGameWaypointSpecialProperty(class_id)
@@ -334,15 +470,28 @@ class Gbx(object):
         if add:
             self.classes[depth] = game_class
 
+        self.__node_depth += 1
+        profiler = self.profiler
+        chunk = None
+
         while True:
+            if chunk is not None:
+                profiler.chunk(chunk[0], self.__node_depth, bp.pos - chunk[1], bp.skipped - chunk[2],
+                               perf_counter() - chunk[3])
+
             oldcid = cid
             cid = bp.read_uint32()
-            logging.debug(f'Reading chunk {hex(cid)}')
+            if self.__log_chunks:
+                logging.debug(f'Reading chunk {hex(cid)}')
 
             if cid == 0xFACADE01:
-                logging.debug('Encountered chunk 0xFACADE01, stopping')
+                if self.__log_chunks:
+                    logging.debug('Encountered chunk 0xFACADE01, stopping')
                 break
 
+            if profiler is not None:
+                chunk = (cid, bp.pos - 4, bp.skipped, perf_counter())
+
             skipsize = -1
             skip = bp.read_int32()
             if skip == 0x534B4950:
@@ -532,6 +681,7 @@ class Gbx(object):
 
                 item_bp.skip(4)
                 bp.pos = item_bp.pos
+                bp.skipped += item_bp.skipped
             elif cid == 0x03059002 or cid == 0x2403A002:
                 bp.read_string()
                 for i in range(2):
@@ -579,17 +729,23 @@ class Gbx(object):
                 bp.read_string()
                 bp.read_string()
             elif cid == 0x0303F005:
-                Gbx.read_ghost(game_class, bp)
+                Gbx.read_ghost(game_class, bp, self.read_samples, profiler)
             elif cid == 0x0303F006:
                 bp.skip(4)
-                Gbx.read_ghost(game_class, bp)
+                Gbx.read_ghost(game_class, bp, self.read_samples, profiler)
             elif cid == 0x03093002 or cid == 0x2403F002:
                 map_gbx_size = bp.read_uint32()
-                data = bytes(bp.read(map_gbx_size))
+                data = bp.read(map_gbx_size)
+                if self.profiler is not None:
+                    start = perf_counter()
                 try:
-                    game_class.track = Gbx(data)
+                    game_class.track = Gbx(data, read_samples=self.read_samples, keep_data=self.keep_data,
+                                           profiler=self.profiler, read_inputs=self.read_inputs)
                 except Exception as e:
                     logging.error(f'Failed to parse map data: {e}')
+                if self.profiler is not None:
+                    # Recorded by the phases of the embedded map instead
+                    self._embedded_time += perf_counter() - start
 
             elif cid == 0x03093007:
                 bp.skip(4)
@@ -690,7 +846,7 @@ class Gbx(object):
                 bp.read_string_lookback()
                 bp.read_string_lookback()
             elif cid == 0x3092019 or cid == 0x03092025 or cid == 0x2401B019 or cid == 0x2401B011:
-                Gbx.read_ghost_events(game_class, bp, cid)
+                Gbx.read_ghost_events(game_class, bp, cid, self.read_inputs)
             elif cid == 0x309201c:
                 bp.skip(32)
             elif cid == 0x03093004 or cid == 0x2403f004:
@@ -699,10 +855,15 @@ class Gbx(object):
                 bp.skip(skipsize)
                 cid = oldcid
             else:
-                return
+                if chunk is not None:
+                    profiler.chunk(chunk[0], self.__node_depth, bp.pos - chunk[1], bp.skipped - chunk[2],
+                                   perf_counter() - chunk[3])
+                break
+
+        self.__node_depth -= 1
 
     @staticmethod
-    def read_ghost_events(game_class, bp, cid):
+    def read_ghost_events(game_class, bp, cid, read_entries=True):
         if cid == 0x03092025:
             game_class.is_maniaplanet = True
             bp.skip(4)
@@ -723,11 +884,16 @@ class Gbx(object):
 
             num_control_entries = bp.read_uint32()
             bp.skip(4)
-            for _ in range(num_control_entries):
-                time = bp.read_uint32() - 100000
-                name = game_class.control_names[bp.read_byte()]
-                entry = headers.ControlEntry(time, name, bp.read_uint16(), bp.read_uint16())
-                game_class.control_entries.append(entry)
+            game_class.num_control_entries = num_control_entries
+            if read_entries:
+                for _ in range(num_control_entries):
+                    time = bp.read_uint32() - 100000
+                    name = game_class.control_names[bp.read_byte()]
+                    entry = headers.ControlEntry(time, name, bp.read_uint16(), bp.read_uint16())
+                    game_class.control_entries.append(entry)
+            else:
+                # Every entry is a uint32 time, a uint8 name index and two uint16 values
+                game_class.control_data = bytes(bp.read(9 * num_control_entries))
 
             game_class.game_version = bp.read_string()
             game_class.exe_checksum = bp.read_uint32()
@@ -737,11 +903,15 @@ class Gbx(object):
             bp.skip(4)
 
     @staticmethod
-    def read_ghost(game_class, bp):
+    def read_ghost(game_class, bp, read_samples=True, profiler=None):
         uncomp_sz = bp.read_uint32()
         comp_sz = bp.read_uint32()
         comp_data = bp.read(comp_sz)
-        data = zlib.decompress(comp_data, 0, uncomp_sz)
+        if profiler is not None:
+            start = perf_counter()
+        data = compression.decompress('zlib', comp_data, uncomp_sz)
+        if profiler is not None:
+            profiler.phase('ghost_decompress', perf_counter() - start, uncomp_sz)
 
         gr = ByteReader(data)
         gr.skip(3 * 4)
@@ -766,6 +936,12 @@ class Gbx(object):
                 else:
                     sample_sizes.append(sps)
 
+        game_class.num_samples = num_samples
+        game_class.sample_sizes = sample_sizes
+        if not read_samples:
+            game_class.sample_data = memoryview(data)[sample_data_pos + fso:sample_data_pos + sample_data_sz]
+            return
+
         gr.pos = sample_data_pos
         gr.skip(fso)
         for i in range(num_samples):
@@ -6,6 +6,37 @@ class CGameHeader(object):
     def __init__(self, id):
         self.id = id
 
+    def to_compact(self):
+        """Serializes the class to a flat binary representation, see pygbx.compact.dumps.
+
+        The representation is much smaller and faster to transfer between processes than a pickle,
+        as lists such as blocks, ghost samples and control entries are stored as typed arrays.
+
+        Returns:
+            the compact representation as bytes
+        """
+        from pygbx import compact
+        return compact.dumps(self)
+
+    @classmethod
+    def from_compact(cls, data):
+        """Restores a class serialized with to_compact.
+
+        Args:
+            data (bytes): the compact representation
+
+        Returns:
+            the restored class
+
+        Raises:
+            ValueError: if the data is not a valid compact representation of this class
+        """
+        from pygbx import compact
+        obj = compact.loads(data)
+        if not isinstance(obj, cls):
+            raise ValueError(f'compact data contains a {type(obj).__name__}, not a {cls.__name__}')
+        return obj
+
 
 class CGameCtnCollectorList(object):
     """A header that holds a list of CollectorStock's."""
@@ -113,7 +144,7 @@ class CGameChallenge(CGameHeader):
 class CGameBlockItem(CGameHeader):
     """A header that contains data related to the CGameBlockItem class."""
     def __init__(self):
-        self.id = id
+        self.id = None
         self.path = None
         self.collection = None
         self.author = None
@@ -136,6 +167,9 @@ class CGameCommon(CGameHeader):
     def __init__(self, id):
         self.id = id
         self.track_name = None
+        self.map_uid = None
+        self.environment = None
+        self.map_author = None
 
 
 class CGameReplayRecord(CGameCommon):
@@ -145,6 +179,10 @@ class CGameReplayRecord(CGameCommon):
         self.track = None
         self.nickname = None
         self.driver_login = None
+        self.map_uid = None
+        self.environment = None
+        self.map_author = None
+        self.race_time = None
 
 
 class CGameGhost(CGameHeader):
@@ -153,6 +191,9 @@ class CGameGhost(CGameHeader):
         self.id = id
         self.records = []
         self.sample_period = None
+        self.num_samples = 0
+        self.sample_sizes = []
+        self.sample_data = None
 
 
 class CGameCtnGhost(CGameGhost):
@@ -167,6 +208,8 @@ class CGameCtnGhost(CGameGhost):
         self.login = None
         self.cp_times = []
         self.control_entries = []
+        self.num_control_entries = 0
+        self.control_data = None
         self.game_version = ''
         self.control_names = []
         self.events_duration = 0
@@ -200,6 +243,9 @@ class GhostSampleRecord(object):
     BLOCK_SIZE_XZ = 32
     BLOCK_SIZE_Y = 8
 
+    # Layout of the fields decoded from the beginning of each raw sample
+    SAMPLE_FORMAT = '<3fH3h2b'
+
     def __init__(self, position, angle, axis_heading, axis_pitch, speed, vel_heading, vel_pitch):
         self.position = position
         self.angle = angle
@@ -0,0 +1,303 @@
+import json
+import os
+import sqlite3
+
+from pygbx.batch import find_gbx_files, parse_files
+from pygbx.gbx import GbxType
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    type INTEGER,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS maps (
+    path TEXT PRIMARY KEY REFERENCES files(path) ON DELETE CASCADE,
+    map_uid TEXT,
+    environment TEXT,
+    author TEXT,
+    name TEXT,
+    bronze_time INTEGER,
+    silver_time INTEGER,
+    gold_time INTEGER,
+    author_time INTEGER,
+    num_blocks INTEGER,
+    num_items INTEGER
+);
+CREATE TABLE IF NOT EXISTS ghosts (
+    path TEXT NOT NULL REFERENCES files(path) ON DELETE CASCADE,
+    ghost_index INTEGER NOT NULL,
+    uid TEXT,
+    login TEXT,
+    nickname TEXT,
+    race_time INTEGER,
+    num_respawns INTEGER,
+    cp_times TEXT,
+    PRIMARY KEY (path, ghost_index)
+);
+CREATE INDEX IF NOT EXISTS maps_uid ON maps(map_uid);
+CREATE INDEX IF NOT EXISTS maps_author ON maps(author, environment);
+CREATE INDEX IF NOT EXISTS ghosts_uid ON ghosts(uid, race_time);
+CREATE INDEX IF NOT EXISTS ghosts_login ON ghosts(login);
+'''
+
+
+def extract_metadata(g):
+    """Extracts the metadata stored in the index from a parsed Gbx file.
+
+    The returned dictionary only contains plain Python types, so it can be cheaply
+    sent back from a worker process.
+
+    Args:
+        g (Gbx): the parsed Gbx file
+
+    Returns:
+        a dictionary with the type of the file and the lists of map and ghost rows
+    """
+    maps = []
+    for challenge in g.get_classes_by_ids([GbxType.CHALLENGE, GbxType.CHALLENGE_OLD]):
+        times = challenge.times
+        if not times:
+            params = g.get_class_by_id(GbxType.CHALLENGE_PARAMS)
+            if params and hasattr(params, 'times'):
+                times = params.times
+
+        maps.append({
+            'map_uid': challenge.map_uid,
+            'environment': challenge.environment,
+            'author': challenge.map_author,
+            'name': challenge.map_name,
+            'bronze_time': times.get('bronze'),
+            'silver_time': times.get('silver'),
+            'gold_time': times.get('gold'),
+            'author_time': times.get('author'),
+            'num_blocks': len(challenge.blocks),
+            'num_items': len(challenge.items)
+        })
+
+    nickname = None
+    driver_login = None
+    records = g.get_classes_by_ids([GbxType.REPLAY_RECORD, GbxType.REPLAY_RECORD_OLD])
+    if records:
+        nickname = records[0].nickname
+        driver_login = records[0].driver_login
+
+    ghosts = []
+    for ghost in g.get_classes_by_ids([GbxType.CTN_GHOST, GbxType.CTN_GHOST_OLD]):
+        ghosts.append({
+            'uid': ghost.uid,
+            'login': ghost.login or driver_login,
+            'nickname': nickname,
+            'race_time': ghost.race_time,
+            'num_respawns': ghost.num_respawns,
+            'cp_times': ghost.cp_times
+        })
+
+    return {'type': g.class_id, 'maps': maps, 'ghosts': ghosts}
+
+
+class GbxIndex(object):
+    """The GbxIndex class maintains a persistent SQLite index of metadata contained within Gbx files.
+
+    The index stores header and body metadata of Challenges (UID, environment, author, medal times,
+    block and item counts) and of the ghosts contained in Replays (map UID, login, race time, checkpoint times),
+    so that questions about a large corpus of files can be answered without parsing the files again.
+
+    The index is refreshed incrementally: a file is parsed again only if its modification time or size
+    changed since it was last indexed. New and modified files are parsed in parallel.
+
+        index = GbxIndex('corpus.sqlite')
+        index.update('maps/')
+        for row in index.find_maps(author='Nadeo', environment='Canyon', max_author_time=30000):
+            print(row['path'], row['author_time'])
+    """
+
+    def __init__(self, path=':memory:'):
+        """Opens or creates an index stored in the provided database file.
+
+        Args:
+            path (str): the path to the SQLite database, ':memory:' creates a temporary in-memory index
+        """
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute('PRAGMA foreign_keys = ON')
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        """Closes the underlying database connection."""
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return self.db.execute('SELECT COUNT(*) FROM files').fetchone()[0]
+
+    def update(self, paths, workers=None):
+        """Brings the index up to date with the provided files.
+
+        Files that are not indexed yet or whose modification time or size changed are parsed
+        with a pool of worker processes and their metadata is (re)inserted. Files that fail
+        to parse are stored with their error, so they are not parsed again until they change.
+
+        If a directory is provided, it is searched for Gbx files recursively and indexed files
+        under that directory that no longer exist are removed from the index.
+
+        Args:
+            paths (str/list): a directory or a list of file paths
+            workers (int): the number of worker processes, see parse_files
+
+        Returns:
+            a tuple of (number of parsed files, number of removed files)
+        """
+        removed = []
+        if isinstance(paths, str):
+            root = os.path.abspath(paths)
+            paths = find_gbx_files(root)
+            prefix = os.path.join(root, '')
+            for (path,) in self.db.execute('SELECT path FROM files WHERE substr(path, 1, ?) = ?',
+                                           (len(prefix), prefix)):
+                if not os.path.exists(path):
+                    removed.append(path)
+
+        known = {row['path']: (row['mtime'], row['size'])
+                 for row in self.db.execute('SELECT path, mtime, size FROM files')}
+
+        stats = {}
+        for path in paths:
+            path = os.path.abspath(path)
+            try:
+                st = os.stat(path)
+            except OSError:
+                if path in known:
+                    removed.append(path)
+                continue
+
+            if known.get(path) != (st.st_mtime, st.st_size):
+                stats[path] = (st.st_mtime, st.st_size)
+
+        with self.db:
+            self.db.executemany('DELETE FROM files WHERE path = ?', ((path,) for path in removed))
+
+        parsed = 0
+        for path, metadata, error in parse_files(list(stats), extract_metadata, workers):
+            mtime, size = stats[path]
+            with self.db:
+                self._store(path, mtime, size, metadata, error)
+            parsed += 1
+
+        return parsed, len(removed)
+
+    def _store(self, path, mtime, size, metadata, error):
+        self.db.execute('DELETE FROM files WHERE path = ?', (path,))
+        file_type = metadata['type'] if metadata else None
+        self.db.execute('INSERT INTO files VALUES (?, ?, ?, ?, ?)', (path, mtime, size, file_type, error))
+        if not metadata:
+            return
+
+        for m in metadata['maps'][:1]:
+            self.db.execute('INSERT INTO maps VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', (
+                path, m['map_uid'], m['environment'], m['author'], m['name'],
+                m['bronze_time'], m['silver_time'], m['gold_time'], m['author_time'],
+                m['num_blocks'], m['num_items']
+            ))
+
+        for i, gh in enumerate(metadata['ghosts']):
+            self.db.execute('INSERT INTO ghosts VALUES (?, ?, ?, ?, ?, ?, ?, ?)', (
+                path, i, gh['uid'], gh['login'], gh['nickname'], gh['race_time'],
+                gh['num_respawns'], json.dumps(gh['cp_times'])
+            ))
+
+    def query(self, sql, params=()):
+        """Runs an arbitrary SQL query against the index.
+
+        The index contains the tables files, maps and ghosts, see SCHEMA for their columns.
+
+        Args:
+            sql (str): the SQL query
+            params (tuple/dict): the query parameters
+
+        Returns:
+            a list of sqlite3.Row objects
+        """
+        return self.db.execute(sql, params).fetchall()
+
+    def find_maps(self, map_uid=None, author=None, environment=None, name=None,
+                  max_author_time=None, min_blocks=None, max_blocks=None):
+        """Finds indexed maps matching all of the provided criteria.
+
+        Criteria that are None are ignored.
+
+        Args:
+            map_uid (str): the UID of the map
+            author (str): the login of the map author
+            environment (str): the environment name, e.g 'Stadium'
+            name (str): a SQL LIKE pattern matched against the map name
+            max_author_time (int): the maximum author time in milliseconds
+            min_blocks (int): the minimum number of blocks
+            max_blocks (int): the maximum number of blocks
+
+        Returns:
+            a list of dictionaries with the columns of the maps table
+        """
+        return self._find('maps', [
+            ('map_uid = ?', map_uid),
+            ('author = ?', author),
+            ('environment = ?', environment),
+            ('name LIKE ?', name),
+            ('author_time <= ?', max_author_time),
+            ('num_blocks >= ?', min_blocks),
+            ('num_blocks <= ?', max_blocks)
+        ], 'path')
+
+    def find_ghosts(self, uid=None, login=None, max_race_time=None):
+        """Finds indexed ghosts matching all of the provided criteria, sorted by race time.
+
+        Criteria that are None are ignored.
+
+        Args:
+            uid (str): the UID of the map the ghost was driven on
+            login (str): the login of the driver
+            max_race_time (int): the maximum race time in milliseconds
+
+        Returns:
+            a list of dictionaries with the columns of the ghosts table, cp_times being a list
+        """
+        rows = self._find('ghosts', [
+            ('uid = ?', uid),
+            ('login = ?', login),
+            ('race_time <= ?', max_race_time)
+        ], 'race_time, path, ghost_index')
+
+        for row in rows:
+            row['cp_times'] = json.loads(row['cp_times'])
+
+        return rows
+
+    def errors(self):
+        """Lists indexed files that failed to parse.
+
+        Returns:
+            a list of (path, error) tuples
+        """
+        return [tuple(row) for row in self.db.execute('SELECT path, error FROM files WHERE error IS NOT NULL')]
+
+    def _find(self, table, criteria, order):
+        clauses = []
+        params = []
+        for clause, value in criteria:
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+
+        sql = f'SELECT * FROM {table}'
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        sql += f' ORDER BY {order}'
+        return [dict(row) for row in self.db.execute(sql, params)]
@@ -0,0 +1,300 @@
+from bisect import bisect_right
+
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError('pygbx.inputs requires numpy, install it with: pip install pygbx[ml]')
+
+# The layout of a control entry in the ghost data: time, name index, enabled and flags
+ENTRY_DTYPE = np.dtype([('time', '<u4'), ('name', 'u1'), ('enabled', '<u2'), ('flags', '<u2')])
+
+# Times of control entries are stored with this offset
+TIME_OFFSET = 100000
+
+# Analog controls store a signed 24 bit value in their enabled and flags members, a full input is 65536
+ANALOG_CONTROLS = ('Steer', 'Gas', 'AccelerateReal', 'BrakeReal')
+ANALOG_MAX = 65536
+
+# The channels of input_matrix derived from multiple controls, computed from a function
+# returning the state of a control by name
+DERIVED_CHANNELS = {
+    'steer': lambda state: np.clip(state('Steer') + state('SteerRight') - state('SteerLeft'), -1, 1),
+    'gas': lambda state: np.maximum(np.maximum(state('Accelerate'), state('AccelerateReal')), state('Gas')),
+    'brake': lambda state: np.maximum(state('Brake'), state('BrakeReal'))
+}
+
+CHANNELS = ('steer', 'gas', 'brake')
+
+
+class ControlColumns(object):
+    """The control entries of a ghost, stored as arrays.
+
+    Attributes:
+        names (list): the control names of the ghost, name_index indexes into this list
+        time (numpy.ndarray): the int32 time of every entry in milliseconds
+        name_index (numpy.ndarray): the uint8 index of the control name of every entry
+        enabled (numpy.ndarray): the uint16 enabled member of every entry
+        flags (numpy.ndarray): the uint16 flags member of every entry
+    """
+
+    def __init__(self, names, time, name_index, enabled, flags):
+        self.names = list(names)
+        self.time = time
+        self.name_index = name_index
+        self.enabled = enabled
+        self.flags = flags
+
+    def __len__(self):
+        return len(self.time)
+
+    def __repr__(self):
+        return f'ControlColumns({len(self)} entries, {self.names})'
+
+    def analog(self):
+        """Returns the analog value of every entry, as a float between -1 and 1.
+
+        The value is the sign extended 24 bit integer (flags << 16) | enabled, negated so that
+        negative values steer left, divided by 65536. It is only meaningful for ANALOG_CONTROLS.
+        """
+        raw = (self.flags.astype(np.int32) << 16) | self.enabled.astype(np.int32)
+        raw = np.where(raw & 0x800000, raw - 0x1000000, raw)
+        return -raw / ANALOG_MAX
+
+    def values(self):
+        """Returns the state set by every entry: the analog value for ANALOG_CONTROLS, 0 or 1 otherwise."""
+        values = (self.enabled != 0).astype(np.float64)
+        analog = np.isin(self.name_index, [i for i, name in enumerate(self.names) if name in ANALOG_CONTROLS])
+        if analog.any():
+            values[analog] = self.analog()[analog]
+        return values
+
+    def entries_of(self, name):
+        """Returns the positions of the entries of a control name, in time order.
+
+        Args:
+            name (str): the control name
+
+        Returns:
+            an index array into the columns, empty if the ghost has no such control
+        """
+        indices = [i for i, n in enumerate(self.names) if n == name]
+        positions = np.flatnonzero(np.isin(self.name_index, indices))
+        return positions[np.argsort(self.time[positions], kind='stable')]
+
+    def take(self, positions):
+        """Returns the ControlColumns of the entries at the provided positions."""
+        return ControlColumns(self.names, self.time[positions], self.name_index[positions],
+                              self.enabled[positions], self.flags[positions])
+
+
+def decode_entries(data, names):
+    """Decodes raw control entries into ControlColumns in one step.
+
+    Args:
+        data (bytes): the entries, 9 bytes each, e.g the control_data member of a ghost
+            parsed with read_inputs=False
+        names (list): the control names of the ghost
+
+    Returns:
+        the ControlColumns of the entries
+    """
+    entries = np.frombuffer(data, dtype=ENTRY_DTYPE)
+    return ControlColumns(
+        names,
+        (entries['time'].astype(np.int64) - TIME_OFFSET).astype(np.int32),
+        entries['name'].copy(),
+        entries['enabled'].copy(),
+        entries['flags'].copy()
+    )
+
+
+def control_columns(ghost):
+    """Returns the control entries of a ghost as ControlColumns.
+
+    The raw entries are decoded if the ghost was parsed with read_inputs=False, otherwise the
+    ControlEntry objects of the ghost are converted.
+
+    Args:
+        ghost (CGameCtnGhost): the ghost
+
+    Returns:
+        the ControlColumns of the ghost
+    """
+    if ghost.control_data is not None:
+        return decode_entries(ghost.control_data, ghost.control_names)
+
+    entries = ghost.control_entries
+    index = {name: i for i, name in enumerate(ghost.control_names)}
+    return ControlColumns(
+        ghost.control_names,
+        np.array([e.time for e in entries], dtype=np.int32),
+        np.array([index[e.event_name] for e in entries], dtype=np.uint8),
+        np.array([e.enabled for e in entries], dtype=np.uint16),
+        np.array([e.flags for e in entries], dtype=np.uint16)
+    )
+
+
+def control_states(columns, times):
+    """Returns the state of every control of a ghost at the provided times.
+
+    The state of a control at time t is the value set by its last entry at or before t, 0 before
+    its first entry. When entries share a time, the last one wins.
+
+    Args:
+        columns (ControlColumns): the control entries
+        times (numpy.ndarray): the query times in milliseconds
+
+    Returns:
+        a dict of control name to a float64 array of states at the query times
+    """
+    return InputTimeline(columns).states_at(times)
+
+
+class InputTimeline(object):
+    """A precomputed timeline of the control entries of a ghost, answering queries by binary search.
+
+    For every control name, the times of its entries are sorted along with the state after each
+    entry, so the state at any time is found in O(log n) instead of walking the entries from the
+    start. Queries accept a single time or an array of times.
+
+        timeline = InputTimeline(ghost)
+        timeline.state_at('Accelerate', 15230)
+        timeline.state_at('Steer', np.arange(0, 60000, 10))
+        timeline.events_between(15000, 16000).time
+
+    Attributes:
+        columns (ControlColumns): the control entries, in time order
+        names (list): the distinct control names of the ghost
+    """
+
+    def __init__(self, ghost):
+        """Builds the timeline.
+
+        Args:
+            ghost (CGameCtnGhost/ControlColumns): the ghost or its control entries
+        """
+        columns = ghost if isinstance(ghost, ControlColumns) else control_columns(ghost)
+        self.columns = columns.take(np.argsort(columns.time, kind='stable'))
+        self.names = list(dict.fromkeys(columns.names))
+
+        values = self.columns.values()
+        self._times = {}
+        self._states = {}
+        self._time_lists = {}
+        self._state_lists = {}
+        for name in self.names:
+            positions = self.columns.entries_of(name)
+            self._times[name] = self.columns.time[positions]
+            self._states[name] = values[positions]
+            self._time_lists[name] = self._times[name].tolist()
+            self._state_lists[name] = self._states[name].tolist()
+
+    def __len__(self):
+        return len(self.columns)
+
+    def __repr__(self):
+        return f'InputTimeline({len(self)} entries, {self.names})'
+
+    def times_of(self, name):
+        """Returns the sorted times of the entries of a control name, empty if the ghost has no such control."""
+        return self._times.get(name, np.zeros(0, dtype=np.int32))
+
+    def state_at(self, name, time):
+        """Returns the state of a control at a race time.
+
+        The state is the value set by the last entry of the control at or before the time, 0 before
+        its first entry. See ControlColumns.values.
+
+        Args:
+            name (str): the control name
+            time (int/numpy.ndarray): the race time in milliseconds, or an array of times
+
+        Returns:
+            the state as a float for a single time, a float64 array for an array of times
+        """
+        if isinstance(time, (int, float, np.number)):
+            times = self._time_lists.get(name)
+            last = bisect_right(times, time) - 1 if times else -1
+            return self._state_lists[name][last] if last >= 0 else 0.0
+
+        times = np.asarray(time)
+        if name not in self._times:
+            return np.zeros(times.shape)
+
+        last = np.searchsorted(self._times[name], times, side='right') - 1
+        return np.where(last >= 0, self._states[name][np.maximum(last, 0)], 0.0)
+
+    def states_at(self, time):
+        """Returns the state of every control at a race time or an array of times.
+
+        Returns:
+            a dict of control name to state, see state_at
+        """
+        return {name: self.state_at(name, time) for name in self.names}
+
+    def events_between(self, start, end, name=None):
+        """Returns the entries in the time window [start, end).
+
+        Args:
+            start (int): the start of the window in milliseconds, inclusive
+            end (int): the end of the window in milliseconds, exclusive
+            name (str): only return the entries of this control name, None returns all entries
+
+        Returns:
+            the ControlColumns of the entries, in time order
+        """
+        time = self.columns.time
+        first, last = np.searchsorted(time, [start, end], side='left')
+        positions = np.arange(first, last)
+        if name is not None:
+            indices = [i for i, n in enumerate(self.columns.names) if n == name]
+            positions = positions[np.isin(self.columns.name_index[positions], indices)]
+        return self.columns.take(positions)
+
+    def count_between(self, start, end, name=None):
+        """Returns the number of entries in time windows, see events_between.
+
+        Args:
+            start (int/numpy.ndarray): the start of the window, or an array of window starts
+            end (int/numpy.ndarray): the end of the window, or an array of window ends
+            name (str): only count the entries of this control name, None counts all entries
+
+        Returns:
+            the number of entries as an int for a single window, an int64 array for arrays of windows
+        """
+        time = self.columns.time if name is None else self.times_of(name)
+        counts = np.searchsorted(time, end, side='left') - np.searchsorted(time, start, side='left')
+        return int(counts) if np.ndim(counts) == 0 else counts.astype(np.int64)
+
+
+def input_matrix(ghost, tick=10, duration=None, channels=CHANNELS):
+    """Builds a dense matrix of the input state of a ghost at every tick.
+
+    Args:
+        ghost (CGameCtnGhost/ControlColumns): the ghost or its control entries
+        tick (int): the time between rows in milliseconds, the physics of the game run at 10 ms
+        duration (int): the time covered by the matrix in milliseconds, None uses the time
+            of the last entry
+        channels (tuple): the columns of the matrix: the derived channels 'steer' (-1 to 1),
+            'gas' and 'brake' (0 to 1) and any control name, e.g 'Respawn' or 'Horn'
+
+    Returns:
+        a tuple of (matrix, times): a float32 array of shape (ticks, channels) and the int32 time of every row
+    """
+    columns = ghost if isinstance(ghost, ControlColumns) else control_columns(ghost)
+    if duration is None:
+        duration = int(columns.time.max()) if len(columns) else 0
+
+    times = np.arange(0, duration + 1, tick, dtype=np.int32)
+    states = control_states(columns, times)
+    zeros = np.zeros(len(times))
+
+    def state(name):
+        return states.get(name, zeros)
+
+    matrix = np.zeros((len(times), len(channels)), dtype=np.float32)
+    for i, channel in enumerate(channels):
+        derive = DERIVED_CHANNELS.get(channel)
+        matrix[:, i] = derive(state) if derive is not None else state(channel)
+
+    return matrix, times
@@ -0,0 +1,132 @@
+class ChunkStats(object):
+    """Accumulated statistics of a single chunk ID."""
+
+    def __init__(self, chunk_id):
+        self.chunk_id = chunk_id
+        self.count = 0
+        self.bytes_read = 0
+        self.bytes_skipped = 0
+        self.time = 0.0
+        self.min_depth = None
+        self.max_depth = None
+
+    def add(self, num_bytes, skipped, elapsed, depth):
+        self.count += 1
+        self.bytes_read += num_bytes
+        self.bytes_skipped += skipped
+        self.time += elapsed
+        if self.min_depth is None or depth < self.min_depth:
+            self.min_depth = depth
+        if self.max_depth is None or depth > self.max_depth:
+            self.max_depth = depth
+
+    def merge(self, other):
+        self.count += other.count
+        self.bytes_read += other.bytes_read
+        self.bytes_skipped += other.bytes_skipped
+        self.time += other.time
+        for depth in (other.min_depth, other.max_depth):
+            if depth is not None:
+                self.min_depth = depth if self.min_depth is None else min(self.min_depth, depth)
+                self.max_depth = depth if self.max_depth is None else max(self.max_depth, depth)
+
+
+class ParseProfiler(object):
+    """The ParseProfiler class collects timing and size statistics while Gbx files are parsed.
+
+    A profiler is passed to the Gbx class through its profiler argument. The Gbx class then
+    calls chunk for every chunk it reads and phase for every stage of parsing:
+
+        - 'header': reading the header, user data and reference table
+        - 'read': reading the compressed body from the input
+        - 'decompress': decompressing the body
+        - 'parse': reading the chunks of the body
+        - 'ghost_decompress': decompressing ghost sample data
+
+    Chunk statistics are inclusive: the time and bytes of a chunk include any nested nodes read
+    as part of it. The map embedded in a Replay is profiled as a separate file: its chunks and
+    phases are recorded on their own, and its time is left out of the 'parse' phase of the
+    Replay. The same profiler can be used for many files, and profilers filled in different
+    processes can be combined with merge. To collect other statistics, pass any object
+    implementing the chunk and phase methods, e.g a subclass of ParseProfiler.
+
+    When no profiler is passed to Gbx, the only overhead is a single check per chunk.
+
+        profiler = ParseProfiler()
+        for path in paths:
+            Gbx(path, profiler=profiler)
+        print(profiler.summary())
+    """
+
+    def __init__(self):
+        self.chunks = {}
+        self.phases = {}
+        self.files = 0
+
+    def chunk(self, chunk_id, depth, num_bytes, skipped, elapsed):
+        """Records a chunk that has been read.
+
+        Args:
+            chunk_id (int): the chunk ID
+            depth (int): the nesting depth of the node the chunk belongs to, 0 for the main node
+            num_bytes (int): the number of bytes consumed by the chunk, including skipped bytes
+            skipped (int): the number of bytes skipped without being decoded
+            elapsed (float): the time spent reading the chunk, in seconds
+        """
+        stats = self.chunks.get(chunk_id)
+        if stats is None:
+            stats = self.chunks[chunk_id] = ChunkStats(chunk_id)
+        stats.add(num_bytes, skipped, elapsed, depth)
+
+    def phase(self, name, elapsed, num_bytes=0):
+        """Records a stage of parsing.
+
+        Args:
+            name (str): the name of the stage, see the class description
+            elapsed (float): the time spent, in seconds
+            num_bytes (int): the number of bytes processed
+        """
+        if name == 'header':
+            self.files += 1
+
+        total = self.phases.get(name, (0, 0.0, 0))
+        self.phases[name] = (total[0] + 1, total[1] + elapsed, total[2] + num_bytes)
+
+    def merge(self, other):
+        """Adds the statistics collected by another profiler to this one.
+
+        Args:
+            other (ParseProfiler): the other profiler
+        """
+        self.files += other.files
+        for chunk_id, stats in other.chunks.items():
+            if chunk_id not in self.chunks:
+                self.chunks[chunk_id] = ChunkStats(chunk_id)
+            self.chunks[chunk_id].merge(stats)
+
+        for name, (count, elapsed, num_bytes) in other.phases.items():
+            total = self.phases.get(name, (0, 0.0, 0))
+            self.phases[name] = (total[0] + count, total[1] + elapsed, total[2] + num_bytes)
+
+    def summary(self, limit=20):
+        """Formats the collected statistics as a table.
+
+        Args:
+            limit (int): the maximum number of chunks listed, sorted by decreasing time
+
+        Returns:
+            the formatted statistics
+        """
+        lines = [f'{self.files} files']
+        lines.append(f'{"phase":18} {"count":>8} {"time (s)":>10} {"MB":>10}')
+        for name, (count, elapsed, num_bytes) in self.phases.items():
+            lines.append(f'{name:18} {count:8} {elapsed:10.4f} {num_bytes / 1e6:10.2f}')
+
+        lines.append('')
+        lines.append(f'{"chunk":12} {"count":>8} {"time (s)":>10} {"read KB":>10} {"skipped KB":>10} {"depth":>7}')
+        chunks = sorted(self.chunks.values(), key=lambda s: s.time, reverse=True)
+        for s in chunks[:limit]:
+            lines.append(f'{s.chunk_id:#010x}   {s.count:8} {s.time:10.4f} {s.bytes_read / 1e3:10.1f} '
+                         f'{s.bytes_skipped / 1e3:10.1f} {s.min_depth:>3}-{s.max_depth:<3}')
+
+        return '\n'.join(lines)
@@ -0,0 +1,221 @@
+import heapq
+
+from pygbx.batch import parse_files
+from pygbx.gbx import GbxType
+
+# Race times of unfinished runs
+_INVALID_TIME = 0xFFFFFFFF
+
+# Files are first parsed without their body, files without the race time in their header are then
+# parsed without the samples and inputs of ghosts
+HEADER_OPTIONS = {'header_only': True}
+BODY_OPTIONS = {'read_samples': False, 'read_inputs': False}
+
+
+def _replay_record(g):
+    records = g.get_classes_by_ids([GbxType.REPLAY_RECORD, GbxType.REPLAY_RECORD_OLD])
+    return records[0] if records else None
+
+
+def _header_entries(g):
+    record = _replay_record(g)
+    if record is None or record.race_time is None or record.map_uid is None:
+        return None
+    return [(record.map_uid, record.race_time, record.driver_login, record.nickname)]
+
+
+def _ghost_entries(g):
+    record = _replay_record(g)
+    driver_login = record.driver_login if record else None
+    nickname = record.nickname if record else None
+    return [(ghost.uid, ghost.race_time, ghost.login or driver_login, nickname)
+            for ghost in g.get_classes_by_ids([GbxType.CTN_GHOST, GbxType.CTN_GHOST_OLD])]
+
+
+class _HeapItem(object):
+    # Orders entries from the worst to the best, so the root of a heap is the entry to evict
+    def __init__(self, entry):
+        self.entry = entry
+        self.key = (entry[0], entry[1] or '', entry[2] or '', entry[3] or '')
+
+    def __lt__(self, other):
+        return self.key > other.key
+
+
+class Leaderboard(object):
+    """Keeps the best race times of every map, with a bounded heap per map UID.
+
+    Entries are (race_time, login, nickname, path) tuples. Entries are ranked by race time, ties
+    being ranked by login, nickname and path, so the result does not depend on the order in which
+    replays are added. Only k entries are kept per map, so the memory used is proportional to the
+    number of maps times k regardless of the number of replays.
+
+    Leaderboards filled in separate processes, e.g from parts of a replay corpus, can be combined
+    with merge:
+
+        leaderboard = Leaderboard(k=10)
+        leaderboard.add_files(paths, workers=8)
+        for rank, (race_time, login, nickname, path) in enumerate(leaderboard.top(uid), 1):
+            print(rank, race_time, login)
+    """
+
+    def __init__(self, k=10, unique_logins=True):
+        """Creates an empty leaderboard.
+
+        Args:
+            k (int): the number of entries kept per map
+            unique_logins (bool): whether to keep only the best entry of every login on a map,
+                entries without a login are always kept
+        """
+        if k < 1:
+            raise ValueError('k must be at least 1')
+
+        self.k = k
+        self.unique_logins = unique_logins
+        self._heaps = {}
+        self._logins = {}
+
+    def __len__(self):
+        return sum(len(heap) for heap in self._heaps.values())
+
+    def __contains__(self, uid):
+        return uid in self._heaps
+
+    def __repr__(self):
+        return f'Leaderboard(k={self.k}, {len(self._heaps)} maps, {len(self)} entries)'
+
+    def uids(self):
+        """Returns the UIDs of the maps with at least one entry."""
+        return list(self._heaps)
+
+    def add(self, uid, race_time, login=None, nickname=None, path=None):
+        """Adds a race time, which is kept if it ranks among the k best of the map.
+
+        Race times that are None or 0xFFFFFFFF, as stored for unfinished runs, are ignored.
+
+        Args:
+            uid (str): the map UID
+            race_time (int): the race time in milliseconds
+            login (str): the login of the driver
+            nickname (str): the nickname of the driver
+            path (str): the path of the replay
+
+        Returns:
+            True if the entry was kept
+        """
+        if race_time is None or race_time == _INVALID_TIME:
+            return False
+
+        item = _HeapItem((race_time, login, nickname, path))
+        heap = self._heaps.get(uid)
+        if heap is None:
+            heap = self._heaps[uid] = []
+            self._logins[uid] = {}
+
+        logins = self._logins[uid]
+        if self.unique_logins and login is not None:
+            current = logins.get(login)
+            if current is not None:
+                if not current < item:
+                    return False
+                # The previous entry of the login is replaced, heaps hold at most k entries
+                heap.remove(current)
+                heapq.heapify(heap)
+
+        if len(heap) < self.k:
+            heapq.heappush(heap, item)
+        elif heap[0] < item:
+            evicted = heapq.heapreplace(heap, item)
+            if self.unique_logins and logins.get(evicted.entry[1]) is evicted:
+                del logins[evicted.entry[1]]
+        else:
+            return False
+
+        if self.unique_logins and login is not None:
+            logins[login] = item
+        return True
+
+    def add_gbx(self, g, path=None):
+        """Adds the race times of a parsed Gbx file.
+
+        The race time of the replay header is used if available, the ghosts of the file otherwise.
+
+        Args:
+            g (Gbx): the parsed file, possibly parsed with header_only=True
+            path (str): the path of the file
+
+        Returns:
+            the number of kept entries
+        """
+        entries = _header_entries(g)
+        if entries is None:
+            entries = _ghost_entries(g)
+        return sum(self.add(*entry, path=path) for entry in entries)
+
+    def add_files(self, paths, workers=None, chunksize=64):
+        """Parses replays with a pool of worker processes and adds their race times.
+
+        Files are parsed with header_only=True, which reads the map UID, race time, login and
+        nickname of a replay without decompressing its body. Only files without this data in their
+        header, e.g ghost files or old replays, are then parsed completely, without the samples and
+        inputs of their ghosts. Files that fail to parse are logged and skipped.
+
+        Args:
+            paths (list): the file paths
+            workers (int): the number of worker processes, see pygbx.batch.parse_files
+            chunksize (int): the number of files sent to a worker process at once
+
+        Returns:
+            the number of parsed files
+        """
+        parsed = 0
+        remaining = []
+        for path, entries, error in parse_files(paths, _header_entries, workers=workers, chunksize=chunksize,
+                                                options=HEADER_OPTIONS):
+            if error is not None:
+                continue
+            if entries is None:
+                remaining.append(path)
+                continue
+
+            for entry in entries:
+                self.add(*entry, path=path)
+            parsed += 1
+
+        for path, entries, error in parse_files(remaining, _ghost_entries, workers=workers, chunksize=chunksize,
+                                                options=BODY_OPTIONS):
+            if error is None:
+                for entry in entries:
+                    self.add(*entry, path=path)
+                parsed += 1
+
+        return parsed
+
+    def merge(self, other):
+        """Adds the entries of another Leaderboard, keeping the k best entries of every map.
+
+        Args:
+            other (Leaderboard): the leaderboard to merge into this one
+        """
+        for uid, heap in other._heaps.items():
+            for item in heap:
+                self.add(uid, *item.entry)
+
+    def top(self, uid):
+        """Returns the entries of a map, from the best.
+
+        Args:
+            uid (str): the map UID
+
+        Returns:
+            a list of up to k (race_time, login, nickname, path) tuples, empty if the map has no entries
+        """
+        return [item.entry for item in sorted(self._heaps.get(uid, []), reverse=True)]
+
+    def results(self):
+        """Returns the entries of every map, see top.
+
+        Returns:
+            a dict of map UID to the list of entries
+        """
+        return {uid: self.top(uid) for uid in self._heaps}
@@ -0,0 +1,115 @@
+import sys
+
+import pygbx.headers as headers
+
+COMPONENTS = ('raw_buffers', 'blocks', 'items', 'ghost_samples', 'control_entries', 'strings', 'other', 'track')
+
+
+class _Sizer(object):
+    """Estimates the memory retained by parsed header objects.
+
+    Strings and raw buffers are not counted, as they are shared between objects or
+    accounted for in their own components. The size of the attribute dictionary of each
+    class is measured once on its first instance, so that measuring does not force
+    Python to create a dictionary for every object.
+    """
+
+    def __init__(self):
+        self.attributes = {}
+
+    def size(self, obj):
+        if obj is None or isinstance(obj, (bool, str, bytes, bytearray, memoryview)):
+            return 0
+        if isinstance(obj, int):
+            return 0 if -5 <= obj <= 256 else sys.getsizeof(obj)
+        if isinstance(obj, float):
+            return sys.getsizeof(obj)
+        if isinstance(obj, (list, tuple)):
+            return sys.getsizeof(obj) + sum(self.size(v) for v in obj)
+        if isinstance(obj, dict):
+            return sys.getsizeof(obj) + sum(self.size(v) for v in obj.values())
+        if not hasattr(obj, '__dict__'):
+            return sys.getsizeof(obj)
+
+        cls = type(obj)
+        if cls not in self.attributes:
+            self.attributes[cls] = (list(obj.__dict__), sys.getsizeof(obj.__dict__))
+
+        names, dict_size = self.attributes[cls]
+        return sys.getsizeof(obj) + dict_size + sum(self.size(getattr(obj, name, None)) for name in names)
+
+
+def _buffer_size(buf):
+    if isinstance(buf, memoryview):
+        return buf.nbytes
+    if isinstance(buf, (bytes, bytearray)):
+        return len(buf)
+    return 0
+
+
+def memory_report(g):
+    """Estimates the memory retained by a parsed Gbx file, broken down by component.
+
+    The components are:
+        - raw_buffers: the input data, the decompressed body and raw ghost sample data
+        - blocks: the list of MapBlock objects, the blocks and their positions
+        - items: the list of CGameBlockItem objects, the items and their positions and waypoints
+        - ghost_samples: the lists of GhostSampleRecord objects, the records and their positions
+        - control_entries: the lists of ControlEntry objects, the entries and the raw control data
+        - strings: the strings read by the ByteReader instances, including lookback strings
+        - other: the remaining parsed classes, without their blocks, items, samples and entries
+        - track: the total of the report of the track embedded in a Replay
+
+    Memoryviews are counted with the size of the data they expose, so buffers shared
+    through slices may be counted more than once.
+
+    Args:
+        g (Gbx): the parsed Gbx file
+
+    Returns:
+        a dict of component name to the number of bytes, with the sum of all components under 'total'
+    """
+    sizer = _Sizer()
+    report = dict.fromkeys(COMPONENTS, 0)
+
+    report['raw_buffers'] += _buffer_size(g.data)
+    if g.root_parser.data is not g.data:
+        report['raw_buffers'] += _buffer_size(g.root_parser.data)
+
+    strings = set()
+    for s in g.root_parser.stored_strings + g.body_strings:
+        if s is not None and id(s) not in strings:
+            strings.add(id(s))
+            report['strings'] += sys.getsizeof(s)
+
+    for game_class in list(g.classes.values()) + list(g.root_classes.values()):
+        excluded = set()
+        if isinstance(game_class, headers.CGameChallenge):
+            report['blocks'] += sizer.size(game_class.blocks)
+            report['items'] += sizer.size(game_class.items)
+            excluded.update(('blocks', 'items'))
+
+        if isinstance(game_class, headers.CGameGhost):
+            report['raw_buffers'] += _buffer_size(game_class.sample_data)
+            for record in game_class.records:
+                report['raw_buffers'] += _buffer_size(getattr(record, 'raw_data', None))
+            report['ghost_samples'] += sizer.size(game_class.records)
+            excluded.add('records')
+
+        if isinstance(game_class, headers.CGameCtnGhost):
+            report['control_entries'] += sizer.size(game_class.control_entries)
+            report['control_entries'] += _buffer_size(game_class.control_data)
+            excluded.update(('control_entries', 'control_data'))
+
+        track = getattr(game_class, 'track', None)
+        if track is not None and hasattr(track, 'memory_report'):
+            report['track'] += track.memory_report()['total']
+            excluded.add('track')
+
+        report['other'] += sys.getsizeof(game_class) + sys.getsizeof(game_class.__dict__)
+        for name, value in game_class.__dict__.items():
+            if name not in excluded:
+                report['other'] += sizer.size(value)
+
+    report['total'] = sum(report[name] for name in COMPONENTS)
+    return report
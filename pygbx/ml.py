@@ -0,0 +1,362 @@
+import os
+from functools import partial
+from itertools import repeat
+from operator import attrgetter
+
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError('pygbx.ml requires numpy, install it with: pip install pygbx[ml]')
+
+from pygbx.batch import parse_files
+from pygbx.blocks import BLOCK_OFFSETS, BLOCK_TABLES
+from pygbx.gbx import GbxType
+
+UNKNOWN_ID = 0
+
+# The columns of the arrays returned by block_array
+BLOCK_FIELDS = ('block_id', 'x', 'y', 'z', 'rotation')
+
+_block_fields = attrgetter('position.x', 'position.y', 'position.z', 'rotation')
+
+_vocabularies = {}
+
+
+def get_vocabulary(environment):
+    """Returns the block vocabulary of an environment, creating it on first use.
+
+    Vocabularies are cached per process, so every environment is built only once.
+
+    Args:
+        environment (str): the environment name, e.g 'Stadium'
+
+    Returns:
+        the BlockVocabulary of the environment
+
+    Raises:
+        KeyError: if the environment has no block table
+    """
+    vocabulary = _vocabularies.get(environment)
+    if vocabulary is None:
+        vocabulary = _vocabularies[environment] = BlockVocabulary(environment)
+    return vocabulary
+
+
+class BlockVocabulary(object):
+    """Maps the block names of an environment to block IDs and back, for whole arrays at once.
+
+    The IDs are the ones of the environment block table (see pygbx.blocks.BLOCK_TABLES), block IDs
+    start at 1 and names missing from the table are encoded as UNKNOWN_ID (0). The vocabulary
+    can be used as the input and output layer of a model, with num_ids classes.
+
+    Use get_vocabulary to share a single instance per process. Pickling a vocabulary only stores
+    its environment name, so sending it to worker processes is cheap and every worker uses its
+    own cached instance.
+
+        vocabulary = get_vocabulary('Stadium')
+        ids = vocabulary.encode_blocks(challenge.blocks)
+        names = vocabulary.decode(predicted_ids)
+    """
+
+    def __init__(self, environment):
+        table = BLOCK_TABLES[environment]
+        self.environment = environment
+        self.index = dict(zip(table.names, (int(block_id) for block_id in table.ids)))
+        self.num_ids = max(self.index.values(), default=0) + 1
+
+        self.names = np.empty(self.num_ids, dtype=object)
+        for name, block_id in self.index.items():
+            self.names[block_id] = name
+
+        self._unit_arrays = None
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def __reduce__(self):
+        return get_vocabulary, (self.environment,)
+
+    def __repr__(self):
+        return f'BlockVocabulary({self.environment!r}, {len(self)} names)'
+
+    def encode(self, names, dtype=np.int32):
+        """Encodes block names to block IDs.
+
+        Args:
+            names (iterable): the block names
+            dtype (numpy.dtype): the type of the returned array
+
+        Returns:
+            a numpy array of block IDs, UNKNOWN_ID for names missing from the vocabulary
+        """
+        ids = map(self.index.get, names, repeat(UNKNOWN_ID))
+        count = len(names) if hasattr(names, '__len__') else -1
+        return np.fromiter(ids, dtype=dtype, count=count)
+
+    def encode_blocks(self, blocks, dtype=np.int32):
+        """Encodes the names of a list of MapBlock objects to block IDs.
+
+        Args:
+            blocks (list): the MapBlock objects, e.g CGameChallenge.blocks
+            dtype (numpy.dtype): the type of the returned array
+
+        Returns:
+            a numpy array of block IDs, UNKNOWN_ID for names missing from the vocabulary
+        """
+        return self.encode(list(map(attrgetter('name'), blocks)), dtype)
+
+    def decode(self, ids):
+        """Decodes block IDs to block names.
+
+        Args:
+            ids (array-like): the block IDs, of any shape
+
+        Returns:
+            a numpy object array of the same shape containing block names, a 0-d array for a
+            single ID, None for UNKNOWN_ID and IDs missing from the vocabulary
+        """
+        shape = np.shape(ids)
+        ids = np.atleast_1d(ids)
+        valid = (ids >= 0) & (ids < self.num_ids)
+        names = self.names[np.where(valid, ids, UNKNOWN_ID)]
+        names[~valid] = None
+        return names.reshape(shape)
+
+    def unit_arrays(self):
+        """Returns the unit offsets of all blocks of the vocabulary as arrays indexed by block ID.
+
+        The offsets come from the environment offset table (see pygbx.blocks.BLOCK_OFFSETS). Blocks
+        without offsets, including UNKNOWN_ID, occupy a single unit at offset (0, 0, 0).
+
+        Returns:
+            a tuple of (units, starts, counts, max_x, max_z): units is an array of (x, y, z) offsets,
+            the offsets of the block with ID i are units[starts[i]:starts[i] + counts[i]] and
+            max_x[i], max_z[i] are the largest x and z offsets of the block
+        """
+        if self._unit_arrays is not None:
+            return self._unit_arrays
+
+        offsets = BLOCK_OFFSETS.get(self.environment)
+        units = np.zeros((1, 3), dtype=np.int32)
+        starts = np.zeros(self.num_ids, dtype=np.int64)
+        counts = np.ones(self.num_ids, dtype=np.int64)
+        max_x = np.zeros(self.num_ids, dtype=np.int32)
+        max_z = np.zeros(self.num_ids, dtype=np.int32)
+
+        if offsets is not None:
+            # The units of the offset table follow the single default unit at index 0
+            units = np.concatenate([units, np.frombuffer(offsets.units, dtype=np.uint8).reshape(-1, 3)])
+            for name, block_id in self.index.items():
+                if name not in offsets:
+                    continue
+                start, end = offsets.span(name)
+                if end > start:
+                    starts[block_id] = start + 1
+                    counts[block_id] = end - start
+                    max_x[block_id] = units[start + 1:end + 1, 0].max()
+                    max_z[block_id] = units[start + 1:end + 1, 2].max()
+
+        self._unit_arrays = (units, starts, counts, max_x, max_z)
+        return self._unit_arrays
+
+
+def block_array(challenge, vocabulary=None):
+    """Converts the blocks of a challenge to an array of (block_id, x, y, z, rotation) rows.
+
+    Args:
+        challenge (CGameChallenge): the challenge
+        vocabulary (BlockVocabulary): the vocabulary used to encode block names,
+            None uses the vocabulary of the challenge environment
+
+    Returns:
+        a numpy int32 array of shape (number of blocks, 5), see BLOCK_FIELDS
+    """
+    if vocabulary is None:
+        vocabulary = get_vocabulary(challenge.environment)
+
+    blocks = challenge.blocks
+    out = np.empty((len(blocks), len(BLOCK_FIELDS)), dtype=np.int32)
+    out[:, 0] = vocabulary.encode_blocks(blocks)
+    if blocks:
+        out[:, 1:] = list(map(_block_fields, blocks))
+    return out
+
+
+def pad_sequences(arrays, max_blocks=None):
+    """Pads block arrays of different lengths into a single batch.
+
+    Args:
+        arrays (list): the arrays returned by block_array
+        max_blocks (int): the length of the padded sequences, longer sequences are truncated.
+            None uses the length of the longest sequence
+
+    Returns:
+        a dict with the 'blocks' int32 array of shape (batch, max_blocks, 5), padded with zeros,
+        the 'mask' bool array of shape (batch, max_blocks) that is True for real blocks, and
+        the 'lengths' int32 array of the number of real blocks of every sequence
+    """
+    if max_blocks is None:
+        max_blocks = max((len(a) for a in arrays), default=0)
+
+    lengths = np.array([min(len(a), max_blocks) for a in arrays], dtype=np.int32)
+    blocks = np.zeros((len(arrays), max_blocks, len(BLOCK_FIELDS)), dtype=np.int32)
+    for i, a in enumerate(arrays):
+        blocks[i, :lengths[i]] = a[:lengths[i]]
+
+    mask = np.arange(max_blocks) < lengths[:, None]
+    return {'blocks': blocks, 'mask': mask, 'lengths': lengths}
+
+
+def encode_sequences(challenges, max_blocks=None, vocabulary=None):
+    """Converts a batch of challenges to padded block sequences.
+
+    Args:
+        challenges (list): the CGameChallenge instances
+        max_blocks (int): the length of the padded sequences, see pad_sequences
+        vocabulary (BlockVocabulary): see block_array
+
+    Returns:
+        the padded batch, see pad_sequences
+    """
+    return pad_sequences([block_array(c, vocabulary) for c in challenges], max_blocks)
+
+
+def block_voxels(blocks, vocabulary):
+    """Expands block arrays to the units they occupy in the map grid.
+
+    Each block is expanded to the unit offsets of its block ID, rotated by the block rotation in
+    steps of 90 degrees around the Y axis so that the rotated block stays at its position:
+
+        - rotation 0: (x, z)
+        - rotation 1: (max_z - z, x)
+        - rotation 2: (max_x - x, max_z - z)
+        - rotation 3: (z, max_x - x)
+
+    Args:
+        blocks (numpy.ndarray): an array returned by block_array
+        vocabulary (BlockVocabulary): the vocabulary the block IDs belong to
+
+    Returns:
+        a tuple of (coords, values, block_index): the int32 (x, y, z) coordinates of the units
+        with shape (number of units, 3), the block ID of every unit and the row of the block
+        in the blocks array every unit belongs to
+    """
+    units, starts, counts, max_x, max_z = vocabulary.unit_arrays()
+    ids = blocks[:, 0]
+    block_counts = counts[ids]
+    block_index = np.repeat(np.arange(len(blocks)), block_counts)
+
+    # The index of every unit in the units array: the start of its block plus its position in the block
+    first = np.cumsum(block_counts) - block_counts
+    unit_index = np.arange(block_counts.sum()) - np.repeat(first - starts[ids], block_counts)
+    ux, uy, uz = units[unit_index].T.astype(np.int32)
+
+    rotation = blocks[block_index, 4] % 4
+    mx = max_x[ids][block_index]
+    mz = max_z[ids][block_index]
+    x = np.choose(rotation, [ux, mz - uz, mx - ux, uz])
+    z = np.choose(rotation, [uz, ux, mz - uz, mx - ux])
+
+    coords = blocks[block_index, 1:4] + np.stack([x, uy, z], axis=1)
+    return coords.astype(np.int32), ids[block_index], block_index
+
+
+def pad_voxels(voxels):
+    """Combines the voxels of many maps into a single sparse batch.
+
+    Args:
+        voxels (list): (coords, values) tuples, e.g returned by block_voxels
+
+    Returns:
+        a dict with the 'coords' int32 array of (sample, x, y, z) rows and the 'values' int32 array
+        of block IDs, the coordinates and values of a sparse (batch, X, Y, Z) tensor
+    """
+    coords = [np.column_stack([np.full(len(c), i, dtype=np.int32), c]) for i, (c, _) in enumerate(voxels)]
+    return {
+        'coords': np.concatenate(coords) if coords else np.zeros((0, 4), dtype=np.int32),
+        'values': np.concatenate([v for _, v in voxels]).astype(np.int32) if voxels else np.zeros(0, dtype=np.int32)
+    }
+
+
+def encode_voxels(challenges, vocabulary=None):
+    """Converts a batch of challenges to a sparse voxel tensor of block IDs.
+
+    Args:
+        challenges (list): the CGameChallenge instances
+        vocabulary (BlockVocabulary): see block_array
+
+    Returns:
+        the sparse batch, see pad_voxels
+    """
+    voxels = []
+    for challenge in challenges:
+        vocab = vocabulary or get_vocabulary(challenge.environment)
+        coords, values, _ = block_voxels(block_array(challenge, vocab), vocab)
+        voxels.append((coords, values))
+
+    return pad_voxels(voxels)
+
+
+def _encode_gbx(g, form):
+    challenge = g.get_class_by_id(GbxType.CHALLENGE) or g.get_class_by_id(GbxType.CHALLENGE_OLD)
+    if challenge is None:
+        raise ValueError('the file does not contain a challenge')
+
+    vocabulary = get_vocabulary(challenge.environment)
+    blocks = block_array(challenge, vocabulary)
+    if form == 'voxels':
+        coords, values, _ = block_voxels(blocks, vocabulary)
+        return coords, values
+    return blocks
+
+
+def write_shards(paths, output, form='sequence', shard_size=1024, max_blocks=None, workers=None, chunksize=8):
+    """Parses challenges with a pool of worker processes and writes the encoded maps to .npz shards.
+
+    Every shard holds the encoded maps of up to shard_size files, in the order of the provided paths,
+    as returned by pad_sequences or pad_voxels, together with a 'paths' array of the encoded files.
+    Files that fail to parse or do not contain a challenge are logged and skipped.
+
+    Args:
+        paths (list): the challenge file paths
+        output (str): the output directory, created if missing
+        form (str): 'sequence' to write padded block sequences, 'voxels' to write sparse voxel tensors
+        shard_size (int): the maximum number of maps per shard
+        max_blocks (int): the length of the padded sequences, see pad_sequences
+        workers (int): the number of worker processes, see pygbx.batch.parse_files
+        chunksize (int): the number of files sent to a worker process at once
+
+    Returns:
+        a list of the written shard paths
+    """
+    if form not in ('sequence', 'voxels'):
+        raise ValueError(f"unknown form {form}, expected 'sequence' or 'voxels'")
+
+    os.makedirs(output, exist_ok=True)
+    shards = []
+    batch, batch_paths = [], []
+
+    def flush():
+        arrays = pad_voxels(batch) if form == 'voxels' else pad_sequences(batch, max_blocks)
+        shard = os.path.join(output, f'shard-{len(shards):05d}.npz')
+        np.savez(shard, paths=np.array(batch_paths), **arrays)
+        shards.append(shard)
+        batch.clear()
+        batch_paths.clear()
+
+    func = partial(_encode_gbx, form=form)
+    for path, result, error in parse_files(paths, func, workers=workers, chunksize=chunksize):
+        if error is not None:
+            continue
+        batch.append(result)
+        batch_paths.append(path)
+        if len(batch) >= shard_size:
+            flush()
+
+    if batch:
+        flush()
+
+    return shards
@@ -0,0 +1,316 @@
+import argparse
+import logging
+import mmap
+import os
+import struct
+
+from pygbx.batch import find_gbx_files, pool_map
+from pygbx.gbx import Gbx
+
+MAGIC = b'GBXPACK1'
+
+_FOOTER = struct.Struct('<QI8s')
+_ENTRY = struct.Struct('<QQHH')
+
+
+class PackEntry(object):
+    """Describes a single Gbx file stored in a pack."""
+
+    def __init__(self, offset, size, uid, name):
+        self.offset = offset
+        self.size = size
+        self.uid = uid
+        self.name = name
+
+    def __repr__(self):
+        return f'PackEntry(offset={self.offset}, size={self.size}, uid={self.uid!r}, name={self.name!r})'
+
+
+def header_uid(data):
+    """Reads the UID of the map a Gbx file refers to from its header, without decompressing its body.
+
+    Args:
+        data (bytes): the Gbx data
+
+    Returns:
+        the map UID, or an empty string if the header does not contain it
+    """
+    try:
+        g = Gbx(data, header_only=True)
+    except Exception as e:
+        logging.error(f'Failed to read header: {e}')
+        return ''
+
+    for game_class in g.root_classes.values():
+        uid = getattr(game_class, 'map_uid', None)
+        if uid:
+            return uid
+
+    return ''
+
+
+class PackWriter(object):
+    """The PackWriter class concatenates many Gbx files into a single pack file.
+
+    The pack file starts with a magic string, followed by the raw contents of every added file.
+    After the files, an index of (offset, size, uid, name) entries is written, followed by a footer
+    containing the offset of the index, the number of entries and the magic string again.
+    The index is written when the writer is closed.
+
+        with PackWriter('maps.pack') as pack:
+            for path in paths:
+                pack.add_file(path)
+    """
+
+    def __init__(self, path):
+        """Creates a new pack file, overwriting any existing file.
+
+        Args:
+            path (str): the path of the pack file
+        """
+        self.f = open(path, 'wb')
+        self.f.write(MAGIC)
+        self.entries = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def add(self, data, name='', uid=None):
+        """Appends Gbx data to the pack.
+
+        Args:
+            data (bytes): the raw Gbx file contents
+            name (str): the name of the entry, e.g the original file name
+            uid (str): the map UID stored in the index, read from the Gbx header if None
+
+        Returns:
+            the PackEntry describing the added data
+        """
+        if uid is None:
+            uid = header_uid(data)
+
+        entry = PackEntry(self.f.tell(), len(data), uid, name)
+        self.f.write(data)
+        self.entries.append(entry)
+        return entry
+
+    def add_file(self, path, name=None, uid=None):
+        """Appends a Gbx file to the pack, see add.
+
+        Args:
+            path (str): the path of the Gbx file
+            name (str): the name of the entry, the file name if None
+            uid (str): the map UID stored in the index, read from the Gbx header if None
+
+        Returns:
+            the PackEntry describing the added file
+        """
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        return self.add(data, os.path.basename(path) if name is None else name, uid)
+
+    def close(self):
+        """Writes the index and the footer and closes the pack file."""
+        if self.f.closed:
+            return
+
+        index_offset = self.f.tell()
+        for entry in self.entries:
+            uid = entry.uid.encode('utf-8')
+            name = entry.name.encode('utf-8')
+            self.f.write(_ENTRY.pack(entry.offset, entry.size, len(uid), len(name)))
+            self.f.write(uid)
+            self.f.write(name)
+
+        self.f.write(_FOOTER.pack(index_offset, len(self.entries), MAGIC))
+        self.f.close()
+
+
+class PackReader(object):
+    """The PackReader class reads Gbx files stored in a pack created by PackWriter.
+
+    The pack is memory mapped, entries are returned as memoryview slices of the mapping,
+    which are passed to Gbx without copying the file contents.
+
+    Memoryviews returned by the reader keep the mapping alive until they are released.
+
+        with PackReader('maps.pack') as pack:
+            for entry, data in pack:
+                g = Gbx(data)
+    """
+
+    def __init__(self, path):
+        """Opens and maps a pack file and reads its index.
+
+        Args:
+            path (str): the path of the pack file
+
+        Raises:
+            ValueError: raised when the file is not a pack file
+        """
+        self.path = path
+        with open(path, 'rb') as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.view = memoryview(self.mmap)
+        if len(self.mmap) < len(MAGIC) + _FOOTER.size or self.view[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f'{path} is not a Gbx pack file')
+
+        index_offset, count, magic = _FOOTER.unpack_from(self.mmap, len(self.mmap) - _FOOTER.size)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f'{path} is not a complete Gbx pack file')
+
+        self.entries = []
+        self.uids = {}
+        pos = index_offset
+        for i in range(count):
+            offset, size, uid_len, name_len = _ENTRY.unpack_from(self.mmap, pos)
+            pos += _ENTRY.size
+            uid = self.mmap[pos:pos + uid_len].decode('utf-8')
+            pos += uid_len
+            name = self.mmap[pos:pos + name_len].decode('utf-8')
+            pos += name_len
+
+            self.entries.append(PackEntry(offset, size, uid, name))
+            self.uids.setdefault(uid, []).append(i)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __getitem__(self, i):
+        entry = self.entries[i]
+        return self.view[entry.offset:entry.offset + entry.size]
+
+    def __iter__(self):
+        for i, entry in enumerate(self.entries):
+            yield entry, self[i]
+
+    def find(self, uid):
+        """Finds entries of files referring to the map UID.
+
+        Args:
+            uid (str): the map UID
+
+        Returns:
+            a list of entry indices
+        """
+        return list(self.uids.get(uid, ()))
+
+    def parse(self, i, **kwargs):
+        """Parses a single entry of the pack.
+
+        Args:
+            i (int): the index of the entry
+            **kwargs: the keyword arguments passed to Gbx
+
+        Returns:
+            the parsed Gbx instance
+        """
+        return Gbx(self[i], **kwargs)
+
+    def close(self):
+        """Unmaps the pack file.
+
+        If memoryviews returned by the reader are still alive, the file is unmapped once they are released.
+        """
+        self.view.release()
+        try:
+            self.mmap.close()
+        except BufferError:
+            pass
+
+
+_worker_pack = None
+
+
+def _open_worker_pack(path):
+    global _worker_pack
+    _worker_pack = PackReader(path)
+
+
+def _close_worker_pack():
+    global _worker_pack
+    if _worker_pack is not None:
+        _worker_pack.close()
+        _worker_pack = None
+
+
+def _parse_entry(args):
+    i, func = args
+    try:
+        return i, func(_worker_pack.parse(i)), None
+    except Exception as e:
+        return i, None, f'{type(e).__name__}: {e}'
+
+
+def parse_pack(path, func, workers=None, chunksize=64):
+    """Parses all entries of a pack with a pool of worker processes.
+
+    Every worker maps the pack once, entries are handed out in the order they are stored,
+    so the file is read sequentially. See parse_files for the requirements on func.
+
+    Args:
+        path (str): the path of the pack file
+        func (callable): called with the Gbx instance of every entry, the return value is yielded
+        workers (int): the number of worker processes, None uses os.cpu_count(), 1 parses in the current process
+        chunksize (int): the number of entries sent to a worker at once
+
+    Returns:
+        a generator of (PackEntry, result, error) tuples, error being None or a string describing the failure
+    """
+    with PackReader(path) as pack:
+        entries = pack.entries
+
+    tasks = ((i, func) for i in range(len(entries)))
+    results = pool_map(_parse_entry, tasks, workers, chunksize, initializer=_open_worker_pack, initargs=(path,))
+    try:
+        for i, result, error in results:
+            if error is not None:
+                logging.error(f'Failed to parse {entries[i].name}: {error}')
+            yield entries[i], result, error
+    finally:
+        results.close()
+        _close_worker_pack()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m pygbx.pack', description='Creates and lists Gbx pack files.')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    create = sub.add_parser('create', help='pack Gbx files and directories into a single file')
+    create.add_argument('pack')
+    create.add_argument('inputs', nargs='+')
+
+    listing = sub.add_parser('list', help='list the entries of a pack file')
+    listing.add_argument('pack')
+
+    args = parser.parse_args(argv)
+    if args.command == 'create':
+        with PackWriter(args.pack) as pack:
+            for inp in args.inputs:
+                if os.path.isdir(inp):
+                    for path in find_gbx_files(inp):
+                        pack.add_file(path, os.path.relpath(path, inp))
+                else:
+                    pack.add_file(inp)
+            print(f'Packed {len(pack.entries)} files into {args.pack}')
+    else:
+        with PackReader(args.pack) as pack:
+            for entry in pack.entries:
+                print(f'{entry.offset}\t{entry.size}\t{entry.uid}\t{entry.name}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+import os
+from multiprocessing import resource_tracker, shared_memory
+
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError('pygbx.samples requires numpy, install it with: pip install pygbx[ml]')
+
+from pygbx.batch import parse_files
+from pygbx.gbx import GbxType
+
+# The fields decoded from the beginning of every sample, the same layout as GhostSampleRecord.SAMPLE_FORMAT
+SAMPLE_DTYPE = np.dtype([
+    ('position', '<f4', (3,)),
+    ('angle', '<u2'),
+    ('axis_heading', '<i2'),
+    ('axis_pitch', '<i2'),
+    ('speed', '<i2'),
+    ('vel_heading', 'i1'),
+    ('vel_pitch', 'i1')
+])
+
+_RECORD_FIELDS = ('angle', 'axis_heading', 'axis_pitch', 'speed', 'vel_heading', 'vel_pitch')
+
+
+def _sample_offsets(num_samples, sample_sizes):
+    # Follows Gbx.read_ghost: samples past the listed sizes use the first size
+    sizes = np.full(num_samples, sample_sizes[0] if sample_sizes else 0, dtype=np.int64)
+    listed = min(len(sample_sizes), num_samples)
+    sizes[:listed] = sample_sizes[:listed]
+    return np.concatenate([[0], np.cumsum(sizes[:-1])]).astype(np.int64) if num_samples else sizes
+
+
+def sample_array(ghost):
+    """Decodes the samples of a ghost into a numpy structured array of SAMPLE_DTYPE.
+
+    The samples are decoded from the raw sample data in a single vectorized step if the ghost
+    was parsed with read_samples=False, and converted from the records of the ghost otherwise.
+
+    Args:
+        ghost (CGameGhost): the ghost
+
+    Returns:
+        a structured array with one row per sample, the time of sample i is i * ghost.sample_period
+    """
+    data = ghost.sample_data
+    if data is None:
+        records = ghost.records
+        samples = np.zeros(len(records), dtype=SAMPLE_DTYPE)
+        if records:
+            samples['position'] = [r.position.as_array() for r in records]
+            for name in _RECORD_FIELDS:
+                samples[name] = [getattr(r, name) for r in records]
+        return samples
+
+    num_samples = ghost.num_samples
+    buf = np.frombuffer(data, dtype=np.uint8)
+    sizes = set(ghost.sample_sizes)
+    if len(sizes) == 1 and next(iter(sizes)) >= SAMPLE_DTYPE.itemsize:
+        # All samples have the same size, the fields are read through a strided view
+        stride = sizes.pop()
+        view = np.ndarray((num_samples,), dtype=SAMPLE_DTYPE, buffer=buf, strides=(stride,))
+        return view.copy()
+
+    offsets = _sample_offsets(num_samples, ghost.sample_sizes)
+    rows = buf[offsets[:, None] + np.arange(SAMPLE_DTYPE.itemsize)]
+    return rows.view(SAMPLE_DTYPE).reshape(num_samples)
+
+
+def sample_times(num_samples, sample_period):
+    """Returns the race times of samples, in milliseconds.
+
+    Args:
+        num_samples (int): the number of samples
+        sample_period (int): the time between samples in milliseconds
+
+    Returns:
+        an int32 array of sample times
+    """
+    return np.arange(num_samples, dtype=np.int32) * np.int32(sample_period or 0)
+
+
+def display_speeds(samples):
+    """Returns the display speed of samples, in km/h, see GhostSampleRecord.display_speed.
+
+    Args:
+        samples (numpy.ndarray): a structured array of SAMPLE_DTYPE
+
+    Returns:
+        a float64 array of speeds, not truncated to integers
+    """
+    speed = samples['speed'].astype(np.float64)
+    return np.where(samples['speed'] == -0x8000, 0.0, np.abs(np.exp(speed / 1000.0) * 3.6))
+
+
+def _open_segment(name=None, size=0):
+    create = name is None
+    try:
+        return shared_memory.SharedMemory(name=name, create=create, size=size, track=False)
+    except TypeError:
+        # Before Python 3.13, segments are always tracked and unlinked when the process that
+        # created or opened them exits, even if other processes still use them
+        shm = shared_memory.SharedMemory(name=name, create=create, size=size)
+        if os.name == 'posix':
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        return shm
+
+
+class SharedSamples(object):
+    """Describes the samples of one or more ghosts placed in a shared memory segment.
+
+    The descriptor only holds the name of the segment and the layout of the samples, so it is cheap
+    to send between processes. Any process can then access the samples without copying them.
+    Segments are not removed automatically: the process that consumes the samples has to call
+    unlink once they are no longer needed by any process.
+
+        shared = share_samples(ghosts)  # in a worker process
+        ...
+        with shared:                    # in the parent process
+            for samples in shared.arrays():
+                print(samples['position'].mean(axis=0))
+        shared.unlink()
+    """
+
+    def __init__(self, name, counts, sample_periods):
+        self.name = name
+        self.counts = list(counts)
+        self.sample_periods = list(sample_periods)
+        self._shm = None
+
+    def __getstate__(self):
+        return {'name': self.name, 'counts': self.counts, 'sample_periods': self.sample_periods, '_shm': None}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return len(self.counts)
+
+    def __repr__(self):
+        return f'SharedSamples({self.name!r}, {len(self)} ghosts, {sum(self.counts)} samples)'
+
+    def samples(self):
+        """Returns a structured array of SAMPLE_DTYPE of the samples of all ghosts, backed by the segment."""
+        if self._shm is None:
+            self._shm = _open_segment(self.name)
+        return np.ndarray((sum(self.counts),), dtype=SAMPLE_DTYPE, buffer=self._shm.buf)
+
+    def arrays(self):
+        """Returns the samples of every ghost as views of the segment, see samples."""
+        samples = self.samples()
+        offsets = np.cumsum([0] + self.counts)
+        return [samples[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
+
+    def times(self, i):
+        """Returns the sample times of the ghost at position i, see sample_times."""
+        return sample_times(self.counts[i], self.sample_periods[i])
+
+    def close(self):
+        """Closes the access to the segment of this process, the segment itself is kept.
+
+        Arrays returned by samples and arrays keep the segment mapped until they are deleted.
+        """
+        if self._shm is not None:
+            try:
+                self._shm.close()
+            except BufferError:
+                pass
+            self._shm = None
+
+    def unlink(self):
+        """Closes and removes the segment, the samples are no longer available to any process."""
+        self.close()
+        # Opened with tracking, as unlink stops tracking the segment
+        shm = shared_memory.SharedMemory(self.name)
+        shm.unlink()
+        shm.close()
+
+
+def share_samples(ghosts):
+    """Decodes the samples of ghosts into a new shared memory segment.
+
+    Args:
+        ghosts (list): the CGameGhost instances
+
+    Returns:
+        the SharedSamples descriptor of the segment
+    """
+    arrays = [sample_array(ghost) for ghost in ghosts]
+    counts = [len(a) for a in arrays]
+    shm = _open_segment(size=max(sum(counts) * SAMPLE_DTYPE.itemsize, 1))
+    try:
+        out = np.ndarray((sum(counts),), dtype=SAMPLE_DTYPE, buffer=shm.buf)
+        if arrays:
+            np.concatenate(arrays, out=out)
+        del out
+        return SharedSamples(shm.name, counts, [ghost.sample_period for ghost in ghosts])
+    finally:
+        shm.close()
+
+
+def _share_ghosts(g):
+    ghosts = g.get_classes_by_ids([GbxType.CTN_GHOST, GbxType.CTN_GHOST_OLD])
+    return share_samples(ghosts) if ghosts else None
+
+
+def parse_shared_samples(paths, workers=None, chunksize=8):
+    """Parses replays with a pool of worker processes that place the ghost samples in shared memory.
+
+    Workers parse the files with read_samples=False, decode the samples with sample_array and only
+    send back a SharedSamples descriptor. The caller is responsible for unlinking every returned
+    descriptor once done with it.
+
+    Args:
+        paths (list): the file paths
+        workers (int): the number of worker processes, see pygbx.batch.parse_files
+        chunksize (int): the number of files sent to a worker process at once
+
+    Returns:
+        a generator of (path, shared, error) tuples, shared being None for files without ghosts
+    """
+    return parse_files(paths, _share_ghosts, workers=workers, chunksize=chunksize,
+                       options={'read_samples': False})
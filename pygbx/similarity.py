@@ -0,0 +1,306 @@
+import hashlib
+import random
+from array import array
+from functools import partial
+
+from pygbx.batch import parse_files
+from pygbx.gbx import GbxType
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 61) - 1
+DEFAULT_NUM_PERM = 128
+
+
+def block_shingles(challenge, position_invariant=False):
+    """Computes the set of hashed (block name, rotation, position) tuples of a challenge.
+
+    Args:
+        challenge (CGameChallenge): the parsed challenge
+        position_invariant (bool): whether to make positions relative to the smallest block coordinates
+            in the map, so that a map moved as a whole within the grid produces the same shingles
+
+    Returns:
+        a set of 64 bit integers, one for each distinct block tuple
+    """
+    blocks = challenge.blocks
+    ox = oy = oz = 0
+    if position_invariant and blocks:
+        ox = min(block.position.x for block in blocks)
+        oy = min(block.position.y for block in blocks)
+        oz = min(block.position.z for block in blocks)
+
+    shingles = set()
+    for block in blocks:
+        p = block.position
+        key = f'{block.name}|{block.rotation}|{p.x - ox}|{p.y - oy}|{p.z - oz}'.encode('utf-8')
+        shingles.add(int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'little'))
+
+    return shingles
+
+
+class MinHash(object):
+    """The MinHash class computes compact signatures of sets that estimate their Jaccard similarity.
+
+    A MinHash instance holds the random permutations used for hashing, signatures are only
+    comparable if they were computed with the same number of permutations and seed.
+    """
+
+    def __init__(self, num_perm=DEFAULT_NUM_PERM, seed=1):
+        """Creates the permutations used to compute signatures.
+
+        Args:
+            num_perm (int): the number of permutations, i.e the length of the signatures
+            seed (int): the seed of the permutations
+        """
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self.seed = seed
+        self.permutations = [
+            (rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, shingles):
+        """Computes the signature of a set of hashed elements.
+
+        Args:
+            shingles (set): the 64 bit integers to compute the signature of, see block_shingles
+
+        Returns:
+            the Signature of the set
+        """
+        if not shingles:
+            return Signature(array('Q', [MAX_HASH] * self.num_perm))
+
+        values = array('Q', [
+            min((a * h + b) % MERSENNE_PRIME for h in shingles)
+            for a, b in self.permutations
+        ])
+        return Signature(values)
+
+    def challenge_signature(self, challenge, position_invariant=False):
+        """Computes the signature of the blocks of a challenge, see block_shingles.
+
+        Args:
+            challenge (CGameChallenge): the parsed challenge
+            position_invariant (bool): whether positions are made relative to the map's smallest block coordinates
+
+        Returns:
+            the Signature of the challenge
+        """
+        return self.signature(block_shingles(challenge, position_invariant))
+
+
+class Signature(object):
+    """A MinHash signature, which is a fixed length array of the minimum permuted hashes of a set."""
+
+    def __init__(self, values):
+        self.values = values
+
+    def __len__(self):
+        return len(self.values)
+
+    def __eq__(self, other):
+        return isinstance(other, Signature) and self.values == other.values
+
+    def jaccard(self, other):
+        """Estimates the Jaccard similarity of the sets the signatures were computed from.
+
+        Args:
+            other (Signature): the other signature, computed with the same MinHash
+
+        Returns:
+            the estimated similarity between 0 and 1
+        """
+        if len(self.values) != len(other.values):
+            raise ValueError('signatures have a different number of permutations')
+
+        return sum(1 for a, b in zip(self.values, other.values) if a == b) / len(self.values)
+
+    def to_bytes(self):
+        """Serializes the signature.
+
+        Returns:
+            the signature as 8 bytes per permutation
+        """
+        return self.values.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Deserializes a signature returned by to_bytes.
+
+        Args:
+            data (bytes): the serialized signature
+
+        Returns:
+            the Signature
+        """
+        values = array('Q')
+        values.frombytes(data)
+        return cls(values)
+
+
+class LSHIndex(object):
+    """The LSHIndex class finds near duplicate signatures without comparing all pairs.
+
+    Signatures are split into bands of rows; two signatures become candidates if all rows of at least
+    one band are equal. With b bands of r rows, pairs with a Jaccard similarity s are found with the
+    probability 1 - (1 - s^r)^b, the threshold of the resulting S-curve is roughly (1 / b)^(1 / r).
+    Lookups only visit the buckets a signature falls into, so the cost does not depend on the number
+    of indexed signatures.
+
+        minhash = MinHash()
+        index = LSHIndex()
+        for key, challenge in challenges:
+            index.add(key, minhash.challenge_signature(challenge))
+        duplicates = index.query(minhash.challenge_signature(new_challenge), threshold=0.8)
+    """
+
+    def __init__(self, num_perm=DEFAULT_NUM_PERM, bands=32):
+        """Creates an empty index.
+
+        Args:
+            num_perm (int): the length of the indexed signatures
+            bands (int): the number of bands, has to divide num_perm
+        """
+        if num_perm % bands != 0:
+            raise ValueError('the number of bands has to divide the number of permutations')
+
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.buckets = [{} for _ in range(bands)]
+        self.signatures = {}
+
+    def __len__(self):
+        return len(self.signatures)
+
+    def __contains__(self, key):
+        return key in self.signatures
+
+    @property
+    def threshold(self):
+        """The approximate similarity above which pairs are likely to become candidates."""
+        return (1.0 / self.bands) ** (1.0 / self.rows)
+
+    def _band_keys(self, signature):
+        if len(signature) != self.num_perm:
+            raise ValueError(f'expected a signature of {self.num_perm} permutations, got {len(signature)}')
+
+        data = signature.to_bytes()
+        size = self.rows * 8
+        return [data[i * size:(i + 1) * size] for i in range(self.bands)]
+
+    def add(self, key, signature):
+        """Adds a signature to the index.
+
+        Args:
+            key (str): the unique key of the map the signature was computed from
+            signature (Signature): the signature
+        """
+        if key in self.signatures:
+            self.remove(key)
+
+        self.signatures[key] = signature
+        for bucket, band in zip(self.buckets, self._band_keys(signature)):
+            bucket.setdefault(band, []).append(key)
+
+    def remove(self, key):
+        """Removes a signature from the index.
+
+        Args:
+            key (str): the key the signature was added with
+        """
+        signature = self.signatures.pop(key)
+        for bucket, band in zip(self.buckets, self._band_keys(signature)):
+            keys = bucket[band]
+            keys.remove(key)
+            if not keys:
+                del bucket[band]
+
+    def candidates(self, signature):
+        """Finds keys of signatures that share at least one band with the provided signature.
+
+        Args:
+            signature (Signature): the signature to look up
+
+        Returns:
+            a set of candidate keys
+        """
+        found = set()
+        for bucket, band in zip(self.buckets, self._band_keys(signature)):
+            found.update(bucket.get(band, ()))
+
+        return found
+
+    def query(self, signature, threshold=None):
+        """Finds indexed signatures similar to the provided signature.
+
+        Args:
+            signature (Signature): the signature to look up
+            threshold (float): the minimum estimated Jaccard similarity, None returns all candidates
+
+        Returns:
+            a list of (key, similarity) tuples sorted by decreasing similarity
+        """
+        results = []
+        for key in self.candidates(signature):
+            similarity = signature.jaccard(self.signatures[key])
+            if threshold is None or similarity >= threshold:
+                results.append((key, similarity))
+
+        results.sort(key=lambda r: (-r[1], str(r[0])))
+        return results
+
+    def duplicate_pairs(self, threshold=None):
+        """Finds all pairs of indexed signatures that are near duplicates.
+
+        Args:
+            threshold (float): the minimum estimated Jaccard similarity, None returns all candidate pairs
+
+        Returns:
+            a set of (key, key, similarity) tuples
+        """
+        pairs = {}
+        for bucket in self.buckets:
+            for keys in bucket.values():
+                for i in range(len(keys)):
+                    for j in range(i + 1, len(keys)):
+                        a, b = sorted((keys[i], keys[j]), key=str)
+                        if (a, b) not in pairs:
+                            pairs[(a, b)] = self.signatures[a].jaccard(self.signatures[b])
+
+        return {(a, b, s) for (a, b), s in pairs.items() if threshold is None or s >= threshold}
+
+
+_minhashes = {}
+
+
+def _challenge_signature(g, num_perm, seed, position_invariant):
+    if (num_perm, seed) not in _minhashes:
+        _minhashes[(num_perm, seed)] = MinHash(num_perm, seed)
+
+    challenge = g.get_class_by_id(GbxType.CHALLENGE) or g.get_class_by_id(GbxType.CHALLENGE_OLD)
+    if not challenge:
+        return None
+
+    return _minhashes[(num_perm, seed)].challenge_signature(challenge, position_invariant)
+
+
+def signatures_from_files(paths, num_perm=DEFAULT_NUM_PERM, seed=1, position_invariant=False, workers=None):
+    """Parses the provided Challenge files in parallel and computes their signatures.
+
+    Args:
+        paths (list): the file paths
+        num_perm (int): the number of permutations, see MinHash
+        seed (int): the seed of the permutations, see MinHash
+        position_invariant (bool): whether positions are made relative to the map's smallest block coordinates
+        workers (int): the number of worker processes, see parse_files
+
+    Returns:
+        a generator of (path, Signature) tuples for files that contain a Challenge
+    """
+    func = partial(_challenge_signature, num_perm=num_perm, seed=seed, position_invariant=position_invariant)
+    for path, signature, _ in parse_files(paths, func, workers):
+        if signature is not None:
+            yield path, signature
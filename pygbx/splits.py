@@ -0,0 +1,254 @@
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError('pygbx.splits requires numpy, install it with: pip install pygbx[ml]')
+
+from pygbx.batch import parse_files
+from pygbx.gbx import GbxType
+
+# Checkpoint times at or above this value are invalid, e.g 0xFFFFFFFF for checkpoints not reached
+_INVALID_TIME = 2 ** 31 - 1
+
+# Files are parsed without the samples and inputs of ghosts, the splits only need the checkpoint times
+PARSE_OPTIONS = {'read_samples': False, 'read_inputs': False}
+
+
+def _ghost_splits(g):
+    ghosts = g.get_classes_by_ids([GbxType.CTN_GHOST, GbxType.CTN_GHOST_OLD])
+    return [(ghost.uid, ghost.cp_times, ghost.login, ghost.race_time) for ghost in ghosts]
+
+
+class SplitMatrix(object):
+    """The checkpoint times of many replays of a map, as a dense matrix.
+
+    Rows are replays and columns are checkpoints, the last checkpoint being the finish for finished
+    runs. Runs that did not reach every checkpoint are padded, the mask tells which times are valid.
+
+    Attributes:
+        uid (str): the map UID
+        times (numpy.ndarray): the int32 (replays, checkpoints) matrix of cumulative times in milliseconds,
+            -1 where the checkpoint was not reached
+        mask (numpy.ndarray): the boolean (replays, checkpoints) matrix, True where the time is valid
+        logins (list): the driver login of every replay
+        race_times (numpy.ndarray): the int64 race time of every replay, -1 if not provided or invalid,
+            e.g for unfinished runs
+    """
+
+    def __init__(self, uid, times, mask, logins, race_times):
+        self.uid = uid
+        self.times = times
+        self.mask = mask
+        self.logins = logins
+        self.race_times = race_times
+
+    def __len__(self):
+        return len(self.times)
+
+    def __repr__(self):
+        return f'SplitMatrix({self.uid!r}, {len(self)} replays, {self.num_checkpoints} checkpoints)'
+
+    @property
+    def num_checkpoints(self):
+        return self.times.shape[1]
+
+    @property
+    def complete(self):
+        """The boolean mask of replays that reached every checkpoint."""
+        return self.mask.all(axis=1)
+
+    def sector_times(self):
+        """Returns the time spent between consecutive checkpoints.
+
+        Returns:
+            a tuple of (sectors, mask): the int32 (replays, checkpoints) matrix of sector times, the
+            first sector starting at the start of the race, and the mask of valid sector times
+        """
+        previous = np.zeros_like(self.times)
+        previous[:, 1:] = self.times[:, :-1]
+        previous_mask = np.ones_like(self.mask)
+        previous_mask[:, 1:] = self.mask[:, :-1]
+
+        mask = self.mask & previous_mask
+        return np.where(mask, self.times - previous, -1), mask
+
+    def best(self):
+        """Returns the best cumulative time at every checkpoint, NaN if no replay reached it."""
+        return self.percentile(0)
+
+    def median(self):
+        """Returns the median cumulative time at every checkpoint, NaN if no replay reached it."""
+        return self.percentile(50)
+
+    def percentile(self, q, sectors=False):
+        """Returns percentiles of the times at every checkpoint, ignoring the invalid times.
+
+        Args:
+            q (float/list): the percentile or percentiles, between 0 and 100
+            sectors (bool): whether to compute the percentiles of the sector times instead of
+                the cumulative times
+
+        Returns:
+            a float64 array of shape (checkpoints,), or (len(q), checkpoints) for a list of percentiles,
+            NaN for checkpoints no replay reached
+        """
+        values, mask = self.sector_times() if sectors else (self.times, self.mask)
+        reached = mask.any(axis=0)
+        result = np.full(np.shape(q) + (self.num_checkpoints,), np.nan)
+        if reached.any():
+            result[..., reached] = np.nanpercentile(np.where(mask, values, np.nan)[:, reached], q, axis=0)
+        return result
+
+    def best_sectors(self):
+        """Returns the best time of every sector, NaN if no replay has a valid time for it."""
+        return self.percentile(0, sectors=True)
+
+    def theoretical_best(self):
+        """Returns the sum of the best sector times, NaN if a sector has no valid time."""
+        return float(self.best_sectors().sum()) if self.num_checkpoints else float('nan')
+
+    def theoretical_best_splits(self):
+        """Returns the cumulative times at every checkpoint of a run driving every best sector."""
+        return np.cumsum(self.best_sectors())
+
+
+class _SplitBuffer(object):
+    # The checkpoint times of a map, as flat arrays growing with every replay
+    def __init__(self):
+        self.times = array('i')
+        self.lengths = array('i')
+        self.race_times = array('q')
+        self.logins = []
+
+    def add(self, cp_times, login, race_time):
+        self.times.extend(t if 0 <= t < _INVALID_TIME else -1 for t in cp_times)
+        self.lengths.append(len(cp_times))
+        self.race_times.append(race_time if race_time is not None and 0 <= race_time < _INVALID_TIME else -1)
+        self.logins.append(login)
+
+    def extend(self, other):
+        self.times.extend(other.times)
+        self.lengths.extend(other.lengths)
+        self.race_times.extend(other.race_times)
+        self.logins.extend(other.logins)
+
+
+class SplitAggregator(object):
+    """Aggregates the checkpoint times of ghosts, grouped by map UID, into SplitMatrix instances.
+
+    Ghosts are fed one at a time and only their checkpoint times are kept, as flat integer arrays,
+    so any number of replays can be streamed through the aggregator. Aggregators filled in separate
+    processes can be combined with merge.
+
+        aggregator = SplitAggregator()
+        aggregator.add_files(paths, workers=8)
+        splits = aggregator.splits('SyntheticMapUid')
+        print(splits.best(), splits.theoretical_best())
+    """
+
+    def __init__(self):
+        self._maps = {}
+
+    def __len__(self):
+        return sum(len(buf.lengths) for buf in self._maps.values())
+
+    def __contains__(self, uid):
+        return uid in self._maps
+
+    def __repr__(self):
+        return f'SplitAggregator({len(self._maps)} maps, {len(self)} replays)'
+
+    def uids(self):
+        """Returns the UIDs of the maps with at least one replay."""
+        return list(self._maps)
+
+    def add(self, uid, cp_times, login=None, race_time=None):
+        """Adds the checkpoint times of a replay.
+
+        Args:
+            uid (str): the map UID
+            cp_times (list): the cumulative checkpoint times in milliseconds
+            login (str): the login of the driver
+            race_time (int): the race time in milliseconds
+        """
+        buf = self._maps.get(uid)
+        if buf is None:
+            buf = self._maps[uid] = _SplitBuffer()
+        buf.add(cp_times, login, race_time)
+
+    def add_ghost(self, ghost):
+        """Adds the checkpoint times of a CGameCtnGhost, grouped by the uid member of the ghost."""
+        self.add(ghost.uid, ghost.cp_times, ghost.login, ghost.race_time)
+
+    def add_gbx(self, g):
+        """Adds the checkpoint times of every ghost of a parsed Gbx file."""
+        for ghost in g.get_classes_by_ids([GbxType.CTN_GHOST, GbxType.CTN_GHOST_OLD]):
+            self.add_ghost(ghost)
+
+    def add_files(self, paths, workers=None, chunksize=8):
+        """Parses replays with a pool of worker processes and adds the checkpoint times of their ghosts.
+
+        Workers skip the samples and inputs of ghosts and only send back the checkpoint times.
+        Files that fail to parse are logged and skipped.
+
+        Args:
+            paths (list): the file paths
+            workers (int): the number of worker processes, see pygbx.batch.parse_files
+            chunksize (int): the number of files sent to a worker process at once
+
+        Returns:
+            the number of added ghosts
+        """
+        added = 0
+        for _, ghosts, error in parse_files(paths, _ghost_splits, workers=workers, chunksize=chunksize,
+                                            options=PARSE_OPTIONS):
+            if error is None:
+                for ghost in ghosts:
+                    self.add(*ghost)
+                added += len(ghosts)
+
+        return added
+
+    def merge(self, other):
+        """Adds the replays of another SplitAggregator.
+
+        Args:
+            other (SplitAggregator): the aggregator to merge into this one
+        """
+        for uid, other_buf in other._maps.items():
+            buf = self._maps.get(uid)
+            if buf is None:
+                buf = self._maps[uid] = _SplitBuffer()
+            buf.extend(other_buf)
+
+    def splits(self, uid, num_checkpoints=None):
+        """Builds the SplitMatrix of a map.
+
+        Args:
+            uid (str): the map UID
+            num_checkpoints (int): the number of columns of the matrix, None uses the largest number
+                of checkpoint times of the replays of the map. Longer runs are truncated.
+
+        Returns:
+            the SplitMatrix of the map, empty if no replay of the map was added
+        """
+        buf = self._maps.get(uid)
+        if buf is None:
+            buf = _SplitBuffer()
+
+        lengths = np.frombuffer(buf.lengths, dtype=np.int32) if buf.lengths else np.zeros(0, dtype=np.int32)
+        flat = np.frombuffer(buf.times, dtype=np.int32) if buf.times else np.zeros(0, dtype=np.int32)
+        if num_checkpoints is None:
+            num_checkpoints = int(lengths.max()) if len(lengths) else 0
+
+        # Position of every flat time in its row, rows are filled at once
+        starts = np.repeat(np.cumsum(lengths) - lengths, lengths)
+        columns = np.arange(len(flat)) - starts
+        rows = np.repeat(np.arange(len(lengths)), lengths)
+        kept = columns < num_checkpoints
+
+        times = np.full((len(lengths), num_checkpoints), -1, dtype=np.int32)
+        times[rows[kept], columns[kept]] = flat[kept]
+        race_times = np.array(buf.race_times, dtype=np.int64)
+        return SplitMatrix(uid, times, times >= 0, list(buf.logins), race_times)
@@ -0,0 +1,56 @@
+import pytest
+
+from pygbx.gbx import GbxType
+
+# The race time of unfinished runs and the time of checkpoints they did not reach
+DNF_TIME = 0xFFFFFFFF
+
+
+@pytest.fixture
+def synthetic():
+    # The synthetic files are compressed with LZO, tests generating them are skipped without python-lzo
+    pytest.importorskip('lzo')
+    from benchmarks import synthetic
+    return synthetic
+
+
+@pytest.fixture
+def replay_data(synthetic):
+    return synthetic.replay(200, 100, map_blocks=50)
+
+
+@pytest.fixture
+def dnf_replay_data(synthetic):
+    return synthetic.replay(100, 50, race_time=DNF_TIME, cp_times=[7000, 15000, DNF_TIME], sample_period=50,
+                            map_blocks=10)
+
+
+@pytest.fixture
+def challenge_data(synthetic):
+    return synthetic.challenge(300, 20)
+
+
+@pytest.fixture
+def challenge_paths(tmp_path, synthetic):
+    # Four challenges of 10 to 13 blocks followed by a file that fails to parse
+    paths = []
+    for i in range(4):
+        path = tmp_path / f'{i}.Challenge.Gbx'
+        path.write_bytes(synthetic.challenge(10 + i, seed=i))
+        paths.append(str(path))
+
+    bad = tmp_path / 'bad.Challenge.Gbx'
+    bad.write_bytes(b'not a gbx file')
+    paths.append(str(bad))
+    return paths
+
+
+def num_blocks(g):
+    return len(g.get_class_by_id(GbxType.CHALLENGE).blocks)
+
+
+def check_results(results):
+    # Checks the (name, result, error) tuples of parsing challenge_paths with num_blocks
+    assert [result for _, result, _ in results] == [10, 11, 12, 13, None]
+    assert all(error is None for _, _, error in results[:4])
+    assert results[4][2].startswith('GbxLoadError')
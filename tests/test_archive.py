@@ -0,0 +1,31 @@
+import tarfile
+import zipfile
+
+import pytest
+
+from pygbx.archive import parse_archive
+
+from conftest import check_results, num_blocks
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_parse_zip(tmp_path, challenge_paths, workers):
+    archive_path = str(tmp_path / 'maps.zip')
+    with zipfile.ZipFile(archive_path, 'w') as archive:
+        for path in challenge_paths:
+            archive.write(path, path.rsplit('/', 1)[-1])
+
+    results = list(parse_archive(archive_path, num_blocks, workers=workers))
+    check_results(results)
+    assert results[0][0] == '0.Challenge.Gbx'
+
+
+def test_parse_tar(tmp_path, challenge_paths):
+    archive_path = str(tmp_path / 'maps.tar.gz')
+    with tarfile.open(archive_path, 'w:gz') as archive:
+        for path in challenge_paths:
+            archive.add(path, 'maps/' + path.rsplit('/', 1)[-1])
+
+    results = list(parse_archive(archive_path, num_blocks, workers=1))
+    check_results(results)
+    assert results[0][0] == 'maps/0.Challenge.Gbx'
@@ -0,0 +1,45 @@
+import threading
+
+import pytest
+
+from pygbx.batch import parse_files, pool_map
+
+from conftest import check_results, num_blocks
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_parse_files(challenge_paths, workers):
+    check_results(list(parse_files(challenge_paths, num_blocks, workers=workers)))
+
+
+def test_parse_files_in_threads(challenge_paths):
+    check_results(list(parse_files(challenge_paths, num_blocks, workers=2, executor='thread')))
+
+
+def test_pool_map_in_current_thread():
+    initialized = []
+    results = pool_map(lambda _: threading.get_ident(), range(3), workers=1,
+                       initializer=initialized.append, initargs=(1,))
+    assert list(results) == [threading.get_ident()] * 3
+    assert initialized == [1]
+
+
+def test_pool_map_cancels_on_early_stop():
+    started = []
+    release = threading.Event()
+
+    def task(i):
+        started.append(i)
+        release.wait(5)
+        return i
+
+    results = pool_map(task, range(100), workers=2, executor='thread')
+    release.set()
+    assert next(results) == 0
+    results.close()
+    assert len(started) < 100
+
+
+def test_pool_map_unknown_executor():
+    with pytest.raises(ValueError):
+        list(pool_map(abs, [1], workers=2, executor='fiber'))
@@ -0,0 +1,28 @@
+from pygbx.block_index import BlockIndex
+
+
+def test_missing_environment_save_load(tmp_path):
+    index = BlockIndex()
+    index.add('a', None, ['CustomBlock', 'OtherBlock', 'CustomBlock'])
+    index.add('b', 'Stadium', ['StadiumRoadMain', 'CustomBlock'])
+    index.add('c', None, ['OtherBlock'])
+
+    path = str(tmp_path / 'blocks.idx')
+    index.save(path)
+    loaded = BlockIndex.load(path)
+    for i in (index, loaded):
+        assert i.maps_with_all(['CustomBlock']) == ['a', 'b']
+        assert i.count('CustomBlock', environment=None) == {'a': 2, 'b': 1}
+        assert i.maps_with_any(['OtherBlock']) == ['a', 'c']
+        assert i.maps_with_all(['StadiumRoadMain'], environment='Stadium') == ['b']
+
+
+def test_queries_do_not_change_the_index():
+    index = BlockIndex()
+    index.add('a', 'Stadium', ['StadiumRoadMain'])
+    extra_ids = repr(index.extra_ids)
+
+    assert index.maps_with_any(['UnknownBlock'], environment='Coast') == []
+    assert index.count('UnknownBlock') == {}
+    assert index.block_id('Island', 'UnknownBlock') is None
+    assert repr(index.extra_ids) == extra_ids
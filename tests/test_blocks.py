@@ -0,0 +1,19 @@
+import json
+
+import pygbx
+from pygbx.blocks import BLOCK_OFFSETS, BLOCK_TABLES
+from pygbx.canyon_block_offsets import CANYON_BLOCK_OFFSETS
+from pygbx.stadium_blocks import STADIUM_BLOCKS
+
+
+def test_registry_matches_modules():
+    assert dict(BLOCK_TABLES['Stadium']) == STADIUM_BLOCKS
+    assert dict(BLOCK_OFFSETS['Canyon']) == CANYON_BLOCK_OFFSETS
+
+
+def test_package_tables_are_dicts():
+    assert type(pygbx.STADIUM_BLOCKS) is dict
+    assert pygbx.STADIUM_BLOCKS == STADIUM_BLOCKS
+    assert pygbx.STADIUM_BLOCKS is pygbx.STADIUM_BLOCKS
+    assert type(pygbx.CANYON_BLOCK_OFFSETS) is dict
+    json.dumps(pygbx.CANYON_BLOCK_OFFSETS)
@@ -0,0 +1,53 @@
+import io
+import os
+import threading
+
+import pytest
+
+from pygbx.bytereader import ByteReader
+from pygbx.gbx import Gbx, GbxType
+
+
+class ShortReadStream(io.RawIOBase):
+    # A non-seekable stream returning at most 7 bytes per read, like a socket
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        n = min(len(b), 7, len(self.data) - self.pos)
+        b[:n] = self.data[self.pos:self.pos + n]
+        self.pos += n
+        return n
+
+
+def test_stream_reads():
+    reader = ByteReader(ShortReadStream(bytes(range(100))))
+    assert reader.streaming and reader.size is None
+    assert reader.read(20) == bytes(range(20))
+    reader.skip(30)
+    assert reader.read(10) == bytes(range(50, 60))
+
+    reader.pos = 10
+    with pytest.raises(ValueError):
+        reader.read(1)
+
+
+def test_parse_stream(replay_data):
+    g = Gbx(ShortReadStream(replay_data))
+    ghost = g.get_class_by_id(GbxType.CTN_GHOST)
+    assert ghost.cp_times == Gbx(replay_data).get_class_by_id(GbxType.CTN_GHOST).cp_times
+    assert len(g.get_class_by_id(GbxType.REPLAY_RECORD).track.get_class_by_id(GbxType.CHALLENGE).blocks) == 50
+
+
+def test_parse_pipe(challenge_data):
+    read_fd, write_fd = os.pipe()
+    writer = threading.Thread(target=lambda: (os.write(write_fd, challenge_data), os.close(write_fd)))
+    writer.start()
+    with os.fdopen(read_fd, 'rb') as f:
+        blocks = Gbx(f).get_class_by_id(GbxType.CHALLENGE).blocks
+    writer.join()
+    assert len(blocks) == 300
@@ -0,0 +1,32 @@
+import pytest
+
+from pygbx.compact import dumps, loads
+from pygbx.gbx import Gbx, GbxType
+from pygbx.headers import CGameChallenge, CGameCtnGhost
+
+
+def test_challenge_round_trip(challenge_data):
+    challenge = Gbx(challenge_data, keep_data=False).get_class_by_id(GbxType.CHALLENGE)
+    restored = CGameChallenge.from_compact(challenge.to_compact())
+    assert [vars(b) == vars(r) for b, r in zip(challenge.blocks, restored.blocks)] == [True] * 300
+    assert [i.path for i in restored.items] == [i.path for i in challenge.items]
+
+
+def test_ghost_round_trip(replay_data):
+    ghost = Gbx(replay_data, keep_data=False).get_class_by_id(GbxType.CTN_GHOST)
+    restored = CGameCtnGhost.from_compact(ghost.to_compact())
+    assert restored.cp_times == ghost.cp_times
+    assert [vars(e) for e in restored.control_entries] == [vars(e) for e in ghost.control_entries]
+    assert [r.position.as_array() for r in restored.records] == [r.position.as_array() for r in ghost.records]
+
+
+def test_replay_record_round_trip(replay_data):
+    record = Gbx(replay_data).get_class_by_id(GbxType.REPLAY_RECORD)
+    restored = loads(dumps(record))
+    assert restored.track.get_class_by_id(GbxType.CHALLENGE).map_uid == 'SyntheticMapUid'
+    assert len(restored.track.get_class_by_id(GbxType.CHALLENGE).blocks) == 50
+
+
+def test_invalid_data():
+    with pytest.raises(ValueError):
+        loads(b'not compact data')
@@ -0,0 +1,26 @@
+import pytest
+
+from pygbx import compression
+
+
+def test_default_decompressors_release_gil():
+    assert compression.get_decompressor('lzo').name == 'python-lzo'
+    assert compression.get_decompressor('lzo').releases_gil
+    assert compression.releases_gil()
+
+
+def test_register_decompressor():
+    previous = compression.get_decompressor('zlib').name
+    compression.register_decompressor('zlib', 'test-zlib', compression._zlib, activate=True)
+    try:
+        assert not compression.releases_gil()
+    finally:
+        compression.set_decompressor('zlib', previous)
+
+
+@pytest.mark.parametrize('buffer', [bytes, bytearray, memoryview])
+def test_lzo_accepts_bytes_like_objects(buffer):
+    lzo = pytest.importorskip('lzo')
+    data = b'pygbx ' * 100
+    compressed = lzo.compress(data, 1, False)
+    assert compression.decompress('lzo', buffer(compressed), len(data)) == data
@@ -0,0 +1,32 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from pygbx.dataset import Dataset, DatasetWriter, extract_tables  # noqa: E402
+from pygbx.gbx import Gbx  # noqa: E402
+
+
+def test_dnf_ghost(dnf_replay_data):
+    tables = extract_tables(Gbx(dnf_replay_data))
+    assert list(tables['ghosts']['race_time']) == [-1]
+    assert list(tables['checkpoints']['time']) == [7000, 15000, -1]
+
+
+def test_write_and_read(tmp_path, replay_data, dnf_replay_data):
+    paths = []
+    for name, data in (('finished', replay_data), ('dnf', dnf_replay_data)):
+        path = tmp_path / f'{name}.Replay.Gbx'
+        path.write_bytes(data)
+        paths.append(str(path))
+
+    with DatasetWriter(str(tmp_path / 'dataset'), shard_size=1, format='npz') as writer:
+        assert writer.add_files(paths, workers=1) == 2
+
+    dataset = Dataset(str(tmp_path / 'dataset'))
+    assert len(dataset) == 2
+    ghosts = dataset.read('ghosts')
+    assert list(ghosts['race_time']) == [30000, -1]
+    assert dataset.num_rows('samples') == 300
+
+    with DatasetWriter(str(tmp_path / 'dataset')) as writer:
+        assert writer.add_files(paths, workers=1) == 0
@@ -0,0 +1,64 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from pygbx.delta import ReferenceTrajectory, ghost_delta  # noqa: E402
+from pygbx.gbx import Gbx, GbxType  # noqa: E402
+from pygbx.headers import CGameCtnGhost, GhostSampleRecord, Vector3  # noqa: E402
+from pygbx.samples import display_speeds, sample_array  # noqa: E402
+
+
+def make_ghost(xs, zs, period=100):
+    ghost = CGameCtnGhost(0)
+    ghost.sample_period = period
+    ghost.records = [GhostSampleRecord(Vector3(x, 10, z), 0, 0, 0, 5000, 0, 0) for x, z in zip(xs, zs)]
+    ghost.num_samples = len(ghost.records)
+    return ghost
+
+
+def test_half_speed_ghost():
+    n = 100
+    reference = make_ghost(np.arange(n) * 10.0, np.zeros(n))
+    ghost = make_ghost(np.arange(n) * 5.0, np.full(n, 2.0))
+    delta = ghost_delta(reference, ghost)
+    assert np.allclose(delta.time_delta, 50 * np.arange(n))
+    assert np.allclose(delta.progress, 5 * np.arange(n))
+    assert np.allclose(np.abs(delta.lateral_offset), 2)
+    assert np.allclose(delta.speed_delta, 0)
+
+
+def test_compare_many_matches_compare():
+    n = 50
+    reference = ReferenceTrajectory(make_ghost(np.arange(n) * 10.0, np.zeros(n)))
+    ghosts = [make_ghost(np.arange(n) * 5.0, np.full(n, z)) for z in (2.0, -2.0)] + [make_ghost([], [])]
+    deltas = reference.compare_many(ghosts)
+    assert [len(d) for d in deltas] == [n, n, 0]
+    assert np.allclose(deltas[0].time_delta, reference.compare(ghosts[0]).time_delta)
+    assert np.allclose(deltas[0].lateral_offset, -deltas[1].lateral_offset)
+
+
+def test_window_on_overlapping_route():
+    xs = np.concatenate([np.arange(50) * 10.0, np.arange(50)[::-1] * 10.0])
+    reference = make_ghost(xs, np.zeros(100))
+    ghost = make_ghost(xs, np.ones(100))
+    # A segment is kept while any part of it lies within the window, so the bound is one segment longer
+    assert np.abs(ghost_delta(reference, ghost, window=1000).time_delta).max() <= 1000 + 100
+    assert np.abs(ghost_delta(reference, ghost).time_delta).max() > 1100
+
+
+def test_empty_reference():
+    with pytest.raises(ValueError):
+        ReferenceTrajectory(make_ghost([], []))
+
+
+def test_display_speeds(replay_data):
+    decoded = Gbx(replay_data).get_class_by_id(GbxType.CTN_GHOST)
+    samples = sample_array(Gbx(replay_data, read_samples=False).get_class_by_id(GbxType.CTN_GHOST))
+    assert display_speeds(samples).astype(int).tolist() == [r.display_speed for r in decoded.records]
+
+
+def test_same_ghost(replay_data):
+    ghost = Gbx(replay_data).get_class_by_id(GbxType.CTN_GHOST)
+    delta = ghost_delta(ghost, ghost)
+    assert np.allclose(delta.time_delta, 0, atol=1e-6)
+    assert np.allclose(delta.distance, 0, atol=1e-3)
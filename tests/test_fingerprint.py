@@ -0,0 +1,28 @@
+import pytest
+
+from pygbx.fingerprint import fingerprint
+from pygbx.gbx import Gbx
+
+
+def test_metadata_independent(synthetic):
+    first = fingerprint(Gbx(synthetic.challenge(50, uid='First', author='a')))
+    assert fingerprint(Gbx(synthetic.challenge(50, uid='Second', author='b'))) == first
+    assert fingerprint(Gbx(synthetic.challenge(50, seed=1))) != first
+
+
+def test_samples(synthetic, replay_data):
+    expected = fingerprint(Gbx(replay_data))
+    assert fingerprint(Gbx(replay_data, read_samples=False)) == expected
+    assert fingerprint(Gbx(replay_data, read_samples=False, keep_data=False)) == expected
+    assert fingerprint(Gbx(synthetic.replay(200, 100, map_blocks=50, seed=1))) != expected
+    assert fingerprint(Gbx(replay_data), samples=False) == fingerprint(Gbx(replay_data, keep_data=False), samples=False)
+
+
+def test_released_samples(replay_data):
+    with pytest.raises(ValueError):
+        fingerprint(Gbx(replay_data, keep_data=False))
+
+    with Gbx(replay_data) as g:
+        pass
+    with pytest.raises(ValueError):
+        fingerprint(g)
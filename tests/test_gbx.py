@@ -0,0 +1,57 @@
+import builtins
+
+import pytest
+
+import pygbx.gbx
+from pygbx.gbx import Gbx, GbxType
+
+
+def test_replay_ghost(replay_data):
+    g = Gbx(replay_data)
+    ghost = g.get_class_by_id(GbxType.CTN_GHOST)
+    assert ghost.race_time == 30000
+    assert ghost.cp_times == [6000, 12000, 18000, 24000, 30000]
+    assert ghost.uid == 'SyntheticMapUid'
+    assert len(ghost.records) == ghost.num_samples == 200
+    assert len(ghost.control_entries) == 100
+
+
+def test_embedded_map(replay_data):
+    # The embedded map is parsed from a memoryview of the decompressed body
+    track = Gbx(replay_data).get_class_by_id(GbxType.REPLAY_RECORD).track
+    assert len(track.get_class_by_id(GbxType.CHALLENGE).blocks) == 50
+
+
+def test_file_closed_on_header_error(tmp_path, monkeypatch, replay_data):
+    path = tmp_path / 'a.Replay.Gbx'
+    path.write_bytes(replay_data)
+    opened = []
+
+    def recording_open(*args, **kwargs):
+        f = builtins.open(*args, **kwargs)
+        opened.append(f)
+        return f
+
+    def failing_read(self):
+        raise ValueError('corrupted user data')
+
+    monkeypatch.setattr(pygbx.gbx, 'open', recording_open, raising=False)
+    monkeypatch.setattr(Gbx, '_read_user_data', failing_read)
+    with pytest.raises(ValueError):
+        Gbx(str(path))
+
+    assert len(opened) == 1 and opened[0].closed
+
+
+def test_context_manager(tmp_path, replay_data):
+    path = tmp_path / 'a.Replay.Gbx'
+    path.write_bytes(replay_data)
+    with Gbx(str(path)) as g:
+        ghost = g.get_class_by_id(GbxType.CTN_GHOST)
+    assert g.data is None
+    assert ghost.records[0].raw_data is None
+
+    # Samples that were not decoded are kept
+    with Gbx(replay_data, read_samples=False) as g:
+        pass
+    assert len(g.get_class_by_id(GbxType.CTN_GHOST).sample_data) == 200 * 40
@@ -0,0 +1,54 @@
+import os
+
+import pytest
+
+from pygbx.gbx import GbxType
+from pygbx.index import GbxIndex
+
+
+@pytest.fixture
+def corpus(tmp_path, synthetic):
+    for i in range(3):
+        challenge = synthetic.challenge(10 + i, uid=f'Map{i}', author=f'author{i % 2}')
+        replay = synthetic.replay(10, 10, race_time=30000 + i, uid=f'Map{i}', login=f'player{i}', map_blocks=1)
+        (tmp_path / f'{i}.Challenge.Gbx').write_bytes(challenge)
+        (tmp_path / f'{i}.Replay.Gbx').write_bytes(replay)
+    (tmp_path / 'bad.Challenge.Gbx').write_bytes(b'not a gbx file')
+    return tmp_path
+
+
+def test_update_and_find(corpus):
+    with GbxIndex() as index:
+        assert index.update(str(corpus), workers=1) == (7, 0)
+        assert len(index) == 7
+
+        maps = index.find_maps(author='author0', environment='Stadium')
+        assert [(m['map_uid'], m['num_blocks'], m['author_time']) for m in maps] == [('Map0', 10, 30000),
+                                                                                      ('Map2', 12, 30000)]
+        assert [m['map_uid'] for m in index.find_maps(min_blocks=11, max_blocks=11)] == ['Map1']
+
+        ghosts = index.find_ghosts(max_race_time=30001)
+        assert [(g['uid'], g['login'], g['race_time']) for g in ghosts] == [('Map0', 'player0', 30000),
+                                                                            ('Map1', 'player1', 30001)]
+        assert ghosts[0]['cp_times'] == [6000, 12000, 18000, 24000, 30000]
+
+        (path, error), = index.errors()
+        assert path.endswith('bad.Challenge.Gbx') and error
+        assert index.query('SELECT COUNT(*) FROM files WHERE type = ?', (GbxType.REPLAY_RECORD,))[0][0] == 3
+
+
+def test_incremental_update(corpus, synthetic):
+    with GbxIndex(str(corpus / 'index.sqlite')) as index:
+        index.update(str(corpus), workers=1)
+        assert index.update(str(corpus), workers=1) == (0, 0)
+
+        changed = corpus / '0.Challenge.Gbx'
+        changed.write_bytes(synthetic.challenge(20, uid='Map0'))
+        os.utime(changed, (0, 0))
+        os.remove(corpus / '1.Replay.Gbx')
+        assert index.update(str(corpus), workers=1) == (1, 1)
+        assert index.find_maps(map_uid='Map0')[0]['num_blocks'] == 20
+        assert index.find_ghosts(uid='Map1') == []
+
+    with GbxIndex(str(corpus / 'index.sqlite')) as index:
+        assert len(index) == 6
@@ -0,0 +1,65 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from pygbx.gbx import Gbx, GbxType  # noqa: E402
+from pygbx.inputs import ControlColumns, InputTimeline, control_columns, input_matrix  # noqa: E402
+
+
+def linear_state(ghost, name, time):
+    state = 0.0
+    for entry in ghost.control_entries:
+        if entry.time <= time and entry.event_name == name:
+            state = 1.0 if entry.enabled else 0.0
+    return state
+
+
+def test_read_inputs_disabled(replay_data):
+    decoded = Gbx(replay_data).get_class_by_id(GbxType.CTN_GHOST)
+    ghost = Gbx(replay_data, read_inputs=False).get_class_by_id(GbxType.CTN_GHOST)
+    assert decoded.num_control_entries == 100 and decoded.control_data is None
+    assert ghost.control_entries == []
+    assert ghost.num_control_entries == 100
+    assert len(ghost.control_data) == 9 * 100
+    assert ghost.control_names == decoded.control_names
+
+
+def test_raw_and_decoded_columns_match(replay_data):
+    decoded = control_columns(Gbx(replay_data).get_class_by_id(GbxType.CTN_GHOST))
+    raw = control_columns(Gbx(replay_data, read_inputs=False).get_class_by_id(GbxType.CTN_GHOST))
+    for name in ('time', 'name_index', 'enabled', 'flags'):
+        assert np.array_equal(getattr(decoded, name), getattr(raw, name))
+
+
+def test_analog_values():
+    columns = ControlColumns(['Steer'], np.array([0, 10]), np.zeros(2, dtype=np.uint8),
+                             np.array([0, 0xFFFF], dtype=np.uint16), np.array([1, 0xFF], dtype=np.uint16))
+    assert columns.values().tolist() == [-1.0, 1 / 65536]
+
+
+def test_input_matrix(replay_data):
+    ghost = Gbx(replay_data, read_inputs=False).get_class_by_id(GbxType.CTN_GHOST)
+    matrix, times = input_matrix(ghost, tick=10, channels=('steer', 'gas', 'brake', 'Respawn'))
+    assert matrix.shape == (len(times), 4) and matrix.dtype == np.float32
+    assert times[1] == 10
+    assert not matrix[:, 3].any()
+    assert matrix[:, 0].min() >= -1 and matrix[:, 0].max() <= 1
+
+
+def test_timeline_matches_linear_walk(replay_data):
+    ghost = Gbx(replay_data).get_class_by_id(GbxType.CTN_GHOST)
+    timeline = InputTimeline(ghost)
+    times = np.arange(-100, 31000, 97)
+    for name in ('Accelerate', 'Brake', 'SteerLeft', 'Unknown'):
+        expected = [linear_state(ghost, name, t) for t in times]
+        assert timeline.state_at(name, times).tolist() == expected
+        assert [timeline.state_at(name, int(t)) for t in times] == expected
+
+
+def test_events_between(replay_data):
+    ghost = Gbx(replay_data).get_class_by_id(GbxType.CTN_GHOST)
+    timeline = InputTimeline(ghost)
+    expected = [e.time for e in ghost.control_entries if 5000 <= e.time < 9000 and e.event_name == 'Brake']
+    assert timeline.events_between(5000, 9000, 'Brake').time.tolist() == expected
+    assert timeline.count_between(5000, 9000, 'Brake') == len(expected)
+    assert timeline.count_between(np.array([0, 5000]), np.array([5000, 9000])).shape == (2,)
@@ -0,0 +1,29 @@
+from pygbx.gbx import Gbx
+from pygbx.instrumentation import ParseProfiler
+
+
+def test_profiler_records_embedded_map(replay_data):
+    profiler = ParseProfiler()
+    Gbx(replay_data, profiler=profiler)
+    assert profiler.files == 2
+    assert 0x0304301F in profiler.chunks
+    assert profiler.phases['decompress'][0] == 2
+
+
+def test_profiler_counts_item_skips(synthetic):
+    profiler = ParseProfiler()
+    Gbx(synthetic.challenge(10, 20), profiler=profiler)
+    assert profiler.chunks[0x03043040].bytes_skipped > 0
+
+
+def test_merge(replay_data, challenge_data):
+    first, second, single = ParseProfiler(), ParseProfiler(), ParseProfiler()
+    Gbx(replay_data, profiler=first)
+    Gbx(challenge_data, profiler=second)
+    Gbx(replay_data, profiler=single)
+    Gbx(challenge_data, profiler=single)
+
+    first.merge(second)
+    assert first.files == single.files == 3
+    assert {cid: c.count for cid, c in first.chunks.items()} == {cid: c.count for cid, c in single.chunks.items()}
+    assert 'decompress' in first.summary()
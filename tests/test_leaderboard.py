@@ -0,0 +1,62 @@
+import random
+
+from pygbx.gbx import Gbx, GbxType
+from pygbx.leaderboard import Leaderboard
+
+from conftest import DNF_TIME
+
+
+def test_top_k_unique_logins():
+    leaderboard = Leaderboard(k=2)
+    leaderboard.add('map', 5000, 'a')
+    leaderboard.add('map', 4000, 'a')
+    leaderboard.add('map', 4500, 'b')
+    leaderboard.add('map', 4800, 'c')
+    assert not leaderboard.add('map', DNF_TIME, 'd')
+    assert [(time, login) for time, login, _, _ in leaderboard.top('map')] == [(4000, 'a'), (4500, 'b')]
+
+
+def test_merge_matches_single_pass():
+    rnd = random.Random(0)
+    rows = [(rnd.choice('xyz'), rnd.randint(1000, 1050), rnd.choice('abcdef'), None, f'p{i}') for i in range(500)]
+
+    single = Leaderboard(k=3)
+    parts = [Leaderboard(k=3) for _ in range(3)]
+    for i, row in enumerate(rows):
+        single.add(*row)
+        parts[i % 3].add(*row)
+
+    merged = parts[2]
+    merged.merge(parts[0])
+    merged.merge(parts[1])
+    assert merged.results() == single.results()
+
+
+def test_add_files(tmp_path, synthetic, dnf_replay_data):
+    paths = []
+    for i, race_time in enumerate([31000, 30000, 32000]):
+        path = tmp_path / f'{i}.Replay.Gbx'
+        path.write_bytes(synthetic.replay(10, 10, race_time=race_time, login=f'player{i}', map_blocks=1))
+        paths.append(str(path))
+    dnf = tmp_path / 'dnf.Replay.Gbx'
+    dnf.write_bytes(dnf_replay_data)
+    paths.append(str(dnf))
+
+    leaderboard = Leaderboard(k=2)
+    assert leaderboard.add_files(paths, workers=1) == 4
+    assert [(time, login) for time, login, _, _ in leaderboard.top('SyntheticMapUid')] == [
+        (30000, 'player1'), (31000, 'player0')]
+
+
+def test_add_gbx_from_ghosts(replay_data):
+    leaderboard = Leaderboard()
+    assert leaderboard.add_gbx(Gbx(replay_data), 'replay') == 1
+    assert leaderboard.top('SyntheticMapUid') == [(30000, 'pygbx', 'pygbx', 'replay')]
+
+
+def test_old_replay_record(replay_data):
+    g = Gbx(replay_data, header_only=True)
+    g.get_class_by_id(GbxType.REPLAY_RECORD).id = GbxType.REPLAY_RECORD_OLD
+    leaderboard = Leaderboard()
+    assert leaderboard.add_gbx(g, 'replay') == 1
+    assert leaderboard.top('SyntheticMapUid') == [(30000, 'pygbx', 'pygbx', 'replay')]
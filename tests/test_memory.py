@@ -0,0 +1,30 @@
+from pygbx.gbx import Gbx, GbxType
+from pygbx.memory import COMPONENTS
+
+
+def test_memory_report(replay_data):
+    report = Gbx(replay_data).memory_report()
+    assert set(report) == set(COMPONENTS) | {'total'}
+    assert report['total'] == sum(report[c] for c in COMPONENTS)
+    assert report['raw_buffers'] > len(replay_data)
+    assert report['ghost_samples'] > 0 and report['control_entries'] > 0 and report['track'] > 0
+
+
+def test_release(replay_data):
+    g = Gbx(replay_data)
+    before = g.memory_report()
+    g.release()
+    after = g.memory_report()
+    assert after['raw_buffers'] == 0
+    assert after['track'] < before['track']
+    assert after['ghost_samples'] == before['ghost_samples']
+
+
+def test_keep_data_disabled_keeps_raw_samples(replay_data):
+    raw = Gbx(replay_data, read_samples=False, keep_data=False)
+    assert len(raw.get_class_by_id(GbxType.CTN_GHOST).sample_data) == 200 * 40
+    assert raw.memory_report()['raw_buffers'] == 200 * 40
+
+    decoded = Gbx(replay_data, keep_data=False).get_class_by_id(GbxType.CTN_GHOST)
+    assert decoded.sample_data is None
+    assert all(record.raw_data is None for record in decoded.records)
@@ -0,0 +1,46 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from pygbx.gbx import Gbx, GbxType  # noqa: E402
+from pygbx.ml import UNKNOWN_ID, _encode_gbx, get_vocabulary, write_shards  # noqa: E402
+
+
+def test_decode_shapes():
+    vocabulary = get_vocabulary('Stadium')
+    ids = vocabulary.encode(['StadiumDirt', 'NotABlock', 'StadiumWater'])
+    assert ids[1] == UNKNOWN_ID
+    assert list(vocabulary.decode(ids)) == ['StadiumDirt', None, 'StadiumWater']
+    assert vocabulary.decode(ids.reshape(3, 1)).shape == (3, 1)
+
+
+@pytest.mark.parametrize('block_id', [4, np.int64(4), np.array(4)])
+def test_decode_scalar(block_id):
+    names = get_vocabulary('Stadium').decode(block_id)
+    assert names.shape == ()
+    assert names.item() == 'StadiumWater'
+
+
+@pytest.mark.parametrize('block_id', [UNKNOWN_ID, -1, 10 ** 6])
+def test_decode_scalar_unknown(block_id):
+    assert get_vocabulary('Stadium').decode(block_id).item() is None
+
+
+def test_encode_gbx(challenge_data):
+    g = Gbx(challenge_data)
+    blocks = _encode_gbx(g, 'sequence')
+    assert len(blocks) == 300
+
+    # Challenges stored under the old class ID are encoded too
+    g.get_class_by_id(GbxType.CHALLENGE).id = GbxType.CHALLENGE_OLD
+    assert np.array_equal(_encode_gbx(g, 'sequence'), blocks)
+
+
+def test_write_shards(tmp_path, challenge_paths):
+    shards = write_shards(challenge_paths, str(tmp_path / 'shards'), shard_size=3, workers=1)
+    assert len(shards) == 2
+    with np.load(shards[0]) as shard:
+        assert shard['lengths'].tolist() == [10, 11, 12]
+        assert shard['blocks'].shape == (3, 12, 5)
+    with np.load(shards[1]) as shard:
+        assert shard['paths'].tolist() == challenge_paths[3:4]
@@ -0,0 +1,39 @@
+import pytest
+
+from pygbx.gbx import Gbx, GbxType
+from pygbx.pack import PackReader, PackWriter, parse_pack
+
+from conftest import check_results, num_blocks
+
+
+@pytest.fixture
+def pack_path(tmp_path, challenge_paths):
+    path = str(tmp_path / 'maps.pack')
+    with PackWriter(path) as pack:
+        for challenge_path in challenge_paths:
+            pack.add_file(challenge_path)
+    return path
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_parse_pack(pack_path, workers):
+    results = list(parse_pack(pack_path, num_blocks, workers=workers))
+    check_results(results)
+    assert results[0][0].name == '0.Challenge.Gbx'
+
+
+def test_reader_entries_parse(tmp_path, replay_data):
+    # Entries are memoryview slices of the mapping, as is the embedded map of a replay read from them
+    path = str(tmp_path / 'replays.pack')
+    with PackWriter(path) as pack:
+        pack.add(replay_data, 'a.Replay.Gbx')
+
+    with PackReader(path) as pack:
+        (entry, data), = pack
+        assert isinstance(data, memoryview)
+        assert pack.find('SyntheticMapUid') == [0]
+
+        record = Gbx(data).get_class_by_id(GbxType.REPLAY_RECORD)
+        assert len(record.track.get_class_by_id(GbxType.CHALLENGE).blocks) == 50
+        assert len(pack.parse(0).get_class_by_id(GbxType.CTN_GHOST).records) == 200
+        data.release()
@@ -0,0 +1,46 @@
+import pickle
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from pygbx.gbx import Gbx, GbxType  # noqa: E402
+from pygbx.samples import parse_shared_samples, sample_array, sample_times, share_samples  # noqa: E402
+
+
+def test_raw_and_decoded_samples_match(replay_data):
+    decoded = Gbx(replay_data).get_class_by_id(GbxType.CTN_GHOST)
+    raw = Gbx(replay_data, read_samples=False, keep_data=False).get_class_by_id(GbxType.CTN_GHOST)
+    samples = sample_array(raw)
+    assert np.array_equal(sample_array(decoded), samples)
+    assert samples['position'].tolist() == [r.position.as_array() for r in decoded.records]
+    assert sample_times(3, raw.sample_period).tolist() == [0, raw.sample_period, 2 * raw.sample_period]
+
+
+def test_share_samples(replay_data, dnf_replay_data):
+    ghosts = [Gbx(data, read_samples=False).get_class_by_id(GbxType.CTN_GHOST)
+              for data in (replay_data, dnf_replay_data)]
+    shared = pickle.loads(pickle.dumps(share_samples(ghosts)))
+    try:
+        with shared:
+            arrays = shared.arrays()
+            assert [len(a) for a in arrays] == [200, 100]
+            assert np.array_equal(arrays[1], sample_array(ghosts[1]))
+            assert shared.times(1)[-1] == 99 * 50
+            del arrays
+    finally:
+        shared.unlink()
+
+
+def test_parse_shared_samples(tmp_path, replay_data):
+    path = tmp_path / 'a.Replay.Gbx'
+    path.write_bytes(replay_data)
+    expected = sample_array(Gbx(replay_data).get_class_by_id(GbxType.CTN_GHOST))
+
+    (_, shared, error), = parse_shared_samples([str(path)], workers=2)
+    assert error is None
+    try:
+        with shared:
+            assert np.array_equal(shared.arrays()[0], expected)
+    finally:
+        shared.unlink()
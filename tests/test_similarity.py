@@ -0,0 +1,51 @@
+import pytest
+
+from pygbx.similarity import LSHIndex, MinHash, Signature, signatures_from_files
+
+
+def test_jaccard_estimate():
+    minhash = MinHash()
+    first = minhash.signature(set(range(1000)))
+    second = minhash.signature(set(range(200, 1200)))
+    assert first.jaccard(second) == pytest.approx(800 / 1200, abs=0.15)
+    assert first.jaccard(first) == 1.0
+    assert minhash.signature(set()).jaccard(first) == 0.0
+
+    with pytest.raises(ValueError):
+        first.jaccard(MinHash(64).signature({1}))
+
+
+def test_signature_round_trip():
+    signature = MinHash(num_perm=16).signature({1, 2, 3})
+    assert Signature.from_bytes(signature.to_bytes()) == signature
+
+
+def test_lsh_index():
+    minhash = MinHash()
+    index = LSHIndex()
+    index.add('a', minhash.signature(set(range(1000))))
+    index.add('b', minhash.signature(set(range(10, 1010))))
+    index.add('c', minhash.signature(set(range(5000, 6000))))
+
+    assert [key for key, _ in index.query(minhash.signature(set(range(1000))), threshold=0.9)] == ['a', 'b']
+    assert {(a, b) for a, b, _ in index.duplicate_pairs(threshold=0.9)} == {('a', 'b')}
+
+    index.remove('b')
+    assert 'b' not in index and len(index) == 2
+    assert index.duplicate_pairs(threshold=0.9) == set()
+
+
+def test_signatures_from_files(tmp_path, synthetic):
+    paths = []
+    for name, seed in (('a', 0), ('b', 0), ('c', 1)):
+        path = tmp_path / f'{name}.Challenge.Gbx'
+        path.write_bytes(synthetic.challenge(200, seed=seed))
+        paths.append(str(path))
+    bad = tmp_path / 'bad.Challenge.Gbx'
+    bad.write_bytes(b'not a gbx file')
+    paths.append(str(bad))
+
+    signatures = dict(signatures_from_files(paths, workers=1))
+    assert sorted(signatures) == paths[:3]
+    assert signatures[paths[0]].jaccard(signatures[paths[1]]) == 1.0
+    assert signatures[paths[0]].jaccard(signatures[paths[2]]) < 0.5
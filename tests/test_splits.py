@@ -0,0 +1,69 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from pygbx.gbx import Gbx, GbxType  # noqa: E402
+from pygbx.splits import SplitAggregator  # noqa: E402
+
+from conftest import DNF_TIME  # noqa: E402
+
+
+def test_split_matrix():
+    aggregator = SplitAggregator()
+    aggregator.add('map', [1000, 2500, 4000], 'a', 4000)
+    aggregator.add('map', [900, 2700, 3900], 'b', 3900)
+    aggregator.add('map', [800, DNF_TIME, DNF_TIME], 'c', DNF_TIME)
+    aggregator.add('map', [1100], 'd')
+
+    splits = aggregator.splits('map')
+    assert splits.times.tolist() == [[1000, 2500, 4000], [900, 2700, 3900], [800, -1, -1], [1100, -1, -1]]
+    assert splits.complete.tolist() == [True, True, False, False]
+    assert splits.best().tolist() == [800, 2500, 3900]
+    assert splits.median().tolist() == [950, 2600, 3950]
+    assert splits.best_sectors().tolist() == [800, 1500, 1200]
+    assert splits.theoretical_best() == 3500
+    assert splits.race_times.tolist() == [4000, 3900, -1, -1]
+
+
+def test_empty_map():
+    splits = SplitAggregator().splits('unknown')
+    assert len(splits) == 0
+    assert np.isnan(splits.theoretical_best())
+
+
+def test_merge():
+    first, second = SplitAggregator(), SplitAggregator()
+    first.add('a', [1, 2])
+    second.add('a', [3, 4, 5])
+    second.add('b', [6])
+    first.merge(second)
+    assert sorted(first.uids()) == ['a', 'b']
+    assert first.splits('a').times.tolist() == [[1, 2, -1], [3, 4, 5]]
+
+
+def test_add_gbx(replay_data, dnf_replay_data):
+    aggregator = SplitAggregator()
+    aggregator.add_gbx(Gbx(replay_data))
+    aggregator.add_gbx(Gbx(dnf_replay_data))
+    splits = aggregator.splits('SyntheticMapUid', num_checkpoints=3)
+    assert splits.times.tolist() == [[6000, 12000, 18000], [7000, 15000, -1]]
+
+
+def test_add_files(tmp_path, replay_data, dnf_replay_data):
+    paths = []
+    for name, data in (('finished', replay_data), ('dnf', dnf_replay_data), ('bad', b'not a gbx file')):
+        path = tmp_path / f'{name}.Replay.Gbx'
+        path.write_bytes(data)
+        paths.append(str(path))
+
+    aggregator = SplitAggregator()
+    assert aggregator.add_files(paths, workers=1) == 2
+    assert aggregator.splits('SyntheticMapUid').race_times.tolist() == [30000, -1]
+
+
+def test_old_ghosts(replay_data):
+    g = Gbx(replay_data)
+    g.get_class_by_id(GbxType.CTN_GHOST).id = GbxType.CTN_GHOST_OLD
+    aggregator = SplitAggregator()
+    aggregator.add_gbx(g)
+    assert len(aggregator) == 1
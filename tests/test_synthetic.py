@@ -0,0 +1,32 @@
+from pygbx.gbx import Gbx, GbxType
+
+from conftest import DNF_TIME
+
+
+def test_challenge(challenge_data):
+    challenge = Gbx(challenge_data).get_class_by_id(GbxType.CHALLENGE)
+    assert (challenge.map_uid, challenge.environment, challenge.map_author) == ('SyntheticMapUid', 'Stadium', 'pygbx')
+    assert len(challenge.blocks) == 300
+    assert len(challenge.items) == 20
+
+
+def test_replay_header(replay_data):
+    g = Gbx(replay_data, header_only=True)
+    record = g.get_class_by_id(GbxType.REPLAY_RECORD)
+    assert (record.map_uid, record.race_time, record.driver_login) == ('SyntheticMapUid', 30000, 'pygbx')
+    assert g.get_class_by_id(GbxType.CTN_GHOST) is None
+
+
+def test_unfinished_replay(dnf_replay_data):
+    ghost = Gbx(dnf_replay_data).get_class_by_id(GbxType.CTN_GHOST)
+    assert ghost.race_time == DNF_TIME
+    assert ghost.cp_times == [7000, 15000, DNF_TIME]
+    assert ghost.sample_period == 50
+    assert max(entry.time for entry in ghost.control_entries) < 16000
+
+
+def test_write_corpus(tmp_path, synthetic):
+    paths = synthetic.write_corpus(str(tmp_path), num_maps=2, num_replays=3, num_blocks=10, num_samples=10)
+    assert len(paths) == 5
+    ghost = Gbx(paths[-1]).get_class_by_id(GbxType.CTN_GHOST)
+    assert (ghost.uid, ghost.login, ghost.race_time) == ('SyntheticMapUid0', 'player2', 30020)